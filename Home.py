@@ -1,6 +1,6 @@
 import streamlit as st
 import time
-from src.catalogo_loader import load_catalogo_padrao
+from src.catalogo_loader import get_catalogo
 
 st.set_page_config(page_title="Reposição Fácil", layout="wide", initial_sidebar_state="expanded")
 
@@ -10,6 +10,12 @@ if 'catalogo_dados' not in st.session_state:
 if 'catalogo_carregado' not in st.session_state:
     st.session_state['catalogo_carregado'] = False
 
+# Catálogo compartilhado do servidor (sem download quando ainda está dentro do TTL)
+dados_compartilhados = get_catalogo()
+if dados_compartilhados:
+    st.session_state['catalogo_dados'] = dados_compartilhados
+    st.session_state['catalogo_carregado'] = True
+
 st.sidebar.title("Reposição Rápida")
 st.sidebar.markdown("---")
 
@@ -22,8 +28,8 @@ else:
 # Botão de Carga
 if st.sidebar.button("⬇️ Carregar Padrão KITS/CATALOGO", type="primary"):
     with st.sidebar.status("Conectando ao Google Sheets...", expanded=False) as status:
-        # Busca os dados (Lógica congelada no catalogo_loader)
-        dados = load_catalogo_padrao()
+        # Força a revalidação na planilha (Lógica congelada no catalogo_loader)
+        dados = get_catalogo(forcar=True)
         
         if dados:
             st.session_state['catalogo_dados'] = dados
@@ -37,4 +43,4 @@ if st.sidebar.button("⬇️ Carregar Padrão KITS/CATALOGO", type="primary"):
 
 st.header("🚀 Sistema de Reposição")
 st.markdown("---")
-st.info("Certifique-se de ver o check verde à esquerda antes de ir para a Análise de Compra.")
\ No newline at end of file
+st.info("O catálogo é compartilhado entre as sessões e atualizado automaticamente. Use o botão à esquerda para forçar a atualização.")
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""
+Compara a explosão de kits antiga (merge + groupby) com o índice compilado.
+Uso: python -m benchmarks.bench_kits [n_skus ...]
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+from src.kits_index import KitIndex
+
+def gerar(n_skus, prop_kits=0.2, seed=42):
+    rng = np.random.default_rng(seed)
+    skus = np.array([f"SKU-{i:06d}" for i in range(n_skus)], dtype=object)
+    n_kits = int(n_skus * prop_kits)
+    kits = skus[:n_kits]
+    simples = skus[n_kits:]
+    n_comp = rng.integers(1, 4, n_kits)
+    df_kits = pd.DataFrame({
+        'sku_kit': np.repeat(kits, n_comp),
+        'sku_componente': rng.choice(simples, n_comp.sum()),
+        'quantidade_componente': rng.integers(1, 5, n_comp.sum()),
+    })
+    # Relatório Full com anúncios repetidos para o mesmo SKU
+    df_full = pd.DataFrame({'sku': rng.choice(skus, n_skus)})
+    df_full['v_un'] = rng.integers(0, 300, n_skus).astype(float)
+    df_full['e_un'] = rng.integers(0, 200, n_skus).astype(float)
+    df_full['falta'] = (df_full['v_un'] * 45 / 60 - df_full['e_un']).clip(lower=0)
+    return pd.Series(skus), df_kits, df_full
+
+def explosao_merge(df_full, df_kits):
+    df_f_exp = pd.merge(df_full, df_kits, left_on='sku', right_on='sku_kit', how='left')
+    df_f_exp['sku_comp'] = df_f_exp['sku_componente'].fillna(df_f_exp['sku'])
+    df_f_exp['qty_comp'] = df_f_exp['quantidade_componente'].fillna(1)
+    df_f_exp['v_comp'] = df_f_exp['v_un'] * df_f_exp['qty_comp']
+    df_f_exp['nec_comp'] = df_f_exp['falta'] * df_f_exp['qty_comp']
+    return df_f_exp.groupby('sku_comp').agg({
+        'v_comp': 'sum', 'e_un': 'sum', 'nec_comp': 'sum'
+    }).reset_index().rename(columns={'sku_comp': 'sku', 'v_comp': 'v_f_u', 'e_un': 'e_f_u', 'nec_comp': 'nec_full'})
+
+def explosao_indice(df_full, idx, codigos=None):
+    return idx.explodir(df_full['sku'], por_qtd={'v_f_u': df_full['v_un'], 'nec_full': df_full['falta']},
+                        por_linha={'e_f_u': df_full['e_un']}, codigos=codigos)
+
+def cronometrar(fn, repeticoes=5):
+    tempos = []
+    for _ in range(repeticoes):
+        t = time.perf_counter()
+        out = fn()
+        tempos.append(time.perf_counter() - t)
+    return out, min(tempos)
+
+def main(tamanhos):
+    for n in tamanhos:
+        skus, df_kits, df_full = gerar(n)
+        t = time.perf_counter()
+        idx = KitIndex(df_kits, skus_catalogo=skus)
+        t_build = time.perf_counter() - t
+
+        ref, t_merge = cronometrar(lambda: explosao_merge(df_full, df_kits))
+        novo, t_idx = cronometrar(lambda: explosao_indice(df_full, idx))
+        # Códigos já calculados (caso de recálculo com o mesmo relatório)
+        codigos = idx.codigos(df_full['sku'])
+        _, t_cod = cronometrar(lambda: explosao_indice(df_full, idx, codigos))
+
+        ref = ref.sort_values('sku', ignore_index=True)[['sku', 'v_f_u', 'e_f_u', 'nec_full']]
+        novo = novo[['sku', 'v_f_u', 'e_f_u', 'nec_full']]
+        pd.testing.assert_frame_equal(ref, novo, check_dtype=False, check_exact=False, rtol=1e-12)
+
+        print(f"{n:>8} SKUs | índice (build) {t_build*1000:7.1f} ms | merge+groupby {t_merge*1000:7.1f} ms "
+              f"| índice {t_idx*1000:7.1f} ms ({t_merge / t_idx:4.1f}x) "
+              f"| mat-vec c/ códigos prontos {t_cod*1000:7.1f} ms ({t_merge / t_cod:5.1f}x)")
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 100_000])
@@ -0,0 +1,134 @@
+"""
+Roda o motor de reposição sobre dados sintéticos (benchmarks.gerador), sem Supabase
+nem Google Drive, e mede tempo e pico de memória por etapa:
+parse, normalize, explode, merge, final, seguranca (+ catálogo e ponta a ponta).
+Saída em JSON (uma linha por escala); com --saida, acrescenta ao arquivo JSONL.
+Uso: python -m benchmarks.executar [--skus 1000 10000] [--kits 0.2] [--dias 60] [--saida historico.jsonl]
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from unittest import mock
+import pandas as pd
+from src import config, logic, storage, catalogo_loader, utils
+from benchmarks import gerador
+
+TIPOS = ("FULL", "EXT", "FISICO")
+
+def _etapas(arquivos, dias):
+    """Sequência de etapas do motor; cada uma lê e grava no dict `estado` compartilhado."""
+    estado = {}
+    def catalogo():
+        estado["prep"] = logic.preparar_catalogo(catalogo_loader.parse_catalogo(arquivos["CATALOGO"]))
+    def parse():
+        estado["brutos"] = {t: logic.find_header_and_read(io.BytesIO(arquivos[t])) for t in TIPOS}
+    def normalize():
+        estado["relatorios"] = {t: logic.projetar_relatorio(logic.normalizar_relatorio(df), t)
+                                for t, df in estado["brutos"].items()}
+    def explode():
+        estado["mapas"] = logic.explodir_relatorios(estado["prep"], estado["relatorios"])
+    def merge():
+        estado["base"] = logic.juntar_catalogo(estado["prep"], estado["mapas"])
+    def final():
+        estado["resultado"] = logic.aplicar_parametros(estado["base"], dias)
+    def seguranca():
+        df = estado["base"]["df_base"]
+        demanda = (df['v_f_u'].to_numpy(dtype=float) + df['v_s_u'].to_numpy(dtype=float)) / 60
+        estado["seguranca"] = logic.estoque_seguranca(demanda, dias, 0.95, desvio_lead=3)
+    return estado, [("catalogo", catalogo), ("parse", parse), ("normalize", normalize),
+                    ("explode", explode), ("merge", merge), ("final", final), ("seguranca", seguranca)]
+
+def _ponta_a_ponta(arquivos, dias):
+    """calcular_reposicao com stand-ins locais para storage.download e para o catálogo."""
+    def download(path):
+        return arquivos[path.split("/")[1].split(".")[0]]
+    def get_hash(path):
+        return None  # sem hash de origem: força download + parse (snapshot frio)
+    dados_cat = catalogo_loader.parse_catalogo(arquivos["CATALOGO"])
+    with tempfile.TemporaryDirectory() as tmp, \
+         mock.patch.object(storage, "download", download), \
+         mock.patch.object(storage, "get_hash", get_hash), \
+         mock.patch.object(catalogo_loader, "get_catalogo", lambda *a, **k: dados_cat), \
+         mock.patch.object(config, "SNAPSHOT_DIR", tmp), \
+         mock.patch("src.snapshot_cache._INDEX_FILE", os.path.join(tmp, "index.json")):
+        inicio = time.perf_counter()
+        df = logic.calcular_reposicao("BENCH", dias)
+        return time.perf_counter() - inicio, df
+
+def medir(arquivos, dias=60):
+    """Tempo (passada sem tracemalloc) e pico de memória (passada com tracemalloc) por etapa."""
+    tempos, picos = {}, {}
+    _, etapas = _etapas(arquivos, dias)
+    for nome, etapa in etapas:
+        inicio = time.perf_counter()
+        etapa()
+        tempos[nome] = round(time.perf_counter() - inicio, 4)
+
+    # Pico dentro de cada etapa (inclui o que as etapas anteriores mantêm vivo)
+    estado, etapas = _etapas(arquivos, dias)
+    tracemalloc.start()
+    for nome, etapa in etapas:
+        tracemalloc.reset_peak()
+        etapa()
+        picos[nome] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+    tracemalloc.stop()
+
+    total, df = _ponta_a_ponta(arquivos, dias)
+    return {
+        "tempo_s": tempos,
+        "pico_mb": picos,
+        "ponta_a_ponta_s": round(total, 4),
+        "linhas": {t: len(estado["relatorios"][t]) for t in TIPOS} | {"resultado": len(estado["resultado"])},
+        # Footprint do que fica em cache (base por empresa) e do resultado entregue à página
+        "memoria_mb": {"base": round(utils.memoria_mb(estado["base"]), 2),
+                       "resultado": round(utils.memoria_mb(estado["resultado"]), 2)},
+        "ok": df is not None and len(df) == len(estado["resultado"]),
+    }
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--skus", type=int, nargs="+", default=[1_000, 10_000])
+    ap.add_argument("--kits", type=float, default=0.2, help="proporção de SKUs que são kits")
+    ap.add_argument("--dias", type=int, default=60)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--saida", help="arquivo JSONL onde acrescentar os resultados")
+    args = ap.parse_args(argv)
+
+    for n in args.skus:
+        inicio = time.perf_counter()
+        arquivos = gerador.gerar(n, args.kits, args.seed)
+        registro = {
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "skus": n,
+            "prop_kits": args.kits,
+            "geracao_s": round(time.perf_counter() - inicio, 2),
+            "bytes": {t: len(c) for t, c in arquivos.items()},
+            **medir(arquivos, args.dias),
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        }
+        linha = json.dumps(registro, ensure_ascii=False)
+        print(linha)
+        if args.saida:
+            with open(args.saida, "a", encoding="utf-8") as f:
+                f.write(linha + "\n")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
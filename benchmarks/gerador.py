@@ -0,0 +1,111 @@
+"""
+Gera relatórios sintéticos (FULL/EXT/FISICO) e a planilha de catálogo/KITS
+no mesmo formato "sujo" dos arquivos reais: linha de título antes do cabeçalho,
+cabeçalhos com acento/espaços e números no padrão brasileiro.
+Uso: python -m benchmarks.gerador <n_skus> <pasta_saida> [prop_kits]
+"""
+import io
+import os
+import sys
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+NBSP = "\u00a0"
+FORNECEDORES = ["ALFA IMPORTS", "BETA DISTRIBUIDORA", "GAMA LTDA", "DELTA COMERCIO", "ÔMEGA IND."]
+
+def _br(v, casas=0, moeda=False):
+    """Formata números como texto BR (1.234,56), com 'R$' e espaço não separável opcionais."""
+    s = f"{v:,.{casas}f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    return f"R${NBSP}{s}" if moeda else s
+
+def _xlsx(abas):
+    """abas: {nome: [linhas]} -> bytes do .xlsx (openpyxl em modo write_only)."""
+    wb = Workbook(write_only=True)
+    for nome, linhas in abas.items():
+        ws = wb.create_sheet(nome)
+        for linha in linhas:
+            ws.append(linha)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+def _csv(df):
+    return df.to_csv(sep=";", index=False, quoting=1).encode("utf-8-sig")
+
+def gerar_catalogo(n_skus, prop_kits=0.2, seed=42):
+    """Devolve (bytes da planilha, skus simples, kits)."""
+    rng = np.random.default_rng(seed)
+    skus = np.array([f"SKU-{i:06d}" for i in range(n_skus)], dtype=object)
+    n_kits = int(n_skus * prop_kits)
+    kits, simples = skus[:n_kits], skus[n_kits:]
+
+    status = rng.choice(["repor", "Repor ", "NAO_REPOR"], n_skus, p=[0.8, 0.15, 0.05])
+    catalogo = [["SKU", "Descrição", "Fornecedor", "Status_Reposicao"]]
+    catalogo += [[s, f"Produto {s.lower()}", f, st]
+                 for s, f, st in zip(skus, rng.choice(FORNECEDORES, n_skus), status)]
+
+    n_comp = rng.integers(1, 4, n_kits)
+    comps = rng.choice(simples, n_comp.sum()) if len(simples) else np.array([], dtype=object)
+    kits_aba = [["kit_sku", "component_sku", "qty_por_kit"]]
+    kits_aba += [[k, c, int(q)] for k, c, q in zip(np.repeat(kits, n_comp), comps, rng.integers(1, 5, n_comp.sum()))]
+
+    return _xlsx({"CATALOGO_SIMPLES": catalogo, "KITS": kits_aba}), simples, kits
+
+def gerar_full(skus, n_linhas, seed=1):
+    """Relatório do Full (xlsx) com título na primeira linha e anúncios repetidos por SKU."""
+    rng = np.random.default_rng(seed)
+    amostra = rng.choice(skus, n_linhas)
+    vendas = rng.integers(0, 400, n_linhas)
+    estoque = rng.integers(0, 1500, n_linhas)
+    linhas = [["Relatório de Estoque Full - gerado automaticamente", None, None, None],
+              [None, None, None, None],
+              ["Anúncio (MLB)", "SKU", "Vendas últimos 60 dias", "Estoque disponível"]]
+    # Metade dos números como texto BR, metade numérica (como nos exports reais)
+    for i, (s, v, e) in enumerate(zip(amostra, vendas, estoque)):
+        linhas.append([f"MLB{1000000000 + i}", s, _br(v) if i % 2 else int(v), _br(e) if i % 3 == 0 else int(e)])
+    return _xlsx({"Estoque": linhas})
+
+def gerar_ext(skus, n_linhas, seed=2):
+    """Vendas Shopee em CSV (';', aspas, quantidades com milhar)."""
+    rng = np.random.default_rng(seed)
+    return _csv(pd.DataFrame({
+        "ID do Pedido": [f"2409{i:08d}" for i in range(n_linhas)],
+        "Referência SKU": rng.choice(skus, n_linhas),
+        "Qtde. Vendida": [_br(v) for v in rng.integers(1, 2500, n_linhas)],
+    }))
+
+def gerar_fisico(skus, seed=3):
+    """Estoque físico/custo em CSV com 'R$' e espaço não separável."""
+    rng = np.random.default_rng(seed)
+    n = len(skus)
+    return _csv(pd.DataFrame({
+        "Código (SKU)": skus,
+        "Saldo em Estoque": [_br(v) for v in rng.integers(0, 3000, n)],
+        "Preço de Custo": [_br(v, 2, moeda=True) for v in rng.uniform(1, 900, n)],
+    }))
+
+def gerar(n_skus, prop_kits=0.2, seed=42):
+    """Conjunto completo em memória: {"CATALOGO": bytes, "FULL": bytes, "EXT": bytes, "FISICO": bytes}."""
+    catalogo, simples, kits = gerar_catalogo(n_skus, prop_kits, seed)
+    vendidos = np.concatenate([simples, kits])
+    return {
+        "CATALOGO": catalogo,
+        "FULL": gerar_full(vendidos, max(1, int(n_skus * 0.6)), seed + 1),
+        "EXT": gerar_ext(vendidos, max(1, n_skus), seed + 2),
+        "FISICO": gerar_fisico(simples, seed + 3),
+    }
+
+def salvar(arquivos, pasta):
+    os.makedirs(pasta, exist_ok=True)
+    nomes = {"CATALOGO": "catalogo.xlsx", "FULL": "FULL.xlsx", "EXT": "EXT.csv", "FISICO": "FISICO.csv"}
+    for tipo, content in arquivos.items():
+        with open(os.path.join(pasta, nomes[tipo]), "wb") as f:
+            f.write(content)
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    pasta = sys.argv[2] if len(sys.argv) > 2 else "bench_dados"
+    prop = float(sys.argv[3]) if len(sys.argv) > 3 else 0.2
+    salvar(gerar(n, prop), pasta)
+    print(f"{n} SKUs gerados em {pasta}")
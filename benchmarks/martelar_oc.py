@@ -0,0 +1,54 @@
+"""
+Teste de concorrência da numeração de OCs: muitas threads reservando números
+(unitários e em bloco) ao mesmo tempo. Verifica que não há IDs repetidos nem buracos.
+Por padrão usa orders_db.SequenciaLocal; com --rpc usa o contador do Supabase
+(precisa de .streamlit/secrets.toml e de sql/oc_sequencia.sql aplicado; use um --ano de teste).
+Uso: python -m benchmarks.martelar_oc [--threads 32] [--reservas 200] [--rpc --ano 1999]
+"""
+import argparse
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src import orders_db
+
+def martelar(sequencia, empresas, threads, reservas, ano, bloco_max=5, seed=0):
+    def trabalho(i):
+        rng = random.Random(seed + i)
+        ids = []
+        for _ in range(reservas):
+            qtd = 1 if rng.random() < 0.7 else rng.randint(2, bloco_max)
+            ids += orders_db.reservar_numeros_oc(rng.choice(empresas), qtd, sequencia=sequencia, ano=ano)
+        return ids
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        todos = [oc for ids in pool.map(trabalho, range(threads)) for oc in ids]
+    tempo = time.perf_counter() - inicio
+
+    repetidos = len(todos) - len(set(todos))
+    por_prefixo = {}
+    for oc in todos:
+        prefixo, numero = oc.rsplit("-", 1)
+        por_prefixo.setdefault(prefixo, []).append(int(numero))
+    buracos = {p: (max(n) - min(n) + 1) - len(set(n)) for p, n in por_prefixo.items()}
+    return {"ids": len(todos), "repetidos": repetidos, "buracos": buracos,
+            "tempo_s": round(tempo, 3), "reservas_por_s": round(threads * reservas / tempo)}
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--threads", type=int, default=32)
+    ap.add_argument("--reservas", type=int, default=200, help="reservas por thread")
+    ap.add_argument("--ano", type=int, default=1999)
+    ap.add_argument("--rpc", action="store_true", help="usa o contador do Supabase em vez do local")
+    args = ap.parse_args(argv)
+
+    sequencia = orders_db.SequenciaRPC() if args.rpc else orders_db.SequenciaLocal()
+    res = martelar(sequencia, ["ALIVVIA", "JCA"], args.threads, args.reservas, args.ano)
+    print(res)
+    ok = res["repetidos"] == 0 and not any(res["buracos"].values())
+    print("OK" if ok else "FALHOU")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
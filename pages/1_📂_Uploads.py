@@ -1,5 +1,6 @@
 import streamlit as st
 import time
+import pandas as pd
 from src import storage
 
 st.set_page_config(page_title="Uploads", layout="wide")
@@ -12,6 +13,21 @@ if 'upload_counter' not in st.session_state:
 
 col_alivvia, col_jca = st.columns(2)
 
+# Uma listagem por pasta para todos os slots (cache curto, invalidado no upload/delete)
+manifesto = storage.listar_manifesto(["ALIVVIA", "JCA"])
+
+def descrever_arquivo(info):
+    """Texto curto com idade e tamanho do arquivo a partir do manifesto."""
+    partes = []
+    if info.get("updated_at"):
+        ts = pd.Timestamp(info["updated_at"])
+        if ts.tzinfo is None: ts = ts.tz_localize("UTC")
+        horas = (pd.Timestamp.now(tz="UTC") - ts).total_seconds() / 3600
+        partes.append(f"há {int(horas * 60)} min" if horas < 1 else f"há {horas:.0f} h" if horas < 48 else f"há {horas / 24:.0f} dias")
+    if info.get("size"):
+        partes.append(f"{info['size'] / 1024:,.0f} KB".replace(",", "."))
+    return " · ".join(partes)
+
 def render_file_slot(empresa, label_amigavel, tipo_arquivo):
     """
     Cria um bloco visual para gerenciar um único arquivo.
@@ -20,12 +36,14 @@ def render_file_slot(empresa, label_amigavel, tipo_arquivo):
     
     st.markdown(f"**{label_amigavel}**")
     
-    # 1. Verifica se já existe na nuvem
-    existe = storage.file_exists(path_cloud)
+    # 1. Verifica se já existe na nuvem (pelo manifesto já carregado)
+    info = manifesto.get(path_cloud)
     
-    if existe:
+    if info is not None:
         c1, c2 = st.columns([0.8, 0.2])
         c1.success("✅ Arquivo Salvo na Nuvem")
+        detalhes = descrever_arquivo(info)
+        if detalhes: c1.caption(detalhes)
         
         # Lógica para DELETAR
         if c2.button("🗑️", key=f"del_{path_cloud}", help="Excluir arquivo"):
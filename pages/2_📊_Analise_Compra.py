@@ -1,16 +1,19 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-from src.logic import calcular_reposicao
+from src import perf, cache_resultados, ocs_lote, orders_db, utils, alocacao, previsao, orcamento, carrinho
+from src.catalogo_loader import get_catalogo
+from src.logic import separar_empresas
+from src.resultados import publicar
 
 # Configuração da página
 st.set_page_config(page_title="Análise de Compra", layout="wide")
 
 st.title("📊 Painel de Compras e Alocação")
 
-# Verifica se os dados foram carregados na Home
+# Catálogo compartilhado do servidor (não exige mais o clique na Home)
+st.session_state['catalogo_dados'] = get_catalogo() or st.session_state.get('catalogo_dados')
 if not st.session_state.get('catalogo_dados'):
-    st.error("⚠️ O Catálogo não foi carregado. Volte à Home e clique em 'Carregar Padrão'.")
+    st.error("⚠️ O Catálogo não pôde ser carregado. Volte à Home e clique em 'Carregar Padrão'.")
     st.stop()
 
 # --- SIDEBAR: PARÂMETROS ---
@@ -19,24 +22,49 @@ with st.sidebar:
     dias_h = st.number_input("Dias Cobertura", min_value=15, value=45, step=5)
     cresc = st.number_input("Crescimento %", min_value=0.0, value=0.0, step=5.0)
     lead = st.number_input("Lead Time (Dias)", min_value=0, value=0, step=1)
+    modelo = st.selectbox("Previsão de demanda", previsao.MODELOS_UPLOADS, format_func=previsao.NOMES.get,
+                          help="Fora da regra de 60 dias, usa o histórico de uploads de cada empresa.")
+
+    st.divider()
+    st.header("🛡️ Estoque de Segurança")
+    nivel_servico = st.selectbox("Nível de serviço", [0.0, 0.90, 0.95, 0.975, 0.99],
+                                 format_func=lambda n: "Sem estoque de segurança" if n == 0 else f"{n:.1%}".replace(".", ","))
+    desvio_lead = st.number_input("Variação do lead time (dias)", min_value=0.0, value=0.0, step=1.0,
+                                  disabled=nivel_servico == 0,
+                                  help="Desvio padrão do prazo de entrega do fornecedor.")
     
     st.divider()
     st.header("🔍 Filtros Globais")
     f_sku = st.text_input("Filtrar SKU na Tabela").strip().upper()
     
     if st.button("🔄 Recalcular Tudo", type="primary", use_container_width=True):
-        st.cache_data.clear()
+        cache_resultados.limpar()
         st.rerun()
 
-# Função de cálculo com Cache
-@st.cache_data
-def carregar_resultados(d, c, l):
-    return {
-        "ALIVVIA": calcular_reposicao("ALIVVIA", d, c, l),
-        "JCA": calcular_reposicao("JCA", d, c, l)
-    }
+# Medição por etapa: ligada no servidor (PERF_ATIVO=1) ou só nesta sessão com ?debug=1
+with perf.execucao("analise", forcar=st.query_params.get("debug") == "1",
+                   dias=dias_h, crescimento=cresc, lead_time=lead, modelo=modelo,
+                   nivel_servico=nivel_servico, desvio_lead=desvio_lead) as execucao:
+    # Cache LRU por parâmetros + hashes dos relatórios/catálogo: upload novo já invalida sozinho
+    parametros = (dias_h, cresc, lead, modelo, nivel_servico, desvio_lead)
+    resultados = separar_empresas(cache_resultados.obter_resultados(["ALIVVIA", "JCA"], *parametros))
+    publicados = cache_resultados.obter_publicados(["ALIVVIA", "JCA"], *parametros)
+
+# Inbound e Alocação leem res_{empresa} (só leitura, esquema estável, lookup por SKU)
+publicar(publicados, ["ALIVVIA", "JCA"])
 
-resultados = carregar_resultados(dias_h, cresc, lead)
+if execucao is not None:
+    with st.expander(f"⏱️ Tempos por etapa ({execucao.total_s:.2f}s)"):
+        st.caption("Leitura/explosão só aparecem quando o cache das bases é refeito (upload novo ou Recalcular Tudo).")
+        st.dataframe(execucao.tabela(), use_container_width=True, hide_index=True)
+
+def _da_versao(nome, versao, calcular):
+    """Último cálculo da sessão para a versão do resultado; refeito só quando a versão muda."""
+    guardado = st.session_state.get(nome)
+    if guardado is None or guardado[0] != versao:
+        guardado = (versao, calcular())
+        st.session_state[nome] = guardado
+    return guardado[1]
 
 # --- CRIAÇÃO DAS ABAS ---
 tab_analise, tab_alocacao = st.tabs(["📋 Análise por Empresa", "📦 Calculadora de Alocação"])
@@ -48,23 +76,94 @@ with tab_analise:
         "Estoque full (Un)", "Estoque fisico (Un)", 
         "Compra sugerida", "Valor total da compra sugerida"
     ]
+    if nivel_servico:
+        colunas_exigidas.insert(colunas_exigidas.index("Compra sugerida"), "Estoque de segurança")
 
     for emp in ["ALIVVIA", "JCA"]:
         df = resultados.get(emp)
         if df is not None and not df.empty:
             st.subheader(f"🏢 {emp}")
-            df_view = df.copy()
+            df_view = df
             if f_sku:
-                df_view = df_view[df_view['SKU'].str.contains(f_sku, na=False)]
+                df_view = df[df['SKU'].str.contains(f_sku, na=False)]
             
             st.dataframe(df_view[colunas_exigidas], use_container_width=True, hide_index=True)
+
+            # Versão (entradas + parâmetros) do resultado: o que foi calculado sobre ele vale enquanto ela não mudar
+            versao_emp = publicados[emp].versao if emp in publicados else None
+            resumo = _da_versao(f"resumo_forn_{emp}", versao_emp, lambda: ocs_lote.resumo_por_fornecedor(df))
+
+            # OCs em lote: uma por fornecedor com a Compra sugerida (sem filtro de SKU)
+            with st.expander(f"🧾 Gerar OCs por fornecedor ({emp})"):
+                if resumo.empty:
+                    st.info("Nenhum SKU com compra sugerida.")
+                else:
+                    st.dataframe(resumo.style.format({"Valor": utils.format_br_currency}),
+                                 use_container_width=True, hide_index=True)
+                    obs_lote = st.text_input("Obs", value=f"Sugestão {dias_h}d", key=f"obs_ocs_{emp}")
+                    if st.button(f"Gerar {len(resumo)} OC(s)", key=f"gerar_ocs_{emp}", type="primary"):
+                        res = orders_db.salvar_pedidos(ocs_lote.montar_ocs(df, emp, obs=obs_lote))
+                        if res["salvos"]:
+                            st.success(f"{len(res['salvos'])} OC(s) salvas: {', '.join(res['salvos'])}")
+                        for oc_id, erro in res["falhas"].items():
+                            st.error(f"{oc_id}: {erro}")
+
+            # Compra sob orçamento: corta a Compra sugerida até caber no valor disponível.
+            # O otimizador só roda no "Otimizar" (o corpo do expander executa em todo rerun)
+            with st.expander(f"💰 Otimizar com orçamento ({emp})"):
+                total_sugerido = float(df['Valor total da compra sugerida'].sum())
+                with st.form(f"orc_form_{emp}"):
+                    o1, o2, o3 = st.columns(3)
+                    orc_global = o1.number_input("Orçamento total (R$)", min_value=0.0, value=round(total_sugerido, 2),
+                                                 step=1000.0, key=f"orc_total_{emp}")
+                    lote_orc = o2.number_input("Lote (múltiplo de compra)", min_value=1, value=1, step=1, key=f"orc_lote_{emp}")
+                    objetivo = o3.radio("Prioridade", list(orcamento.OBJETIVOS), format_func=orcamento.OBJETIVOS.get,
+                                        key=f"orc_obj_{emp}")
+                    st.caption("Orçamento e pedido mínimo por fornecedor são opcionais (0 = sem limite/sem mínimo).")
+                    limites = st.data_editor(
+                        pd.DataFrame({"Fornecedor": resumo['Fornecedor'], "Orçamento": 0.0, "Mínimo": 0.0}),
+                        use_container_width=True, hide_index=True, disabled=["Fornecedor"], key=f"orc_forn_{emp}")
+                    otimizar = st.form_submit_button("⚙️ Otimizar", type="primary")
+
+                if otimizar:
+                    por_forn = {f: v for f, v in zip(limites['Fornecedor'], limites['Orçamento']) if v > 0}
+                    minimos = {f: v for f, v in zip(limites['Fornecedor'], limites['Mínimo']) if v > 0}
+                    st.session_state[f"orc_res_{emp}"] = (versao_emp, orcamento.otimizar(
+                        df, orcamento=orc_global, por_fornecedor=por_forn, minimo_fornecedor=minimos,
+                        lote=int(lote_orc), objetivo=objetivo, prazo=dias_h + lead))
+
+                versao_otim, otimizado = st.session_state.get(f"orc_res_{emp}", (None, None))
+                if otimizado is None or versao_otim != versao_emp:
+                    st.caption("Ajuste os limites e clique em Otimizar.")
+                else:
+                    gasto = float(otimizado['Valor total da compra sugerida'].sum())
+                    m1, m2 = st.columns(2)
+                    m1.metric("Compra otimizada", utils.format_br_currency(gasto))
+                    m2.metric("Compra sugerida", utils.format_br_currency(total_sugerido))
+                    if otimizado.attrs["fornecedores_abaixo_minimo"]:
+                        st.warning("Fora por não atingir o pedido mínimo: " + ", ".join(otimizado.attrs["fornecedores_abaixo_minimo"]))
+                    if otimizado.attrs["skus_sem_custo"]:
+                        st.info(f"{len(otimizado.attrs['skus_sem_custo'])} SKU(s) sem preço de custo mantidos com a compra sugerida inteira.")
+                    st.dataframe(orcamento.resumo(otimizado).style.format({"Original": utils.format_br_currency,
+                                                                           "Escolhido": utils.format_br_currency}),
+                                 use_container_width=True, hide_index=True)
+                    b1, b2 = st.columns(2)
+                    if b1.button("🛒 Enviar ao carrinho", key=f"orc_carrinho_{emp}"):
+                        n = carrinho.da_sessao().adicionar_df(orcamento.para_carrinho(otimizado, emp))
+                        st.success(f"{n} item(ns) no carrinho.")
+                    if b2.button("🧾 Gerar OCs da compra otimizada", key=f"orc_ocs_{emp}"):
+                        res = orders_db.salvar_pedidos(ocs_lote.montar_ocs(otimizado, emp, obs=f"Orçamento {dias_h}d"))
+                        if res["salvos"]:
+                            st.success(f"{len(res['salvos'])} OC(s) salvas: {', '.join(res['salvos'])}")
+                        for oc_id, erro in res["falhas"].items():
+                            st.error(f"{oc_id}: {erro}")
         else:
             st.warning(f"Sem dados processados para {emp}.")
 
 # --- ABA 2: ALOCAÇÃO DE COMPRAS (PUXANDO DO CATÁLOGO) ---
 with tab_alocacao:
     st.header("📦 Divisão Proporcional de Compra")
-    st.info("Selecione um SKU oficial do seu catálogo para dividir o pedido entre ALIVVIA e JCA.")
+    st.info("Selecione um SKU oficial do seu catálogo para dividir o pedido entre ALIVVIA e JCA. Para uma lista inteira de SKUs, use a Alocação em Lote na página 📦 Alocação.")
     
     # Puxa a lista oficial de SKUs do catálogo carregado
     lista_skus_oficial = sorted(st.session_state['catalogo_dados']['catalogo']['sku'].unique())
@@ -81,14 +180,13 @@ with tab_alocacao:
         venda_j = 0
         
         # Busca performance real nos cálculos já feitos
-        for emp, df in resultados.items():
-            if df is not None and not df.empty:
-                row = df[df['SKU'] == sku_selecionado]
-                if not row.empty:
-                    # Soma vendas Full e Shopee (já explodidas se for o caso)
-                    v = row['Vendas full'].values[0] + row['vendas Shopee'].values[0]
-                    if emp == "ALIVVIA": venda_a = v
-                    else: venda_j = v
+        for emp, res in publicados.items():
+            linha = res.get(sku_selecionado)
+            if linha is not None:
+                # Vendas Full + Shopee (já explodidas se for o caso)
+                v = linha['Vendas_Total_60d']
+                if emp == "ALIVVIA": venda_a = v
+                else: venda_j = v
 
         total_vendas_grupo = venda_a + venda_j
 
@@ -96,9 +194,9 @@ with tab_alocacao:
             p_a = venda_a / total_vendas_grupo
             p_j = venda_j / total_vendas_grupo
             
-            # Alocação
-            aloc_a = int(np.floor(qtd_total * p_a))
-            aloc_j = qtd_total - aloc_a # Ajuste para não sobrar nem faltar 1 un por arredondamento
+            # Alocação (maior resto: a soma bate com o total)
+            divisao = alocacao.alocar(pd.DataFrame({"SKU": [sku_selecionado], "Qtd": [qtd_total]}), publicados)
+            aloc_a, aloc_j = int(divisao["Qtd_ALIVVIA"].iloc[0]), int(divisao["Qtd_JCA"].iloc[0])
             
             st.divider()
             c1, c2, c3 = st.columns(3)
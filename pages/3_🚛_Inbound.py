@@ -1,7 +1,6 @@
 import streamlit as st
 import pandas as pd
-import re
-from src import logic, utils
+from src import inbound, carrinho, utils
 
 st.set_page_config(page_title="Inbound", layout="wide")
 st.title("🚛 Conferência de Inbound")
@@ -20,57 +19,27 @@ if f"res_{emp_target}" not in st.session_state:
 up_in = st.file_uploader("Upload Arquivo Inbound (Excel ou PDF)", type=["xlsx", "csv", "pdf"])
 
 if up_in:
-    data_in = []
-    
     # --- 1. Leitura do Arquivo (Excel ou PDF) ---
-    if up_in.name.lower().endswith(".pdf"):
-        import pdfplumber
-        import io
-        with pdfplumber.open(io.BytesIO(up_in.getvalue())) as pdf:
-            txt = "".join([p.extract_text() or "" for p in pdf.pages])
-            # Regex para capturar SKU no PDF
-            matches = re.findall(r'SKU:?\s*([\w\-\/\+\.\&]+)', txt, re.IGNORECASE)
-            # PDF geralmente não tem a quantidade fácil de ler, assumimos 1 ou pedimos excel
-            for m in matches: 
-                data_in.append({"SKU": m.upper().strip(), "Qtd_Envio": 0}) 
-        st.warning("⚠️ Leitura de PDF é limitada (não captura quantidades com precisão). Para resultados exatos, use o Excel/CSV do Inbound.")
-    
-    else:
-        # Leitura Inteligente do Excel
-        df_i = logic.smart_read_excel_csv(up_in.getvalue())
-        
-        # Procura colunas chave
-        c_prod = next((c for c in df_i.columns if "PRODUTO" in str(c).upper()), None)
-        c_qtd = next((c for c in df_i.columns if "UNIDADES" in str(c).upper()), None)
-        
-        if c_prod and c_qtd:
-            regex = re.compile(r'SKU:?\s*([\w\-\/\+\.\&]+)', re.IGNORECASE)
-            for _, r in df_i.iterrows():
-                m = regex.search(str(r[c_prod]))
-                if m: 
-                    val_q = utils.br_to_float(r[c_qtd])
-                    data_in.append({"SKU": m.group(1).upper().strip(), "Qtd_Envio": val_q})
+    try:
+        if up_in.name.lower().endswith(".pdf"):
+            barra = st.progress(0.0, text="Lendo PDF...")
+            df_inb = inbound.ler_pdf(up_in.getvalue(),
+                                     progresso=lambda lidas, total: barra.progress(lidas / total, text=f"Lendo PDF... {lidas}/{total} páginas"))
+            barra.empty()
+            if (df_inb["Qtd_Envio"] == 0).any():
+                st.warning("⚠️ Alguns SKUs do PDF ficaram sem quantidade (layout não reconhecido). Para resultados exatos, use o Excel/CSV do Inbound.")
         else:
-            st.error("Não encontrei as colunas 'PRODUTO' e 'UNIDADES' no arquivo.")
+            df_inb = inbound.ler_planilha(up_in.getvalue())
+    except ValueError as e:
+        st.error(str(e))
+        df_inb = None
 
     # --- 2. Processamento e Cruzamento ---
-    if data_in:
-        # Agrupa SKUs duplicados no arquivo de entrada
-        df_inb = pd.DataFrame(data_in).groupby("SKU", as_index=False)["Qtd_Envio"].sum()
-        
-        # Pega os dados da aba de Análise (Estoque Físico e Preço)
-        base_analise = st.session_state[f"res_{emp_target}"].copy()
-        
-        # Faz o cruzamento (Merge)
-        merged = df_inb.merge(base_analise[["SKU", "Estoque_Fisico", "Preco"]], on="SKU", how="left")
-        
-        # Cálculos Finais
-        merged["Estoque_Fisico"] = merged["Estoque_Fisico"].fillna(0)
-        merged["Preco"] = merged["Preco"].fillna(0)
-        
-        # O que falta = O que vou enviar - O que tenho no físico
-        merged["Faltam_Comprar"] = (merged["Qtd_Envio"] - merged["Estoque_Fisico"]).clip(lower=0)
-        merged["Custo_Falta"] = merged["Faltam_Comprar"] * merged["Preco"]
+    if df_inb is not None and not df_inb.empty:
+        # Estoque Físico e Preço da aba de Análise, por lookup no SKU
+        res = st.session_state[f"res_{emp_target}"]
+        st.caption(f"Resultado da Análise: versão {res.versao} ({len(res)} SKUs)")
+        merged = inbound.cruzar(df_inb, res.frame())
         
         # --- 3. Exibição ---
         k1, k2 = st.columns(2)
@@ -81,23 +50,11 @@ if up_in:
         
         # --- 4. Botão de Ação ---
         if st.button("🛒 Adicionar Faltantes ao Editor de OC"):
-            count = 0
-            # Recupera carrinho atual
-            if "pedido" not in st.session_state: st.session_state.pedido = []
-            
-            # Lista SKUs que já estão no carrinho para não duplicar
-            skus_no_carrinho = [item["sku"] for item in st.session_state.pedido]
-            
-            for _, row in merged[merged["Faltam_Comprar"] > 0].iterrows():
-                if row["SKU"] not in skus_no_carrinho:
-                    st.session_state.pedido.append({
-                        "sku": row["SKU"],
-                        "qtd": int(row["Faltam_Comprar"]),
-                        "valor_unit": float(row["Preco"]),
-                        "origem": f"INBOUND_{emp_target}",
-                        "total": row["Faltam_Comprar"] * row["Preco"]
-                    })
-                    count += 1
+            # Upsert em lote por (sku, origem): o que já está no carrinho com essa origem é mantido
+            faltas = merged.loc[merged["Faltam_Comprar"] > 0]
+            count = carrinho.da_sessao().adicionar_df(
+                pd.DataFrame({"sku": faltas["SKU"], "qtd": faltas["Faltam_Comprar"], "valor_unit": faltas["Preco"]}),
+                origem=f"INBOUND_{emp_target}", modo="manter")
             
             if count > 0:
                 st.success(f"{count} itens enviados para a aba Editor de OC!")
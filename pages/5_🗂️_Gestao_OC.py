@@ -1,35 +1,65 @@
 import streamlit as st
 import pandas as pd
 import time
-from src import orders_db, utils
+import math
+from src import orders_db, utils, config
 
 st.set_page_config(page_title="Gestão OCs", layout="wide")
 st.title("🗂️ Histórico e Gestão de Pedidos")
 
-# --- 1. Listagem ---
-st.write("Abaixo estão todas as Ordens de Compra salvas no banco de dados.")
+STATUS = ["Pendente", "Aprovado", "Enviado", "Recebido", "Cancelado"]
 
-# Chama a função do módulo orders_db
-df_history = orders_db.listar_pedidos()
+# --- 1. Filtros (aplicados no banco) ---
+with st.expander("🔍 Filtros", expanded=True):
+    f1, f2, f3, f4 = st.columns([1, 2, 2, 2])
+    f_emp = f1.selectbox("Empresa", ["Todas", "ALIVVIA", "JCA"])
+    f_status = f2.multiselect("Status", STATUS + ["EXCLUIDO"])
+    f_forn = f3.text_input("Fornecedor").strip()
+    f_datas = f4.date_input("Período (emissão)", value=())
 
-if df_history.empty:
+data_inicio = f_datas[0] if len(f_datas) > 0 else None
+data_fim = f_datas[1] if len(f_datas) > 1 else None
+filtros = {
+    "empresa": None if f_emp == "Todas" else f_emp,
+    "status": f_status or None,
+    "fornecedor": f_forn or None,
+    "data_inicio": data_inicio,
+    "data_fim": data_fim,
+}
+
+# Volta para a primeira página quando os filtros mudam
+if st.session_state.get("gestao_filtros") != filtros:
+    st.session_state["gestao_filtros"] = filtros
+    st.session_state["gestao_pagina"] = 1
+
+# --- 2. Listagem (só a página atual) ---
+por_pagina = config.PEDIDOS_POR_PAGINA
+p1, p2 = st.columns([1, 4])
+pagina = p1.number_input("Página", min_value=1, step=1, key="gestao_pagina")
+df_history, total = orders_db.listar_pedidos(**filtros, pagina=pagina - 1, por_pagina=por_pagina)
+
+if total == 0:
     st.info("Nenhum pedido encontrado no histórico.")
     st.stop()
 
-# Mostra tabela resumida
+p2.caption(f"{total} pedido(s) · página {pagina} de {max(1, math.ceil(total / por_pagina))}")
+if df_history.empty:
+    st.info("Página sem pedidos; volte para uma página anterior.")
+    st.stop()
+
 st.dataframe(
-    df_history[["ID", "Data", "Empresa", "Fornecedor", "Valor", "Status", "Obs"]], 
-    use_container_width=True
+    df_history.style.format({"Valor": utils.format_br_currency}),
+    use_container_width=True, hide_index=True
 )
 
 st.divider()
 
-# --- 2. Painel de Controle (Atualizar/Excluir) ---
+# --- 3. Painel de Controle (Atualizar/Excluir) ---
 c1, c2 = st.columns([1, 2])
 
 with c1:
     st.subheader("Gerenciar Pedido")
-    # Selectbox com os IDs das OCs
+    # Selectbox com os IDs das OCs da página
     lista_ids = df_history["ID"].unique()
     sel_oc = st.selectbox("Selecione a OC:", lista_ids)
 
@@ -37,10 +67,10 @@ with c1:
         # Pega status atual
         status_atual = df_history[df_history["ID"] == sel_oc]["Status"].iloc[0]
         st.caption(f"Status Atual: **{status_atual}**")
-        
+
         # Mudar Status
-        novo_status = st.selectbox("Novo Status:", ["Pendente", "Aprovado", "Enviado", "Recebido", "Cancelado"])
-        
+        novo_status = st.selectbox("Novo Status:", STATUS)
+
         if st.button("💾 Atualizar Status"):
             orders_db.atualizar_status(sel_oc, novo_status)
             st.success("Status atualizado com sucesso!")
@@ -48,11 +78,9 @@ with c1:
             st.rerun()
 
         st.write("---")
-        # Excluir (Opcional, mas útil)
+        # Excluir (marca como EXCLUIDO para manter o histórico)
         if st.button("🗑️ Excluir OC Definitivamente", type="primary"):
-            # Função para excluir (precisa existir no orders_db, vou simular ou usar update)
-            # Como orders_db.py padrão só tem update, vamos marcar como Cancelado ou excluir se tiver a função
-            orders_db.atualizar_status(sel_oc, "EXCLUIDO") 
+            orders_db.atualizar_status(sel_oc, "EXCLUIDO")
             st.warning("OC marcada como Excluída/Cancelada.")
             time.sleep(1)
             st.rerun()
@@ -60,22 +88,20 @@ with c1:
 with c2:
     st.subheader(f"Detalhes dos Itens: {sel_oc}")
     if sel_oc:
-        # Pega a linha completa do dataframe
         row = df_history[df_history["ID"] == sel_oc].iloc[0]
-        itens_raw = row.get("Dados_Completos")
-        
-        if isinstance(itens_raw, list) and len(itens_raw) > 0:
+        # Itens buscados só para a OC selecionada
+        itens_raw = orders_db.obter_itens(sel_oc)
+
+        if len(itens_raw) > 0:
             df_itens = pd.DataFrame(itens_raw)
-            
+
             # Formatações visuais
             if "valor_unit" in df_itens.columns:
                 df_itens["valor_unit"] = df_itens["valor_unit"].apply(lambda x: utils.format_br_currency(float(x)))
-            
+
             st.dataframe(df_itens, use_container_width=True)
-            
+
             # Totalizador
-            total_val = row["Valor"]
-            # Tenta converter string de moeda de volta pra float só pra exibir no metric, ou usa o valor bruto se tiver
-            st.metric("Valor Total deste Pedido", row["Valor"])
+            st.metric("Valor Total deste Pedido", utils.format_br_currency(row["Valor"]))
         else:
-            st.warning("Não há itens detalhados registrados para este pedido.")
\ No newline at end of file
+            st.warning("Não há itens detalhados registrados para este pedido.")
@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-from src import storage, logic, data, config
+from src import alocacao, carrinho, utils
 
 st.set_page_config(page_title="Alocação", layout="wide")
 st.title("📦 Alocação de Compras (JCA vs ALIVVIA)")
@@ -12,26 +12,25 @@ if "res_ALIVVIA" not in st.session_state or "res_JCA" not in st.session_state:
     st.warning("Por favor, vá na aba 'Análise' e clique em CALCULAR para as duas empresas primeiro.")
     st.stop()
 
-df_a = st.session_state["res_ALIVVIA"]
-df_j = st.session_state["res_JCA"]
+res_a = st.session_state["res_ALIVVIA"]
+res_j = st.session_state["res_JCA"]
+publicados = {"ALIVVIA": res_a, "JCA": res_j}
 
-# Lista de SKUs comuns
-skus_a = set(df_a["SKU"].unique())
-skus_j = set(df_j["SKU"].unique())
-todos_skus = sorted(list(skus_a.union(skus_j)))
+# Lista de SKUs das duas empresas
+todos_skus = sorted(res_a.skus.union(res_j.skus))
 
 sku_sel = st.selectbox("Selecione o Produto (Kit ou Peça):", [""] + todos_skus)
 
 if sku_sel:
     # Dados Alivvia
-    row_a = df_a[df_a["SKU"] == sku_sel]
-    venda_a = row_a["Vendas_Total_60d"].sum() if not row_a.empty else 0
-    est_a = row_a["Estoque_Total"].sum() if not row_a.empty else 0
+    row_a = res_a.get(sku_sel, {})
+    venda_a = row_a.get("Vendas_Total_60d", 0)
+    est_a = row_a.get("Estoque_Total", 0)
 
     # Dados JCA
-    row_j = df_j[df_j["SKU"] == sku_sel]
-    venda_j = row_j["Vendas_Total_60d"].sum() if not row_j.empty else 0
-    est_j = row_j["Estoque_Total"].sum() if not row_j.empty else 0
+    row_j = res_j.get(sku_sel, {})
+    venda_j = row_j.get("Vendas_Total_60d", 0)
+    est_j = row_j.get("Estoque_Total", 0)
 
     # Totais
     total_vendas = venda_a + venda_j
@@ -46,23 +45,52 @@ if sku_sel:
     qtd_compra = st.number_input("Quantidade a Comprar (ex: 1000)", value=0, step=10)
 
     if total_vendas > 0 and qtd_compra > 0:
-        share_a = venda_a / total_vendas
-        share_j = venda_j / total_vendas
-        
-        aloc_a = int(qtd_compra * share_a)
-        aloc_j = int(qtd_compra * share_j)
-        
-        # Ajuste fino de arredondamento
-        diff = qtd_compra - (aloc_a + aloc_j)
-        if diff != 0: aloc_a += diff
+        compra = pd.DataFrame({"SKU": [sku_sel], "Qtd": [qtd_compra]})
+        divisao = alocacao.alocar(compra, publicados)
+        aloc_a, aloc_j = int(divisao["Qtd_ALIVVIA"].iloc[0]), int(divisao["Qtd_JCA"].iloc[0])
+        share_a, share_j = venda_a / total_vendas, venda_j / total_vendas
 
         k1, k2 = st.columns(2)
         k1.success(f"Destinar para ALIVVIA: **{aloc_a}** peças ({share_a*100:.1f}%)")
         k2.warning(f"Destinar para JCA: **{aloc_j}** peças ({share_j*100:.1f}%)")
         
         if st.button("Enviar essa divisão para o Editor de OC"):
-             st.session_state.pedido.append({"sku": sku_sel, "qtd": aloc_a, "valor": 0.0, "origem": "ALIVVIA (Aloc)"})
-             st.session_state.pedido.append({"sku": sku_sel, "qtd": aloc_j, "valor": 0.0, "origem": "JCA (Aloc)"})
+             carrinho.da_sessao().adicionar_df(alocacao.para_carrinho(divisao, publicados=publicados))
              st.success("Enviado!")
     elif qtd_compra > 0:
-        st.error("Produto sem vendas nos últimos 60 dias. Impossível calcular alocação por histórico.")
\ No newline at end of file
+        st.error("Produto sem vendas nos últimos 60 dias. Impossível calcular alocação por histórico.")
+
+# --- Alocação em lote: a lista inteira de uma vez (ex: container com centenas de SKUs) ---
+st.divider()
+st.subheader("📑 Alocação em Lote")
+st.caption("Planilha com as colunas SKU e Qtd (Lote opcional: múltiplo de embalagem). Os totais por SKU batem exatamente com a lista.")
+
+up_lista = st.file_uploader("Lista de compra (Excel ou CSV)", type=["xlsx", "csv"], key="lista_alocacao")
+modo = st.radio("Critério", list(alocacao.MODOS), format_func=alocacao.MODOS.get, horizontal=True)
+
+if up_lista:
+    try:
+        compras = alocacao.ler_compras(up_lista.getvalue())
+    except ValueError as e:
+        st.error(str(e))
+        compras = None
+
+    if compras is not None and not compras.empty:
+        lote_df = alocacao.alocar(compras, publicados, modo=modo)
+        ok = lote_df["Status"] == "OK"
+
+        m1, m2, m3 = st.columns(3)
+        m1.metric("SKUs alocados", f"{int(ok.sum())} de {len(lote_df)}")
+        m2.metric("ALIVVIA (un)", utils.format_br_int(lote_df["Qtd_ALIVVIA"].sum()))
+        m3.metric("JCA (un)", utils.format_br_int(lote_df["Qtd_JCA"].sum()))
+        if not ok.all():
+            st.warning(f"{int((~ok).sum())} SKU(s) sem vendas em nenhuma empresa ficaram fora da divisão.")
+
+        st.dataframe(lote_df.style.format({"Pct_ALIVVIA": "{:.1%}", "Pct_JCA": "{:.1%}"}),
+                     use_container_width=True, hide_index=True)
+
+        if st.button("🛒 Enviar alocação para o Editor de OC", type="primary"):
+            # Reenviar a mesma alocação substitui (sku, origem) em vez de duplicar
+            itens = alocacao.para_carrinho(lote_df, publicados=publicados)
+            carrinho.da_sessao().adicionar_df(itens)
+            st.success(f"{len(itens)} itens enviados para a aba Editor de OC!")
@@ -0,0 +1,29 @@
+-- Contador de números de OC por prefixo (ALV/JCA) e ano, usado por orders_db.reservar_numeros_oc.
+-- Rodar uma vez no SQL Editor do Supabase.
+
+create table if not exists oc_sequencias (
+    prefixo text not null,
+    ano integer not null,
+    ultimo integer not null default 0,
+    primary key (prefixo, ano)
+);
+
+-- Reserva p_quantidade números seguidos e devolve o último do bloco.
+-- O upsert trava só a linha (prefixo, ano): chamadas simultâneas recebem blocos disjuntos.
+create or replace function reservar_numeros_oc(p_prefixo text, p_ano integer, p_quantidade integer default 1)
+returns integer
+language sql
+as $$
+    insert into oc_sequencias as s (prefixo, ano, ultimo)
+    values (p_prefixo, p_ano, p_quantidade)
+    on conflict (prefixo, ano) do update set ultimo = s.ultimo + excluded.ultimo
+    returning ultimo;
+$$;
+
+-- Ponto de partida: maior número já usado em pedidos (ignora os IDs de fallback com timestamp)
+insert into oc_sequencias (prefixo, ano, ultimo)
+select split_part(id, '-', 2), split_part(id, '-', 3)::integer, max(split_part(id, '-', 4)::integer)
+from pedidos
+where id ~ '^OC-[A-Z]+-[0-9]{4}-[0-9]{1,6}$'
+group by 1, 2
+on conflict (prefixo, ano) do update set ultimo = greatest(oc_sequencias.ultimo, excluded.ultimo);
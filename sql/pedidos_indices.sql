@@ -0,0 +1,13 @@
+-- Índices para a listagem paginada da Gestão de OCs (orders_db.listar_pedidos).
+-- Rodar uma vez no SQL Editor do Supabase.
+
+-- Ordenação padrão (mais recentes primeiro) e filtro por empresa
+create index if not exists pedidos_empresa_data_idx on pedidos (empresa, data_emissao desc, id desc);
+create index if not exists pedidos_data_idx on pedidos (data_emissao desc, id desc);
+
+-- Filtro por status
+create index if not exists pedidos_status_idx on pedidos (status);
+
+-- Busca de fornecedor por trecho (ilike '%texto%')
+create extension if not exists pg_trgm;
+create index if not exists pedidos_fornecedor_trgm_idx on pedidos using gin (fornecedor gin_trgm_ops);
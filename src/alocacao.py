@@ -0,0 +1,134 @@
+import io
+import numpy as np
+import pandas as pd
+from src import logic, utils
+
+EMPRESAS = ("ALIVVIA", "JCA")
+DIAS_HISTORICO = 60  # Vendas_Total_60d
+
+MODOS = {
+    "vendas": "Proporcional às vendas (Full + Shopee)",
+    "cobertura": "Equalizar cobertura (desconta o estoque atual)",
+}
+
+def ler_compras(content):
+    """Lista de compra (Excel/CSV) -> (SKU, Qtd, Lote) somado por SKU. Lote é opcional (padrão 1)."""
+    df = logic.normalizar_relatorio(logic.find_header_and_read(io.BytesIO(content)))
+    if df is None or df.empty:
+        raise ValueError("Não encontrei a coluna de SKU na lista de compra.")
+    c_qtd = logic._casar_coluna([c for c in df.columns if c != 'sku'], ['qtd', 'quant', 'unid'])
+    if c_qtd is None:
+        raise ValueError("Não encontrei a coluna de quantidade (Qtd) na lista de compra.")
+    c_lote = logic._casar_coluna(df.columns, ['lote', 'multiplo', 'caixa'])
+    compras = pd.DataFrame({
+        "SKU": df['sku'],
+        "Qtd": utils.br_series_to_float(df[c_qtd]).fillna(0),
+        "Lote": utils.br_series_to_float(df[c_lote]).fillna(1) if c_lote else 1.0,
+    })
+    compras = compras[(compras["SKU"] != "") & (compras["Qtd"] > 0)]
+    return compras.groupby("SKU", as_index=False, sort=False).agg(Qtd=("Qtd", "sum"), Lote=("Lote", "max"))
+
+def _matrizes(skus, publicados, empresas):
+    """Vendas e estoque (n_skus x n_empresas) pelo índice de SKU de cada resultado; ausente = 0."""
+    vendas = np.zeros((len(skus), len(empresas)))
+    estoque = np.zeros((len(skus), len(empresas)))
+    for j, emp in enumerate(empresas):
+        res = publicados.get(emp)
+        if res is None: continue
+        pos = res.posicoes(skus)
+        achou = pos >= 0
+        vendas[achou, j] = res.coluna("Vendas_Total_60d")[pos[achou]]
+        estoque[achou, j] = res.coluna("Estoque_Total")[pos[achou]]
+    return vendas, np.clip(estoque, 0, None)
+
+def _cotas_cobertura(demanda, estoque, qtd):
+    """
+    Cotas fracionárias que igualam os dias de cobertura depois da compra (enchimento por nível):
+    cada empresa recebe max(demanda * T - estoque, 0), com T tal que a soma dê `qtd`.
+    Empresa sem venda não recebe.
+    """
+    n, k = demanda.shape
+    com_venda = demanda > 0
+    cobertura = np.where(com_venda, estoque / np.where(com_venda, demanda, 1), np.inf)
+    ordem = np.argsort(cobertura, axis=1, kind="stable")
+    c_ord = np.take_along_axis(cobertura, ordem, axis=1)
+    d_acum = np.cumsum(np.take_along_axis(demanda, ordem, axis=1), axis=1)
+    e_acum = np.cumsum(np.take_along_axis(estoque, ordem, axis=1), axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        nivel = (qtd[:, None] + e_acum) / d_acum
+    # Empresas ativas são um prefixo da ordem por cobertura: vale o nível do último ativo
+    ativo = np.isfinite(c_ord) & (nivel >= c_ord)
+    ultimo = np.where(ativo.any(axis=1), k - 1 - np.argmax(ativo[:, ::-1], axis=1), 0)
+    T = np.where(ativo.any(axis=1), nivel[np.arange(n), ultimo], 0.0)
+    return np.where(com_venda, np.clip(demanda * T[:, None] - estoque, 0, None), 0.0)
+
+def _maior_resto(cotas, qtd, lote):
+    """
+    Arredonda as cotas em múltiplos de `lote` pelo método do maior resto: o total de cada linha
+    bate exatamente com `qtd`. A sobra menor que um lote vai para o maior resto restante.
+    """
+    n, k = cotas.shape
+    lotes = cotas / lote[:, None]
+    base = np.floor(lotes)
+    faltam = np.floor(qtd / lote) - base.sum(axis=1)
+    resto = lotes - base
+    # posição de cada empresa no ranking de resto (0 = maior)
+    ordem = np.argsort(-resto, axis=1, kind="stable")
+    rank = np.empty_like(ordem)
+    np.put_along_axis(rank, ordem, np.arange(k)[None, :].repeat(n, axis=0), axis=1)
+    base += rank < faltam[:, None]
+    unidades = base * lote[:, None]
+    sobra = qtd - unidades.sum(axis=1)
+    destino = np.argmax(lotes - base, axis=1)
+    unidades[np.arange(n), destino] += sobra
+    return unidades
+
+def alocar(compras, publicados, empresas=EMPRESAS, modo="vendas"):
+    """
+    Divide cada SKU da lista de compra (SKU, Qtd[, Lote]) entre as empresas de uma vez:
+    - "vendas": proporcional às vendas Full + Shopee dos últimos 60 dias;
+    - "cobertura": iguala os dias de cobertura considerando o estoque atual (Full + físico).
+    Totais por SKU exatos (maior resto, em múltiplos do Lote). SKU sem venda em nenhuma
+    empresa fica sem alocação, com Status indicando o motivo.
+    """
+    empresas = list(empresas)
+    skus = compras["SKU"].astype(str).to_numpy()
+    qtd = np.floor(compras["Qtd"].to_numpy(dtype=float))
+    lote = compras["Lote"].to_numpy(dtype=float) if "Lote" in compras.columns else np.ones(len(skus))
+    lote = np.where(lote >= 1, np.floor(lote), 1.0)
+
+    vendas, estoque = _matrizes(skus, publicados, empresas)
+    total_vendas = vendas.sum(axis=1)
+    com_venda = total_vendas > 0
+    if modo == "cobertura":
+        cotas = _cotas_cobertura(vendas / DIAS_HISTORICO, estoque, qtd)
+    else:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cotas = np.where(com_venda[:, None], vendas / total_vendas[:, None], 0.0) * qtd[:, None]
+    alocado = np.where(com_venda[:, None], _maior_resto(cotas, qtd, lote), 0.0).astype(np.int64)
+
+    out = pd.DataFrame({"SKU": skus, "Qtd": qtd.astype(np.int64), "Lote": lote.astype(np.int64)})
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for j, emp in enumerate(empresas):
+            out[f"Vendas_{emp}"] = vendas[:, j].astype(np.int64)
+            out[f"Qtd_{emp}"] = alocado[:, j]
+            out[f"Pct_{emp}"] = np.where(qtd > 0, alocado[:, j] / qtd, 0.0)
+            if modo == "cobertura":
+                dia = vendas[:, j] / DIAS_HISTORICO
+                out[f"Cobertura_{emp}"] = np.where(dia > 0, (estoque[:, j] + alocado[:, j]) / dia, np.nan).round(1)
+    out["Status"] = np.where(com_venda, "OK", "Sem vendas em 60d")
+    return out
+
+def para_carrinho(alocacao, empresas=EMPRESAS, publicados=None):
+    """Frame (sku, qtd, valor_unit, origem) para o carrinho: um item por SKU e empresa com quantidade > 0."""
+    partes = []
+    for emp in empresas:
+        sel = alocacao.loc[alocacao[f"Qtd_{emp}"] > 0, ["SKU", f"Qtd_{emp}"]]
+        preco = np.zeros(len(sel))
+        res = (publicados or {}).get(emp)
+        if res is not None and len(sel):
+            pos = res.posicoes(sel["SKU"])
+            preco = np.where(pos >= 0, res.coluna("Preco")[np.maximum(pos, 0)].astype(float), 0.0)
+        partes.append(pd.DataFrame({"sku": sel["SKU"].to_numpy(), "qtd": sel[f"Qtd_{emp}"].to_numpy(),
+                                    "valor_unit": np.round(preco, 2), "origem": f"{emp} (Aloc)"}))
+    return pd.concat(partes, ignore_index=True)
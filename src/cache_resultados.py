@@ -0,0 +1,133 @@
+import threading
+from collections import OrderedDict
+from src import config, storage, utils, logic, resultados, previsao
+
+TIPOS = ("FULL", "EXT", "FISICO")
+
+class CacheLRU:
+    """Cache LRU limitado por bytes (o item mais antigo sai até o total caber no orçamento)."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._itens = OrderedDict()  # chave -> (valor, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def obter(self, chave):
+        with self._lock:
+            if chave not in self._itens: return None
+            self._itens.move_to_end(chave)
+            return self._itens[chave][0]
+
+    def guardar(self, chave, valor, tamanho):
+        with self._lock:
+            if chave in self._itens:
+                self._bytes -= self._itens.pop(chave)[1]
+            # Item maior que o orçamento inteiro não entra (seria despejado na hora)
+            if tamanho > self.max_bytes: return valor
+            self._itens[chave] = (valor, tamanho)
+            self._bytes += tamanho
+            while self._bytes > self.max_bytes:
+                self._bytes -= self._itens.popitem(last=False)[1][1]
+        return valor
+
+    def remover(self, condicao):
+        """Remove as entradas cuja chave satisfaz `condicao(chave)`."""
+        with self._lock:
+            for chave in [c for c in self._itens if condicao(c)]:
+                self._bytes -= self._itens.pop(chave)[1]
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+
+    def info(self):
+        with self._lock:
+            return {"itens": len(self._itens), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+# Bases (leitura + explosão) por versão das entradas; resultados também pelos parâmetros
+_bases = CacheLRU(config.CACHE_BASES_MAX_BYTES)
+_resultados = CacheLRU(config.CACHE_RESULTADOS_MAX_BYTES)
+
+def _tamanho(obj):
+    return int(utils.memoria_mb(obj) * 2**20)
+
+def versao_entradas(empresas):
+    """
+    Identifica o conteúdo das entradas: hash de cada relatório no manifesto do bucket
+    e a versão do catálogo. Um upload novo muda a chave e os resultados antigos deixam de ser usados.
+    """
+    empresas = tuple(empresas)
+    manifesto = storage.listar_manifesto(empresas)
+    hashes = tuple((manifesto.get(f"{emp}/{tipo}.xlsx") or {}).get("hash") for emp in empresas for tipo in TIPOS)
+    return (empresas, hashes, logic.versao_catalogo())
+
+def obter_bases(empresas, versao=None):
+    versao = versao or versao_entradas(empresas)
+    bases = _bases.obter(versao)
+    if bases is None:
+        # Entradas mudaram (upload/catálogo novo): o que foi calculado com as antigas sai do cache
+        antiga = lambda v: v[0] == versao[0] and v != versao
+        _bases.remover(antiga)
+        _resultados.remover(lambda chave: antiga(chave[0]))
+        bases = logic.preparar_bases_empresas(list(empresas))
+        if bases is not None:
+            _bases.guardar(versao, bases, _tamanho(bases))
+    return bases
+
+def _fatores(bases, modelo):
+    if modelo == previsao.PADRAO or not bases: return None
+    return {emp: previsao.fatores_empresa(emp, base["kit_index"], modelo) for emp, base in bases.items()}
+
+def _desvios(bases, nivel_servico):
+    if not nivel_servico or not bases: return None
+    return {emp: previsao.desvios_empresa(emp, base["kit_index"]) for emp, base in bases.items()}
+
+def obter_resultados(empresas, dias_cobertura, crescimento=0, lead_time=0, modelo=previsao.PADRAO,
+                     nivel_servico=0, desvio_lead=0):
+    """
+    Frame longo (Empresa, SKU) de aplicar_parametros_empresas, em cache por parâmetros +
+    versão das entradas. O frame devolvido é compartilhado entre sessões: não alterar no lugar.
+    `modelo`: previsão de demanda sobre o histórico (o padrão é a regra de 60 dias).
+    `nivel_servico` / `desvio_lead`: estoque de segurança (nível 0 = sem).
+    """
+    versao = versao_entradas(empresas)
+    chave = (versao, float(dias_cobertura), float(crescimento), float(lead_time), modelo,
+             float(nivel_servico), float(desvio_lead))
+    df_long = _resultados.obter(chave)
+    if df_long is None:
+        bases = obter_bases(empresas, versao)
+        df_long = logic.aplicar_parametros_empresas(bases, dias_cobertura, crescimento, lead_time,
+                                                    fatores_demanda=_fatores(bases, modelo),
+                                                    nivel_servico=nivel_servico, desvio_lead=desvio_lead,
+                                                    desvios_demanda=_desvios(bases, nivel_servico))
+        if df_long is not None:
+            _resultados.guardar(chave, df_long, _tamanho(df_long))
+    return df_long
+
+def obter_publicados(empresas, dias_cobertura, crescimento=0, lead_time=0, modelo=previsao.PADRAO,
+                     nivel_servico=0, desvio_lead=0):
+    """
+    {empresa: resultados.Resultado} dos mesmos parâmetros, em cache junto com o frame longo:
+    os reruns das páginas reaproveitam os mesmos arrays (e índices de SKU) em vez de copiar.
+    """
+    versao = versao_entradas(empresas)
+    chave = (versao, float(dias_cobertura), float(crescimento), float(lead_time), modelo,
+             float(nivel_servico), float(desvio_lead), "publicados")
+    publicados = _resultados.obter(chave)
+    if publicados is None:
+        por_empresa = logic.separar_empresas(obter_resultados(empresas, dias_cobertura, crescimento, lead_time,
+                                                              modelo, nivel_servico, desvio_lead))
+        publicados = resultados.construir(por_empresa, chave)
+        _resultados.guardar(chave, publicados, _tamanho({emp: r.frame() for emp, r in publicados.items()}))
+    return publicados
+
+def limpar():
+    """Descarta bases e resultados (e o manifesto, para enxergar uploads de outros processos)."""
+    _bases.limpar()
+    _resultados.limpar()
+    storage.invalidar_manifesto()
+
+def info():
+    return {"bases": _bases.info(), "resultados": _resultados.info()}
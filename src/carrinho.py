@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+CHAVE_SESSAO = "carrinho"
+COLUNAS = ["sku", "qtd", "valor_unit", "total", "origem"]
+MODOS = ("substituir", "somar", "manter")  # o que fazer quando (sku, origem) já está no carrinho
+
+def _valor_unit(item):
+    # Itens antigos da Alocação usavam "valor"; Inbound e OCs em lote, "valor_unit"
+    v = item.get("valor_unit", item.get("valor"))
+    if v is None or pd.isna(v):
+        qtd = item.get("qtd") or 0
+        return float(item["total"]) / qtd if item.get("total") is not None and qtd else 0.0
+    return float(v)
+
+class Carrinho:
+    """
+    Carrinho do Editor de OC em colunas (arrays com folga, crescem dobrando), indexado por
+    (sku, origem) para upsert em O(1). Totais mantidos a cada alteração, sem remontar frames.
+    """
+
+    def __init__(self, capacidade=64):
+        self._sku = np.empty(capacidade, dtype=object)
+        self._origem = np.empty(capacidade, dtype=object)
+        self._qtd = np.zeros(capacidade, dtype=np.int64)
+        self._valor = np.zeros(capacidade, dtype=np.float64)
+        self._pos = {}  # (sku, origem) -> linha
+        self._n = 0
+        self.total_qtd = 0
+        self.total_valor = 0.0
+
+    def __len__(self):
+        return self._n
+
+    def __contains__(self, chave):
+        return chave in self._pos
+
+    def _crescer(self, minimo):
+        cap = len(self._qtd)
+        if minimo <= cap: return
+        while cap < minimo: cap *= 2
+        for nome in ("_sku", "_origem", "_qtd", "_valor"):
+            antigo = getattr(self, nome)
+            novo = np.zeros(cap, dtype=antigo.dtype) if antigo.dtype != object else np.empty(cap, dtype=object)
+            novo[:self._n] = antigo[:self._n]
+            setattr(self, nome, novo)
+
+    def _gravar(self, i, qtd, valor_unit):
+        self.total_qtd += qtd - int(self._qtd[i])
+        self.total_valor += qtd * valor_unit - self._qtd[i] * self._valor[i]
+        self._qtd[i] = qtd
+        self._valor[i] = valor_unit
+
+    def adicionar(self, sku, qtd, valor_unit=0.0, origem="", modo="substituir"):
+        """Upsert por (sku, origem). Devolve True se o item entrou ou mudou."""
+        chave = (str(sku), str(origem))
+        qtd, valor_unit = int(qtd), float(valor_unit)
+        i = self._pos.get(chave)
+        if i is None:
+            self._crescer(self._n + 1)
+            i = self._n
+            self._sku[i], self._origem[i] = chave
+            self._qtd[i], self._valor[i] = 0, 0.0
+            self._pos[chave] = i
+            self._n += 1
+        elif modo == "manter":
+            return False
+        elif modo == "somar":
+            qtd += int(self._qtd[i])
+        self._gravar(i, qtd, valor_unit)
+        return True
+
+    def adicionar_df(self, df, origem=None, modo="substituir"):
+        """
+        Adiciona em lote um frame com sku, qtd e valor_unit (ou valor) e, se `origem` não vier,
+        uma coluna origem. Devolve quantos itens entraram ou mudaram.
+        """
+        if df is None or len(df) == 0: return 0
+        skus = df["sku"].astype(str).to_numpy()
+        qtds = pd.to_numeric(df["qtd"], errors="coerce").fillna(0).to_numpy().astype(np.int64)
+        col_valor = "valor_unit" if "valor_unit" in df.columns else ("valor" if "valor" in df.columns else None)
+        valores = pd.to_numeric(df[col_valor], errors="coerce").fillna(0).to_numpy(dtype=float) if col_valor else np.zeros(len(df))
+        origens = np.full(len(df), origem, dtype=object) if origem is not None else df["origem"].astype(str).to_numpy()
+        self._crescer(self._n + len(df))
+        return sum(self.adicionar(s, q, v, o, modo) for s, q, v, o in zip(skus, qtds, valores, origens))
+
+    def remover(self, chaves):
+        """Remove os itens (sku, origem) indicados e compacta as colunas."""
+        fora = [self._pos[c] for c in chaves if c in self._pos]
+        if not fora: return
+        manter = np.ones(self._n, dtype=bool)
+        manter[fora] = False
+        for nome in ("_sku", "_origem", "_qtd", "_valor"):
+            col = getattr(self, nome)
+            col[:manter.sum()] = col[:self._n][manter]
+        self._n = int(manter.sum())
+        self._reindexar()
+
+    def _reindexar(self):
+        self._pos = {(s, o): i for i, (s, o) in enumerate(zip(self._sku[:self._n], self._origem[:self._n]))}
+        self.total_qtd = int(self._qtd[:self._n].sum())
+        self.total_valor = float((self._qtd[:self._n] * self._valor[:self._n]).sum())
+
+    def limpar(self):
+        self.__init__(len(self._qtd))
+
+    def substituir(self, df):
+        """Troca o conteúdo pelo frame editado (data_editor). Linhas sem SKU são descartadas."""
+        self.limpar()
+        if df is not None and len(df):
+            df = df[df["sku"].notna() & (df["sku"].astype(str).str.strip() != "")]
+            self.adicionar_df(df.assign(origem=df["origem"].fillna("") if "origem" in df.columns else ""), modo="somar")
+
+    def frame(self):
+        """Frame (sku, qtd, valor_unit, total, origem) das linhas ativas."""
+        n = self._n
+        return pd.DataFrame({
+            "sku": self._sku[:n].copy(),
+            "qtd": self._qtd[:n].copy(),
+            "valor_unit": self._valor[:n].copy(),
+            "total": self._qtd[:n] * self._valor[:n],
+            "origem": self._origem[:n].copy(),
+        }, columns=COLUNAS)
+
+    def itens(self):
+        """Itens para o JSON `itens` do pedido (tipos nativos: qtd int, valores float sem arredondar)."""
+        return [{"sku": s, "qtd": int(q), "valor_unit": float(v), "total": float(q * v), "origem": o}
+                for s, q, v, o in zip(self._sku[:self._n], self._qtd[:self._n], self._valor[:self._n], self._origem[:self._n])]
+
+    @classmethod
+    def de_itens(cls, itens):
+        """Reconstrói o carrinho do JSON `itens` (aceita o formato antigo com "valor")."""
+        car = cls(max(64, len(itens or [])))
+        for item in itens or []:
+            car.adicionar(item["sku"], item.get("qtd") or 0, _valor_unit(item), item.get("origem") or "", modo="somar")
+        return car
+
+def da_sessao():
+    """Carrinho da sessão; migra a lista de dicts antiga (`pedido`) na primeira chamada."""
+    if CHAVE_SESSAO not in st.session_state:
+        st.session_state[CHAVE_SESSAO] = Carrinho.de_itens(st.session_state.pop("pedido", None))
+    return st.session_state[CHAVE_SESSAO]
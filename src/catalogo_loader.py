@@ -1,59 +1,181 @@
 import pandas as pd
 import streamlit as st
 import io
+import os
+import json
+import time
+import hashlib
+import threading
 import requests
-from src import utils
+from src import utils, config, snapshot_cache
+from src.kits_index import KitIndex
 
 URL_PADRAO = "https://docs.google.com/spreadsheets/d/1cTLARjq-B5g50dL6tcntg7lb_Iu0ta43/export?format=xlsx"
 
+# Cache do processo (compartilhado por todas as sessões/abas). O lock só protege o dict;
+# "revalidando" é o Event da ida à rede em andamento (uma por vez, fora do lock)
+_cache = {"dados": None, "meta": {}, "revalidando": None}
+_lock = threading.Lock()
+_META_FILE = os.path.join(config.CATALOGO_DIR, "meta.json")
+_CATALOGO_FILE = os.path.join(config.CATALOGO_DIR, "catalogo.parquet")
+_KITS_FILE = os.path.join(config.CATALOGO_DIR, "kits.parquet")
+
+def _montar_dados(df_catalogo, df_kits, versao):
+    # Índice compilado (CSR) para a explosão de kits no cálculo
+    kit_index = KitIndex(df_kits, skus_catalogo=df_catalogo['sku'])
+    if kit_index.ciclos:
+        # Uma linha ruim na aba KITS não derruba o catálogo: o componente do ciclo fica de fora
+        st.warning("Ciclo na aba KITS (componente ignorado na explosão): " + "; ".join(kit_index.ciclos))
+    return {"catalogo": df_catalogo, "kits": df_kits, "kit_index": kit_index, "versao": versao}
+
+def parse_catalogo(content_bytes):
+    """Lê as abas CATALOGO_SIMPLES e KITS do binário da planilha."""
+    content = io.BytesIO(content_bytes)
+
+    # Lê as abas CATALOGO_SIMPLES e KITS
+    df_catalogo = pd.read_excel(content, sheet_name="CATALOGO_SIMPLES")
+    content.seek(0)
+    df_kits = pd.read_excel(content, sheet_name="KITS")
+
+    # Normalização manual robusta (Tudo minúsculo e sem espaços)
+    df_catalogo.columns = [str(c).strip().lower() for c in df_catalogo.columns]
+    df_kits.columns = [str(c).strip().lower() for c in df_kits.columns]
+
+    # --- IDENTIFICAR SKU NO CATÁLOGO ---
+    possiveis_skus = ['sku', 'kit_sku', 'codigo', 'cod', 'item', 'referencia']
+    sku_col_found = None
+    for col in df_catalogo.columns:
+        if any(p == col or p in col for p in possiveis_skus):
+            sku_col_found = col
+            break
+
+    if sku_col_found:
+        df_catalogo.rename(columns={sku_col_found: 'sku'}, inplace=True)
+    else:
+        # Fallback: assume que a primeira coluna é o SKU se não achar nada
+        df_catalogo.rename(columns={df_catalogo.columns[0]: 'sku'}, inplace=True)
+
+    # --- MAPEAMENTO DA ABA KITS (Baseado no seu arquivo) ---
+    df_kits.rename(columns={
+        'kit_sku': 'sku_kit',
+        'component_sku': 'sku_componente',
+        'qty_por_kit': 'quantidade_componente',
+        'quantidade': 'quantidade_componente'
+    }, inplace=True, errors='ignore')
+
+    # Limpeza e Padronização de valores (MAIÚSCULO E LIMPO)
+    def clean_sku(val):
+        return str(val).strip().upper() if pd.notnull(val) else ""
+
+    df_catalogo['sku'] = df_catalogo['sku'].apply(clean_sku)
+    if 'sku_kit' in df_kits.columns:
+        df_kits['sku_kit'] = df_kits['sku_kit'].apply(clean_sku)
+    if 'sku_componente' in df_kits.columns:
+        df_kits['sku_componente'] = df_kits['sku_componente'].apply(clean_sku)
+
+    return _montar_dados(df_catalogo, df_kits, hashlib.md5(content_bytes).hexdigest())
+
 def load_catalogo_padrao(url=URL_PADRAO):
     try:
         response = requests.get(url, timeout=20)
         response.raise_for_status()
-        content = io.BytesIO(response.content)
-        
-        # Lê as abas CATALOGO_SIMPLES e KITS
-        df_catalogo = pd.read_excel(content, sheet_name="CATALOGO_SIMPLES")
-        content.seek(0)
-        df_kits = pd.read_excel(content, sheet_name="KITS")
-        
-        # Normalização manual robusta (Tudo minúsculo e sem espaços)
-        df_catalogo.columns = [str(c).strip().lower() for c in df_catalogo.columns]
-        df_kits.columns = [str(c).strip().lower() for c in df_kits.columns]
-        
-        # --- IDENTIFICAR SKU NO CATÁLOGO ---
-        possiveis_skus = ['sku', 'kit_sku', 'codigo', 'cod', 'item', 'referencia']
-        sku_col_found = None
-        for col in df_catalogo.columns:
-            if any(p == col or p in col for p in possiveis_skus):
-                sku_col_found = col
-                break
-        
-        if sku_col_found:
-            df_catalogo.rename(columns={sku_col_found: 'sku'}, inplace=True)
-        else:
-            # Fallback: assume que a primeira coluna é o SKU se não achar nada
-            df_catalogo.rename(columns={df_catalogo.columns[0]: 'sku'}, inplace=True)
-
-        # --- MAPEAMENTO DA ABA KITS (Baseado no seu arquivo) ---
-        df_kits.rename(columns={
-            'kit_sku': 'sku_kit',
-            'component_sku': 'sku_componente',
-            'qty_por_kit': 'quantidade_componente',
-            'quantidade': 'quantidade_componente'
-        }, inplace=True, errors='ignore')
-
-        # Limpeza e Padronização de valores (MAIÚSCULO E LIMPO)
-        def clean_sku(val):
-            return str(val).strip().upper() if pd.notnull(val) else ""
-
-        df_catalogo['sku'] = df_catalogo['sku'].apply(clean_sku)
-        if 'sku_kit' in df_kits.columns:
-            df_kits['sku_kit'] = df_kits['sku_kit'].apply(clean_sku)
-        if 'sku_componente' in df_kits.columns:
-            df_kits['sku_componente'] = df_kits['sku_componente'].apply(clean_sku)
-            
-        return {"catalogo": df_catalogo, "kits": df_kits}
+        return parse_catalogo(response.content)
     except Exception as e:
         st.error(f"Erro ao carregar Planilha Drive: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def _salvar_disco(dados, meta):
+    try:
+        snapshot_cache.salvar_parquet(dados["catalogo"], _CATALOGO_FILE)
+        snapshot_cache.salvar_parquet(dados["kits"], _KITS_FILE)
+        _salvar_meta(meta)
+    except Exception:
+        pass
+
+def _salvar_meta(meta):
+    try:
+        os.makedirs(config.CATALOGO_DIR, exist_ok=True)
+        with open(_META_FILE, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+    except Exception:
+        pass
+
+def _carregar_disco():
+    """Cópia local da última versão (restart a frio sem ir na rede)."""
+    try:
+        with open(_META_FILE, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        df_catalogo = snapshot_cache.ler_parquet(_CATALOGO_FILE)
+        df_kits = snapshot_cache.ler_parquet(_KITS_FILE)
+        _cache["dados"] = _montar_dados(df_catalogo, df_kits, meta.get("hash"))
+        _cache["meta"] = meta
+    except Exception:
+        pass
+
+def _revalidar(url, meta, tem_dados):
+    """
+    GET condicional (ETag/Last-Modified); sem cabeçalhos, compara o hash do conteúdo.
+    Roda fora do lock: devolve (dados novos ou None se não mudou, meta atualizado).
+    """
+    meta = dict(meta)
+    headers = {}
+    if tem_dados:
+        if meta.get("etag"): headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"): headers["If-Modified-Since"] = meta["last_modified"]
+
+    response = requests.get(url, timeout=20, headers=headers)
+    meta["verificado_em"] = time.time()
+    if response.status_code == 304:
+        return None, meta
+    response.raise_for_status()
+
+    meta["etag"] = response.headers.get("ETag")
+    meta["last_modified"] = response.headers.get("Last-Modified")
+    novo_hash = hashlib.md5(response.content).hexdigest()
+    if tem_dados and novo_hash == meta.get("hash"):
+        return None, meta
+
+    dados = parse_catalogo(response.content)
+    meta["hash"] = novo_hash
+    return dados, meta
+
+def get_catalogo(forcar=False, url=URL_PADRAO):
+    """
+    Catálogo/kits compartilhado pelo processo. Só revalida na fonte depois de
+    config.CATALOGO_TTL segundos (ou com forcar=True); se a rede falhar, mantém a última versão.
+    Uma sessão vai à rede por vez; as outras seguem com a versão atual (ou esperam, se não há nenhuma).
+    """
+    with _lock:
+        if _cache["dados"] is None:
+            _carregar_disco()
+        idade = time.time() - _cache["meta"].get("verificado_em", 0)
+        if _cache["dados"] is not None and idade < config.CATALOGO_TTL and not forcar:
+            return _cache["dados"]
+        evento = _cache["revalidando"]
+        lider = evento is None
+        if lider:
+            evento = _cache["revalidando"] = threading.Event()
+        dados, meta = _cache["dados"], _cache["meta"]
+
+    if not lider:
+        if dados is not None and not forcar: return dados
+        evento.wait()
+        return _cache["dados"]
+
+    try:
+        novos, meta = _revalidar(url, meta, dados is not None)
+        with _lock:
+            if novos is not None: _cache["dados"] = novos
+            _cache["meta"] = meta
+        if novos is not None: _salvar_disco(novos, meta)
+        else: _salvar_meta(meta)
+    except Exception as e:
+        if dados is None:
+            st.error(f"Erro ao carregar Planilha Drive: {e}")
+        else:
+            st.warning(f"Não foi possível atualizar o catálogo, usando a última versão: {e}")
+    finally:
+        with _lock:
+            _cache["revalidando"] = None
+        evento.set()
+    return _cache["dados"]
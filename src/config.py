@@ -9,4 +9,53 @@ LOCAL_PADRAO_FILENAME = "Padrao_produtos.xlsx"
 
 STORAGE_DIR = ".streamlit/uploaded_files_cache"
 if not os.path.exists(STORAGE_DIR):
-    os.makedirs(STORAGE_DIR, exist_ok=True)
\ No newline at end of file
+    os.makedirs(STORAGE_DIR, exist_ok=True)
+
+# Snapshots colunares (Parquet) dos relatórios já normalizados
+SNAPSHOT_DIR = os.path.join(STORAGE_DIR, "snapshots")
+SNAPSHOT_MAX_BYTES = 512 * 1024 * 1024
+
+# Catálogo compartilhado entre sessões (cópia local + revalidação condicional)
+CATALOGO_DIR = os.path.join(STORAGE_DIR, "catalogo")
+CATALOGO_TTL = 15 * 60
+
+# Conexão com o Supabase (cliente único por processo, keep-alive e retry)
+SUPABASE_TIMEOUT = float(os.environ.get("SUPABASE_TIMEOUT", 20))
+SUPABASE_RETRIES = int(os.environ.get("SUPABASE_RETRIES", 2))
+SUPABASE_BACKOFF = float(os.environ.get("SUPABASE_BACKOFF", 0.5))
+SUPABASE_HEALTHCHECK_S = float(os.environ.get("SUPABASE_HEALTHCHECK_S", 120))
+SUPABASE_MAX_CONEXOES = int(os.environ.get("SUPABASE_MAX_CONEXOES", 10))
+
+# Manifesto do bucket (listagem das pastas das empresas em cache curto)
+MANIFESTO_TTL = 30
+
+# Medição por etapa do motor (src/perf.py): tempos no log e painel de debug na Análise
+PERF_ATIVO = os.environ.get("PERF_ATIVO", "0") == "1"
+
+# Cache da Análise (LRU por bytes): bases por versão das entradas, resultados também por parâmetros
+CACHE_BASES_MAX_BYTES = int(os.environ.get("CACHE_BASES_MAX_BYTES", 256 * 1024 * 1024))
+CACHE_RESULTADOS_MAX_BYTES = int(os.environ.get("CACHE_RESULTADOS_MAX_BYTES", 256 * 1024 * 1024))
+
+# Numeração de OCs sem o contador do banco (sql/oc_sequencia.sql): só para desenvolvimento,
+# a contagem pode repetir número entre sessões
+OC_NUMERACAO_POR_CONTAGEM = os.environ.get("OC_NUMERACAO_POR_CONTAGEM", "0") == "1"
+
+# Listagem de OCs (Gestão): cache curto das consultas paginadas
+PEDIDOS_CACHE_TTL = 20
+PEDIDOS_POR_PAGINA = 50
+
+# PDF de inbound: páginas por tarefa e processos do pool
+INBOUND_PDF_PAGINAS_POR_TAREFA = 10
+INBOUND_PDF_WORKERS = int(os.environ.get("INBOUND_PDF_WORKERS", min(4, os.cpu_count() or 1)))
+
+# Previsão de demanda (src/previsao.py): teto do fator aplicado sobre a regra de 60 dias
+PREVISAO_FATOR_MAX = 3.0
+
+# Histórico de uploads (src/historico.py): partições por dia, compactadas por mês depois de N dias
+HISTORICO_DIR = os.path.join(STORAGE_DIR, "historico")
+HISTORICO_LINHAS_POR_GRUPO = 4096
+HISTORICO_COMPACTAR_DIAS = 90
+
+# Otimização da compra sob orçamento (src/orcamento.py): lotes candidatos por SKU e rodadas do pedido mínimo
+ORCAMENTO_MAX_PASSOS = 40
+ORCAMENTO_MAX_RODADAS = 5
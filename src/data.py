@@ -1,5 +1,5 @@
 import streamlit as st
-from . import logic 
+from . import logic, catalogo_loader
 
 def carregar_bases_para_calculo(empresa):
     """
@@ -10,8 +10,8 @@ def carregar_bases_para_calculo(empresa):
     df_ext = logic.get_vendas_externas(empresa)
     df_fisico = logic.get_estoque_fisico(empresa)
 
-    # 2. Busca o Catálogo que foi carregado na Home
-    dados_catalogo = st.session_state.get('catalogo_dados')
+    # 2. Busca o Catálogo (sessão ou cache compartilhado do servidor)
+    dados_catalogo = st.session_state.get('catalogo_dados') or catalogo_loader.get_catalogo()
     
     # 3. Verificação de integridade
     if df_full is None or df_fisico is None or dados_catalogo is None:
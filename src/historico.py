@@ -0,0 +1,240 @@
+import os
+import re
+import time
+import datetime as dt
+import threading
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from src import config, logic, snapshot_cache, utils
+
+# Histórico local, só de acréscimo, de cada upload de relatório:
+#   {HISTORICO_DIR}/{empresa}/{tipo}/{partição}/{momento}_{hash}.parquet
+# Partição diária (AAAA-MM-DD) ou mensal (AAAA-MM, depois da compactação). Cada arquivo tem
+# sku, data, momento e os grupos de COLUNAS_RELATORIO do tipo, ordenado por SKU em row groups
+# pequenos; _indice.parquet da partição diz em que arquivo/row group está cada SKU.
+
+TIPOS = ("FULL", "EXT", "FISICO")
+INDICE = "_indice.parquet"
+_RE_DIA = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_RE_MES = re.compile(r"^\d{4}-\d{2}$")
+
+_indices = {}  # caminho do índice -> (mtime, DataFrame)
+_lock = threading.RLock()
+
+def _pasta(empresa, tipo):
+    return os.path.join(config.HISTORICO_DIR, empresa, tipo)
+
+def _intervalo(particao):
+    """(primeiro dia, último dia) cobertos pela partição, ou None se o nome não for de partição."""
+    if _RE_DIA.match(particao):
+        d = dt.date.fromisoformat(particao)
+        return d, d
+    if _RE_MES.match(particao):
+        ini = dt.date.fromisoformat(f"{particao}-01")
+        prox = (ini.replace(day=28) + dt.timedelta(days=4)).replace(day=1)
+        return ini, prox - dt.timedelta(days=1)
+    return None
+
+def _particoes(empresa, tipo, inicio=None, fim=None):
+    """Partições (caminho, nome) que cruzam o intervalo [inicio, fim], em ordem de data."""
+    pasta = _pasta(empresa, tipo)
+    if not os.path.isdir(pasta): return []
+    saida = []
+    for nome in sorted(os.listdir(pasta)):
+        faixa = _intervalo(nome)
+        if faixa is None: continue
+        if (inicio and faixa[1] < inicio) or (fim and faixa[0] > fim): continue
+        saida.append((os.path.join(pasta, nome), nome))
+    return saida
+
+def _arquivos(particao):
+    return sorted(f for f in os.listdir(particao) if f.endswith(".parquet") and f != INDICE)
+
+def _vigentes(particao, nome):
+    """Arquivos que valem na consulta: na partição diária, só o último upload do dia (nome começa pelo momento)."""
+    arquivos = _arquivos(particao)
+    return arquivos[-1:] if _RE_DIA.match(nome) else arquivos
+
+def _valores(df, tipo):
+    """sku + um float por grupo de palavras-chave do tipo (venda, estoque, preco), somado por SKU."""
+    grupos = logic.COLUNAS_RELATORIO[tipo]
+    dados = {"sku": df["sku"].astype(str).to_numpy()}
+    for grupo, keywords in grupos.items():
+        col = logic._casar_coluna(df.columns, keywords)
+        dados[grupo] = utils.br_series_to_float(df[col]).fillna(0).to_numpy() if col else np.zeros(len(df))
+    tabela = pd.DataFrame(dados)
+    tabela = tabela[tabela["sku"] != ""]
+    # Preço é o maior por SKU (mesma regra do motor); o resto soma
+    agg = {g: ("max" if g == "preco" else "sum") for g in grupos}
+    return tabela.groupby("sku", as_index=False, sort=True).agg(agg)
+
+def _gravar_arquivo(df, caminho):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    tmp = f"{caminho}.{os.getpid()}.tmp"
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp,
+                   row_group_size=config.HISTORICO_LINHAS_POR_GRUPO)
+    os.replace(tmp, caminho)
+
+def _reindexar(particao):
+    """Refaz o índice SKU -> (arquivo, row group) da partição."""
+    partes = []
+    for arq in _arquivos(particao):
+        pf = pq.ParquetFile(os.path.join(particao, arq))
+        for g in range(pf.num_row_groups):
+            skus = pf.read_row_group(g, columns=["sku"]).column("sku").to_numpy(zero_copy_only=False)
+            partes.append(pd.DataFrame({"sku": pd.unique(skus), "arquivo": arq, "grupo": g}))
+    indice = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame({"sku": [], "arquivo": [], "grupo": []})
+    _gravar_arquivo(indice.sort_values("sku", ignore_index=True), os.path.join(particao, INDICE))
+
+def _indice(particao):
+    """Índice da partição (em memória enquanto o arquivo não mudar)."""
+    caminho = os.path.join(particao, INDICE)
+    if not os.path.exists(caminho):
+        _reindexar(particao)
+    mtime = os.path.getmtime(caminho)
+    with _lock:
+        cache = _indices.get(caminho)
+        if cache and cache[0] == mtime: return cache[1]
+    indice = pq.read_table(caminho, memory_map=True).to_pandas()
+    with _lock:
+        _indices[caminho] = (mtime, indice)
+    return indice
+
+def gravar(empresa, tipo, df, data=None, momento=None, hash_conteudo=None):
+    """
+    Acrescenta um upload ao histórico (nunca sobrescreve). O mesmo conteúdo no mesmo dia não é
+    gravado de novo. Retorna o caminho do arquivo gravado, ou None.
+    """
+    if df is None or df.empty or "sku" not in df.columns or tipo not in TIPOS: return None
+    data = data or dt.date.today()
+    momento = int(momento if momento is not None else time.time() * 1000)
+    particao = os.path.join(_pasta(empresa, tipo), data.isoformat())
+    sufixo = (hash_conteudo or "")[:12]
+    with _lock:
+        if sufixo and os.path.isdir(particao) and any(a.endswith(f"_{sufixo}.parquet") for a in _arquivos(particao)):
+            return None
+        tabela = _valores(df, tipo)
+        tabela.insert(1, "data", data.isoformat())
+        tabela.insert(2, "momento", np.int64(momento))
+        caminho = os.path.join(particao, f"{momento}_{sufixo or 'upload'}.parquet")
+        _gravar_arquivo(tabela, caminho)
+        _reindexar(particao)
+    return caminho
+
+def registrar_upload(path, df, content=None):
+    """Gancho do storage.upload: `{empresa}/{TIPO}.xlsx` vai para o histórico da empresa/tipo."""
+    partes = path.split("/")
+    if len(partes) != 2: return None
+    tipo = os.path.splitext(partes[1])[0].upper()
+    if tipo not in TIPOS: return None
+    h = snapshot_cache.hash_conteudo(content) if content else None
+    caminho = gravar(partes[0], tipo, df, hash_conteudo=h)
+    compactar(partes[0], tipo)
+    return caminho
+
+def consultar(empresa, tipo, skus=None, inicio=None, fim=None, colunas=None):
+    """
+    Linhas (data, sku, colunas) do histórico no intervalo. Com `skus`, lê só os row groups que
+    os contêm (pelo índice de cada partição). Vários uploads no mesmo dia: vale o último inteiro.
+    """
+    grupos = list(logic.COLUNAS_RELATORIO[tipo])
+    colunas = ["sku", "data", "momento"] + [c for c in (colunas or grupos) if c in grupos]
+    alvo = pd.Index(pd.unique(pd.Index(skus).astype(str))) if skus is not None else None
+    partes = []
+    for particao, nome in _particoes(empresa, tipo, inicio, fim):
+        vigentes = _vigentes(particao, nome)
+        if alvo is None:
+            leituras = {arq: None for arq in vigentes}
+        else:
+            idx = _indice(particao)
+            idx = idx[idx["sku"].isin(alvo) & idx["arquivo"].isin(vigentes)]
+            leituras = {arq: sorted(g["grupo"].unique()) for arq, g in idx.groupby("arquivo")}
+        for arq, rgs in leituras.items():
+            pf = pq.ParquetFile(os.path.join(particao, arq), memory_map=True)
+            t = pf.read(columns=colunas) if rgs is None else pf.read_row_groups(rgs, columns=colunas)
+            partes.append(t.to_pandas())
+    if not partes:
+        return pd.DataFrame(columns=["data", "sku"] + colunas[3:])
+    df = pd.concat(partes, ignore_index=True)
+    if alvo is not None:
+        df = df[df["sku"].isin(alvo)]
+    df["data"] = pd.to_datetime(df["data"])
+    if inicio: df = df[df["data"] >= pd.Timestamp(inicio)]
+    if fim: df = df[df["data"] <= pd.Timestamp(fim)]
+    df = df.sort_values("momento").drop_duplicates(["data", "sku"], keep="last")
+    return df.drop(columns="momento").sort_values(["data", "sku"], ignore_index=True)[["data", "sku"] + colunas[3:]]
+
+def serie_diaria(empresa, tipo="FULL", coluna="venda", skus=None, dias=180, hoje=None, janela=60):
+    """
+    Série diária (skus, datas, matriz SKUs x dias) a partir dos uploads. Cada relatório traz o
+    total dos últimos `janela` dias: cada dia recebe total/janela do upload mais próximo que o
+    cobre (o primeiro na data ou depois dela). Dia sem cobertura repete o anterior.
+    """
+    hoje = hoje or dt.date.today()
+    inicio = hoje - dt.timedelta(days=dias + janela)
+    df = consultar(empresa, tipo, skus=skus, inicio=inicio, fim=hoje, colunas=[coluna])
+    if df.empty:
+        return pd.Index([], name="sku"), pd.DatetimeIndex([]), np.zeros((0, 0))
+
+    codigos, lista_skus = pd.factorize(df["sku"], sort=True)
+    datas_up = df["data"].to_numpy()
+    ultimo = df["data"].max()
+    datas = pd.date_range(ultimo - pd.Timedelta(days=dias - 1), ultimo, freq="D")
+    matriz = np.full((len(lista_skus), len(datas)), np.nan)
+    taxa = df[coluna].to_numpy(dtype=float) / janela
+    # Do upload mais recente para o mais antigo: o mais antigo que cobre o dia fica por último
+    for d in np.sort(np.unique(datas_up))[::-1]:
+        sel = datas_up == d
+        fim_j = (pd.Timestamp(d) - datas[0]).days
+        ini_j = max(fim_j - janela + 1, 0)
+        if fim_j < 0: continue
+        faixa = matriz[:, ini_j:fim_j + 1]
+        faixa[:] = 0.0  # SKU ausente neste upload não vendeu na janela dele
+        faixa[codigos[sel]] = taxa[sel][:, None]
+    # Começa no primeiro dia coberto por algum upload
+    primeiro = max((pd.Timestamp(datas_up.min()) - datas[0]).days - janela + 1, 0)
+    matriz = pd.DataFrame(matriz[:, primeiro:]).ffill(axis=1).fillna(0).to_numpy()
+    return pd.Index(lista_skus, name="sku"), datas[primeiro:], matriz
+
+def _remover_particoes(particoes):
+    for p in particoes:
+        for a in os.listdir(p): os.remove(os.path.join(p, a))
+        os.rmdir(p)
+
+def compactar(empresa, tipo, dias=None, hoje=None):
+    """
+    Junta as partições diárias mais antigas que `dias` (config.HISTORICO_COMPACTAR_DIAS) numa
+    partição por mês, só com o último upload de cada dia. Retorna quantas partições diárias saíram.
+    """
+    dias = config.HISTORICO_COMPACTAR_DIAS if dias is None else dias
+    limite = (hoje or dt.date.today()) - dt.timedelta(days=dias)
+    antigas = [(p, n) for p, n in _particoes(empresa, tipo, fim=limite) if _RE_DIA.match(n)]
+    if not antigas: return 0
+    por_mes = {}
+    for p, n in antigas:
+        por_mes.setdefault(n[:7], []).append(p)
+
+    with _lock:
+        for mes, diarias in por_mes.items():
+            destino = os.path.join(_pasta(empresa, tipo), mes)
+            fontes = [(p, os.path.basename(p)) for p in diarias] + ([(destino, mes)] if os.path.isdir(destino) else [])
+            # Partição sem arquivo vigente (escrita interrompida, remoção manual) não entra
+            partes = [pq.read_table(os.path.join(p, a)).to_pandas() for p, n in fontes for a in _vigentes(p, n)]
+            partes = [t for t in partes if len(t)]
+            if not partes:
+                _remover_particoes(diarias)
+                continue
+            tabela = pd.concat(partes, ignore_index=True)
+            tabela = (tabela.sort_values("momento").drop_duplicates(["data", "sku"], keep="last")
+                            .sort_values(["sku", "data"], ignore_index=True))
+            antigos = [os.path.join(destino, a) for a in _arquivos(destino)] if os.path.isdir(destino) else []
+            novo = os.path.join(destino, f"{int(tabela['momento'].max())}_compactado.parquet")
+            # Grava o novo antes de apagar: se cair no meio, a duplicata some no drop_duplicates da consulta
+            _gravar_arquivo(tabela, novo)
+            for caminho in antigos:
+                if caminho != novo: os.remove(caminho)
+            _remover_particoes(diarias)
+            _reindexar(destino)
+    return len(antigas)
@@ -0,0 +1,171 @@
+import io
+import re
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from src import config, logic, utils
+
+# SKU dentro do texto da coluna PRODUTO (ex: "Garrafa 1L - SKU: GAR-1L-AZ")
+RE_SKU = re.compile(r'SKU:?\s*([\w\-\/\+\.\&]+)', re.IGNORECASE)
+
+def extrair_skus(textos):
+    """SKU de cada célula (NaN onde não há), sobre a coluna inteira."""
+    return pd.Series(textos).astype(str).str.extract(RE_SKU, expand=False).str.upper().str.strip()
+
+def agregar(skus, quantidades):
+    """(SKU, Qtd_Envio) somado por SKU; linhas sem SKU ficam de fora."""
+    df = pd.DataFrame({"SKU": np.asarray(skus, dtype=object), "Qtd_Envio": np.asarray(quantidades, dtype=float)})
+    df = df[df["SKU"].notna()]
+    return df.groupby("SKU", as_index=False, sort=True)["Qtd_Envio"].sum()
+
+def ler_planilha(content):
+    """Lê o Excel/CSV do inbound uma vez e devolve (SKU, Qtd_Envio) agregado."""
+    df = logic.find_header_and_read(io.BytesIO(content), keywords=['unidades'])
+    if df is None or df.empty:
+        raise ValueError("Não foi possível ler o arquivo de inbound.")
+    c_prod = next((c for c in df.columns if "PRODUTO" in str(c).upper()), None)
+    c_qtd = next((c for c in df.columns if "UNIDADES" in str(c).upper()), None)
+    if not (c_prod and c_qtd):
+        raise ValueError("Não encontrei as colunas 'PRODUTO' e 'UNIDADES' no arquivo.")
+    return agregar(extrair_skus(df[c_prod]), utils.br_series_to_float(df[c_qtd]))
+
+# --- PDF (Mercado Livre): páginas em paralelo, SKU pareado com a quantidade pela posição ---
+
+_RE_NUMERO = re.compile(r'^\d{1,3}(?:\.\d{3})*$|^\d+$')
+
+def _numero(texto):
+    texto = str(texto or "").strip()
+    return float(texto.replace(".", "")) if _RE_NUMERO.match(texto) else None
+
+def _pares_tabela(tabela):
+    """(SKU, qtd) das linhas de uma tabela do pdfplumber com cabeçalho UNIDADES."""
+    for i, linha in enumerate(tabela):
+        textos = [str(c or "").upper() for c in linha]
+        col_qtd = next((j for j, t in enumerate(textos) if "UNIDADES" in t), None)
+        if col_qtd is None: continue
+        pares = []
+        for corpo in tabela[i + 1:]:
+            m = RE_SKU.search(" ".join(str(c or "") for c in corpo))
+            if m and col_qtd < len(corpo):
+                pares.append((m.group(1).upper().strip(), _numero(corpo[col_qtd]) or 0.0))
+        return pares
+    return None
+
+def _pares_palavras(palavras, tolerancia=3.0):
+    """
+    Pareamento por posição: cada SKU fica com o número mais próximo na vertical dentro da
+    coluna UNIDADES (ou, sem cabeçalho, o número mais à direita na mesma linha).
+    """
+    cab = next((w for w in palavras if w["text"].upper().startswith("UNIDADES")), None)
+    numeros = [w for w in palavras if _numero(w["text"]) is not None]
+    if cab is not None:
+        margem = max(cab["x1"] - cab["x0"], 20)
+        numeros = [w for w in numeros if w["top"] > cab["top"] and
+                   cab["x0"] - margem <= (w["x0"] + w["x1"]) / 2 <= cab["x1"] + margem]
+
+    pares = []
+    for i, w in enumerate(palavras):
+        if not w["text"].upper().startswith("SKU"): continue
+        # "SKU: ABC" pode vir numa palavra só ou em duas
+        m = RE_SKU.match(w["text"]) or (i + 1 < len(palavras) and RE_SKU.match(f"{w['text']} {palavras[i + 1]['text']}"))
+        if not m: continue
+        if cab is not None:
+            candidatos = numeros
+        else:
+            candidatos = [n for n in numeros if abs(n["top"] - w["top"]) <= tolerancia and n["x0"] > w["x1"]]
+        if not candidatos:
+            pares.append((m.group(1).upper().strip(), 0.0))
+            continue
+        if cab is not None:
+            melhor = min(candidatos, key=lambda n: abs(n["top"] - w["top"]))
+        else:
+            melhor = max(candidatos, key=lambda n: n["x0"])
+        pares.append((m.group(1).upper().strip(), _numero(melhor["text"])))
+    return pares
+
+def _ler_paginas(caminho, inicio, fim):
+    """Worker: (SKU, qtd) das páginas [inicio, fim), liberando o cache de cada página ao terminar."""
+    import pdfplumber
+    pares = []
+    with pdfplumber.open(caminho, pages=list(range(inicio + 1, fim + 1))) as pdf:
+        for page in pdf.pages:
+            achou = None
+            for tabela in page.extract_tables():
+                achou = _pares_tabela(tabela)
+                if achou: break
+            pares += achou if achou else _pares_palavras(page.extract_words())
+            page.close()
+    return pares
+
+def ler_pdf(content, progresso=None, workers=None):
+    """
+    (SKU, Qtd_Envio) de um PDF de inbound. Páginas em blocos num pool de processos; os
+    resultados são somados à medida que cada bloco termina (memória estável em PDFs grandes).
+    `progresso(paginas_lidas, total)` é chamado a cada bloco.
+    """
+    import pdfplumber
+    with pdfplumber.open(io.BytesIO(content)) as pdf:
+        total = len(pdf.pages)
+    if total == 0: return agregar([], [])
+
+    passo = config.INBOUND_PDF_PAGINAS_POR_TAREFA
+    blocos = [(i, min(i + passo, total)) for i in range(0, total, passo)]
+    somas, lidas = {}, 0
+    def acumular(pares, n):
+        nonlocal lidas
+        for sku, qtd in pares:
+            somas[sku] = somas.get(sku, 0.0) + qtd
+        lidas += n
+        if progresso: progresso(lidas, total)
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+        tmp.write(content)
+        tmp.flush()
+        if len(blocos) == 1:
+            acumular(_ler_paginas(tmp.name, 0, total), total)
+        else:
+            # spawn: não herda as threads do servidor do Streamlit
+            ctx = multiprocessing.get_context("spawn")
+            n_workers = min(len(blocos), workers or config.INBOUND_PDF_WORKERS)
+            with ProcessPoolExecutor(max_workers=n_workers, mp_context=ctx) as pool:
+                futuros = {pool.submit(_ler_paginas, tmp.name, i, f): f - i for i, f in blocos}
+                for futuro in as_completed(futuros):
+                    acumular(futuro.result(), futuros[futuro])
+
+    return agregar(list(somas.keys()), list(somas.values()))
+
+def _posicoes(resultado, skus):
+    """Posição de cada SKU no resultado (-1 se ausente), pelo índice de SKU (1ª ocorrência)."""
+    if resultado.index.name == "SKU":
+        indice = resultado.index
+    elif "SKU" in (resultado.index.names or []):
+        indice = resultado.index.get_level_values("SKU")
+    else:
+        indice = pd.Index(resultado["SKU"])
+    if not indice.is_unique:
+        primeiras = np.flatnonzero(~indice.duplicated())
+        p = indice[primeiras].get_indexer(skus)
+        return np.where(p >= 0, primeiras[p], -1)
+    return indice.get_indexer(skus)
+
+def cruzar(df_inb, resultado, col_estoque="Estoque_Fisico", col_preco="Preco"):
+    """
+    Junta o inbound ao resultado da reposição (estoque físico e preço) por lookup no índice
+    de SKU, sem merge do frame inteiro. SKU ausente no resultado conta como estoque 0 e preço 0.
+    """
+    pos = _posicoes(resultado, df_inb["SKU"])
+    achou = pos >= 0
+    def coluna(col):
+        if not achou.any(): return np.zeros(len(pos))
+        valores = pd.to_numeric(resultado[col], errors="coerce").to_numpy(dtype=float)[np.where(achou, pos, 0)]
+        return np.nan_to_num(np.where(achou, valores, 0.0))
+
+    out = df_inb.copy()
+    out["Estoque_Fisico"] = coluna(col_estoque)
+    out["Preco"] = coluna(col_preco)
+    # O que falta = O que vou enviar - O que tenho no físico
+    out["Faltam_Comprar"] = (out["Qtd_Envio"] - out["Estoque_Fisico"]).clip(lower=0)
+    out["Custo_Falta"] = out["Faltam_Comprar"] * out["Preco"]
+    return out
@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+
+class KitIndex:
+    """
+    Índice compilado da aba KITS: SKUs viram códigos inteiros e a composição
+    vira uma matriz CSR kit -> componente (quantidades). Kits de kits são
+    resolvidos na construção; os componentes que fecham um ciclo são ignorados
+    e os ciclos ficam em `self.ciclos` (ex: "K1 -> K2 -> K1").
+    """
+
+    def __init__(self, df_kits, skus_catalogo=None):
+        kits, comps, qtds = self._ler_aba(df_kits)
+        arestas, self.ciclos = self._resolver(kits, comps, qtds)
+
+        universo = [skus_catalogo] if skus_catalogo is not None else []
+        universo += [pd.Series(kits, dtype=object), pd.Series(comps, dtype=object)]
+        self.vocab = pd.Index(pd.unique(pd.concat(universo, ignore_index=True).astype(str)))
+        n = len(self.vocab)
+
+        k_cod = self.vocab.get_indexer(arestas["kit"])
+        c_cod = self.vocab.get_indexer(arestas["comp"])
+        ordem = np.lexsort((c_cod, k_cod))
+        k_cod, c_cod = k_cod[ordem], c_cod[ordem]
+        qtd = arestas["qtd"][ordem]
+
+        self.kit_codes, inicio = np.unique(k_cod, return_index=True)
+        self.kit_codes = self.kit_codes.astype(np.int32)
+        self.indptr = np.append(inicio, len(k_cod)).astype(np.int64)
+        self.indices = c_cod.astype(np.int32)
+        self.data = qtd.astype(np.float64)
+        # Linha (kit) de cada entrada da CSR, usada no mat-vec transposto
+        self.row_of_entry = np.repeat(np.arange(len(self.kit_codes)), np.diff(self.indptr))
+        self.is_kit = np.zeros(n, dtype=bool)
+        self.is_kit[self.kit_codes] = True
+        self._dtype = None
+
+    @staticmethod
+    def _ler_aba(df_kits):
+        if df_kits is None or df_kits.empty or 'sku_kit' not in df_kits.columns:
+            vazio = np.array([], dtype=object)
+            return vazio, vazio, np.array([], dtype=float)
+        kits = df_kits['sku_kit'].astype(object).to_numpy()
+        # Mesmo comportamento do merge: componente ausente = o próprio SKU, quantidade ausente = 1
+        comps = df_kits['sku_componente'].astype(object).where(df_kits['sku_componente'].notna(), df_kits['sku_kit']).to_numpy()
+        if 'quantidade_componente' in df_kits.columns:
+            qtds = pd.to_numeric(df_kits['quantidade_componente'], errors='coerce').fillna(1).to_numpy(dtype=float)
+        else:
+            qtds = np.ones(len(df_kits))
+        return kits, comps, qtds
+
+    @staticmethod
+    def _resolver(kits, comps, qtds):
+        """
+        Explode kits aninhados de forma transitiva. Devolve (arestas, ciclos): o componente que
+        fecharia um ciclo fica de fora da explosão e o ciclo vai para a lista.
+        """
+        set_kits = set(kits)
+        aninhado = np.array([c in set_kits and c != k for k, c in zip(kits, comps)], dtype=bool)
+        if not aninhado.any():
+            return {"kit": kits, "comp": comps, "qtd": qtds}, []
+
+        filhos = {}
+        for k, c, q in zip(kits, comps, qtds):
+            filhos.setdefault(k, []).append((c, q))
+
+        resolvido, ciclos = {}, []
+        def expandir(k, caminho):
+            if k in resolvido: return resolvido[k]
+            caminho.append(k)
+            saida = []
+            for c, q in filhos[k]:
+                if c in caminho and c != k:
+                    ciclos.append(" -> ".join(caminho[caminho.index(c):] + [c]))
+                elif c in filhos and c != k:
+                    saida += [(c2, q * q2) for c2, q2 in expandir(c, caminho)]
+                else:
+                    saida.append((c, q))
+            caminho.pop()
+            resolvido[k] = saida
+            return saida
+
+        linhas = [(k, c, q) for k in filhos for c, q in expandir(k, [])]
+        k_, c_, q_ = zip(*linhas) if linhas else ((), (), ())
+        return ({"kit": np.array(k_, dtype=object), "comp": np.array(c_, dtype=object),
+                 "qtd": np.array(q_, dtype=float)}, ciclos)
+
+    @property
+    def kits(self):
+        return self.vocab[self.kit_codes]
+
+    def codigos(self, skus):
+        """Códigos inteiros dos SKUs; SKUs fora do índice recebem códigos novos após o vocabulário."""
+        skus = pd.Series(skus)
+        if not pd.api.types.is_string_dtype(skus):
+            skus = skus.astype(str)
+        cod = self.vocab.get_indexer(skus)
+        novos = cod < 0
+        nomes = self.vocab
+        if novos.any():
+            extra_cod, extra = pd.factorize(skus.to_numpy()[novos])
+            cod[novos] = len(self.vocab) + extra_cod
+            nomes = self.vocab.append(pd.Index(extra))
+        return cod, nomes
+
+    def aplicar(self, x, pesos=None):
+        """Mat-vec da explosão: y = x (não-kits) + Aᵀ · x (kits)."""
+        pesos = self.data if pesos is None else pesos
+        y = x.astype(np.float64, copy=True)
+        xk = y[self.kit_codes]
+        y[self.kit_codes] = 0
+        y[:len(self.vocab)] += np.bincount(self.indices, weights=pesos * xk[self.row_of_entry], minlength=len(self.vocab))
+        return y
+
+    def _acumular(self, cod, n, por_qtd, por_linha):
+        res = {}
+        # por_linha: cada linha explodida conta uma vez (peso 1 em todas as entradas)
+        for colunas, pesos in ((por_qtd, self.data), (por_linha, np.ones_like(self.data))):
+            for col, val in colunas.items():
+                x = np.bincount(cod, weights=np.asarray(val, dtype=float), minlength=n)
+                res[col] = self.aplicar(x, pesos)
+        return res
+
+    def vetores(self, skus=None, por_qtd=None, por_linha=None, cod=None):
+        """
+        Mesma explosão de explodir(), mas em vetores densos alinhados ao vocabulário
+        (posição = código do SKU). SKUs fora do vocabulário ficam de fora, como num merge pelo catálogo.
+        `cod`: códigos já calculados (self.codigos(skus)[0]).
+        """
+        cod = cod if cod is not None else self.codigos(skus)[0]
+        n = max(len(self.vocab), int(cod.max()) + 1 if len(cod) else 0)
+        res = self._acumular(cod, n, por_qtd or {}, por_linha or {})
+        return {col: v[:len(self.vocab)] for col, v in res.items()}
+
+    def explodir(self, skus, por_qtd=None, por_linha=None, codigos=None):
+        """
+        Equivalente ao merge com a aba KITS seguido de groupby por componente.
+        `por_qtd`: colunas multiplicadas pela quantidade do componente.
+        `por_linha`: colunas repetidas em cada linha explodida (sem multiplicar).
+        `codigos`: retorno de self.codigos(skus), para reaproveitar entre chamadas.
+        """
+        por_qtd, por_linha = por_qtd or {}, por_linha or {}
+        cod, nomes = codigos if codigos is not None else self.codigos(skus)
+        n = len(nomes)
+        presenca = self.aplicar(np.bincount(cod, minlength=n).astype(float), np.ones_like(self.data)) > 0
+
+        res = {'sku': nomes[presenca]}
+        for col, v in self._acumular(cod, n, por_qtd, por_linha).items():
+            res[col] = v[presenca]
+        return pd.DataFrame(res).sort_values('sku', ignore_index=True)
+
+    def categorias(self, cod):
+        """Coluna de SKU categórica a partir dos códigos (categorias = vocabulário, compartilhado)."""
+        if self._dtype is None:
+            self._dtype = pd.CategoricalDtype(self.vocab)
+        return pd.Categorical.from_codes(cod, dtype=self._dtype)
@@ -1,31 +1,96 @@
 import pandas as pd
 import streamlit as st
 import io
+import re
+import csv
+import datetime as dt
 import numpy as np
-from src import storage, utils 
+import threading
+from statistics import NormalDist
+from concurrent.futures import ThreadPoolExecutor
+from pandas.io.parsers import TextParser
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from src import storage, utils, snapshot_cache, catalogo_loader, perf
+from src.kits_index import KitIndex
+
+def _linhas_planilha(content_io):
+    """
+    Lê as linhas da primeira aba numa única passada (calamine se instalado, senão
+    openpyxl read_only), com a mesma conversão de células do pd.read_excel.
+    """
+    linhas, wb = [], None
+    try:
+        from python_calamine import CalamineWorkbook
+        sheet = CalamineWorkbook.from_filelike(content_io).get_sheet_by_index(0)
+        brutas = ([_converter_calamine(v) for v in row] for row in sheet.to_python(skip_empty_area=False))
+    except ImportError:
+        from openpyxl import load_workbook
+        wb = load_workbook(content_io, read_only=True, data_only=True, keep_links=False)
+        ws = wb.worksheets[0]
+        ws.reset_dimensions()
+        brutas = ([_converter_celula(c) for c in row] for row in ws.iter_rows())
+
+    ultima_com_dados = -1
+    for i, row in enumerate(brutas):
+        row = [int(v) if isinstance(v, float) and v.is_integer() else v for v in row]
+        while row and row[-1] == "":
+            row.pop()
+        if row: ultima_com_dados = i
+        linhas.append(row)
+    if wb is not None: wb.close()
+    linhas = linhas[:ultima_com_dados + 1]
+    if linhas:
+        largura = max(len(r) for r in linhas)
+        linhas = [r + [""] * (largura - len(r)) for r in linhas]
+    return linhas
+
+def _converter_celula(cell):
+    # Mesmo tratamento do leitor openpyxl do pandas (vazio -> "", erro -> NaN)
+    if cell.value is None: return ""
+    if cell.data_type == "e": return np.nan
+    return cell.value
+
+def _converter_calamine(v):
+    # Mesmo tratamento do leitor calamine do pandas (datas viram Timestamp)
+    if v is None: return ""
+    if isinstance(v, (dt.date, dt.datetime)): return pd.Timestamp(v)
+    if isinstance(v, dt.timedelta): return pd.Timedelta(v)
+    return v
+
+def _sniff_csv(content_io, tamanho=8192):
+    """Detecta o separador só pelos primeiros KB (em vez de sep=None/engine python)."""
+    amostra = content_io.read(tamanho).decode("utf-8-sig", errors="ignore")
+    content_io.seek(0)
+    try:
+        return csv.Sniffer().sniff(amostra, delimiters=",;\t|").delimiter
+    except csv.Error:
+        return None
 
 def find_header_and_read(content_io, keywords=['sku', 'codigo', 'item', 'referencia']):
     try:
-        df_temp = pd.read_excel(content_io, header=None, nrows=20)
-        header_row = 0
-        for i, row in df_temp.iterrows():
-            line_str = " ".join([str(val).lower() for val in row.values if pd.notnull(val)])
-            if any(k in line_str for k in keywords):
-                header_row = i
-                break
-        content_io.seek(0)
-        return pd.read_excel(content_io, skiprows=header_row)
+        # Planilha lida uma vez só; o cabeçalho é detectado sobre as linhas já em memória
+        linhas = _linhas_planilha(content_io)
+        if not linhas: return pd.DataFrame()
+        df_temp = TextParser(linhas[:20], header=None, skip_blank_lines=False).read()
+        texto = df_temp.where(df_temp.notna(), "").astype(str).agg(" ".join, axis=1).str.lower()
+        achou = texto.str.contains("|".join(re.escape(k) for k in keywords))
+        header_row = int(achou.idxmax()) if achou.any() else 0
+        return TextParser(linhas, header=0, skiprows=header_row, skip_blank_lines=False).read()
     except:
         try:
             content_io.seek(0)
+            sep = _sniff_csv(content_io)
+            if sep:
+                return pd.read_csv(content_io, sep=sep, encoding='utf-8-sig')
             return pd.read_csv(content_io, sep=None, engine='python', encoding='utf-8-sig')
         except: return None
 
-def read_file_from_storage(empresa, tipo_arquivo):
-    path = f"{empresa}/{tipo_arquivo}.xlsx"
-    content = storage.download(path)
-    if not content: return None
-    df = find_header_and_read(io.BytesIO(content))
+def parse_relatorio(content):
+    """Lê e normaliza o binário de um relatório (FULL/EXT/FISICO)."""
+    return normalizar_relatorio(find_header_and_read(io.BytesIO(content)))
+
+def normalizar_relatorio(df):
+    """Padroniza os nomes de coluna e a coluna de SKU; None se não houver SKU."""
     if df is not None:
         df = utils.normalize_cols(df)
         for col in df.columns:
@@ -37,105 +102,339 @@ def read_file_from_storage(empresa, tipo_arquivo):
             return df
     return None
 
-def flex_col(df, keywords):
-    if df is None or df.empty: return None
+# Palavras-chave das colunas que o motor usa de cada relatório (o resto não passa da leitura)
+COLUNAS_RELATORIO = {
+    "FULL": {"venda": ['venda_60', 'venda_61', 'venda_qtd', 'venda'],
+             "estoque": ['disponivel', 'estoque_atual', 'estoque_total', 'estoque']},
+    "EXT": {"venda": ['venda', 'qtde', 'qtd', 'quantidade']},
+    "FISICO": {"estoque": ['estoque', 'saldo', 'fisico', 'atual'],
+               "preco": ['preco', 'custo', 'compra', 'valor_unitario']},
+}
+# Colunas do catálogo que seguem para o resultado: as fixas e a primeira que casa com cada grupo
+COLUNAS_CATALOGO = ['sku', 'fornecedor']
+COLUNAS_CATALOGO_TEXTO = {
+    "descricao": ['descri', 'nome', 'produto'],
+    "status": ['status_reposicao', 'status_repor'],
+}
+
+def colunas_uteis(colunas, tipo_arquivo):
+    """sku + a primeira coluna que casa com cada grupo de palavras-chave do tipo de relatório."""
+    grupos = COLUNAS_RELATORIO.get(tipo_arquivo)
+    if grupos is None: return list(colunas)
+    achadas = [_casar_coluna(colunas, k) for k in grupos.values()]
+    return list(dict.fromkeys(['sku'] + [c for c in achadas if c is not None]))
+
+def projetar_relatorio(df, tipo_arquivo):
+    if df is None: return None
+    return df[[c for c in colunas_uteis(df.columns, tipo_arquivo) if c in df.columns]]
+
+def read_file_from_storage(empresa, tipo_arquivo):
+    path = f"{empresa}/{tipo_arquivo}.xlsx"
+    # Snapshot Parquet válido enquanto o hash do objeto na nuvem não mudar (lendo só as colunas úteis)
+    with perf.etapa("snapshot", detalhe=tipo_arquivo, empresa=empresa) as m:
+        hash_origem = storage.get_hash(path)
+        df = m.saida(snapshot_cache.obter(path, hash_origem, colunas=lambda nomes: colunas_uteis(nomes, tipo_arquivo)))
+    if df is not None: return df
+    with perf.etapa("download", detalhe=tipo_arquivo, empresa=empresa):
+        content = storage.download(path)
+    if not content: return None
+    with perf.etapa("parse", detalhe=tipo_arquivo, empresa=empresa) as m:
+        df = snapshot_cache.registrar(path, content, parse_relatorio, hash_origem=hash_origem)
+        return m.saida(projetar_relatorio(df, tipo_arquivo))
+
+def _casar_coluna(colunas, keywords):
     for k in keywords:
-        for col in df.columns:
+        for col in colunas:
             if k in str(col).lower(): return col
     return None
 
+def flex_col(df, keywords):
+    if df is None or df.empty: return None
+    return _casar_coluna(df.columns, keywords)
+
+def _dados_catalogo():
+    # Sessão primeiro (o que o usuário está vendo); senão o cache compartilhado do processo
+    return st.session_state.get('catalogo_dados') or catalogo_loader.get_catalogo()
+
+def versao_catalogo():
+    """Hash da planilha de catálogo em uso (muda quando o catálogo é atualizado)."""
+    return (_dados_catalogo() or {}).get('versao')
+
+def preparar_catalogo(dados_cat):
+    """Pré-processamento do catálogo/kits compartilhado entre as empresas (feito uma vez só)."""
+    df_catalogo = dados_cat['catalogo']
+    df_kits = dados_cat['kits']
+    kit_index = dados_cat.get('kit_index') or KitIndex(df_kits, skus_catalogo=df_catalogo['sku'])
+    return {
+        "catalogo": df_catalogo,
+        "kits": df_kits,
+        "kit_index": kit_index,
+        "base_catalogo": _base_catalogo(df_catalogo, df_kits, kit_index),
+    }
+
+def _base_catalogo(df_catalogo, df_kits, kit_index):
+    """
+    Linhas do catálogo que entram no resultado (status != nao_repor e sem os kits), só com
+    COLUNAS_CATALOGO e as colunas de COLUNAS_CATALOGO_TEXTO (descrição, status) com o nome original.
+    Devolve (df, códigos dos SKUs no vocabulário do KitIndex).
+    """
+    manter = np.ones(len(df_catalogo), dtype=bool)
+    st_col = flex_col(df_catalogo, COLUNAS_CATALOGO_TEXTO["status"])
+    status = df_catalogo[st_col].fillna("").astype(str).str.lower().str.strip() if st_col else None
+    if st_col:
+        manter &= status.to_numpy() != 'nao_repor'
+    if not df_kits.empty:
+        manter &= ~df_catalogo['sku'].isin(df_kits['sku_kit'].unique()).to_numpy()
+
+    textos = [flex_col(df_catalogo, k) for k in COLUNAS_CATALOGO_TEXTO.values()]
+    colunas = list(dict.fromkeys([c for c in COLUNAS_CATALOGO if c in df_catalogo.columns] +
+                                 [c for c in textos if c is not None]))
+    df = df_catalogo.loc[manter, colunas].reset_index(drop=True)
+    # Texto vazio vira "" (não 0): categoria com str e int não converte para Arrow no st.dataframe
+    texto = [c for c in colunas if c != 'sku']
+    df[texto] = df[texto].fillna("").astype(str)
+    cod = kit_index.vocab.get_indexer(df['sku'].astype(str)).astype(np.int32)
+    # SKU categórico com o vocabulário do índice: catálogo, kits e relatórios compartilham as mesmas categorias
+    df['sku'] = kit_index.categorias(cod)
+    if st_col:
+        # Status normalizado, como o filtro acima o leu
+        df[st_col] = status[manter].to_numpy()
+    for col in ['fornecedor'] + [c for c in textos if c is not None]:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df, cod
+
+def carregar_relatorios(empresa):
+    """Baixa/lê os três relatórios da empresa (etapa dominada por rede e openpyxl)."""
+    return {tipo: read_file_from_storage(empresa, tipo) for tipo in ("FULL", "EXT", "FISICO")}
+
 def calcular_reposicao(empresa, dias_cobertura, crescimento=0, lead_time=0):
-    # 1. CARGA DE DADOS
-    df_full_raw = read_file_from_storage(empresa, "FULL")
-    df_ext_raw = read_file_from_storage(empresa, "EXT")
-    df_fisico_raw = read_file_from_storage(empresa, "FISICO")
-    dados_cat = st.session_state.get('catalogo_dados')
+    dados_cat = _dados_catalogo()
     if not dados_cat: return None
-    df_catalogo = dados_cat['catalogo'].copy()
-    df_kits = dados_cat['kits'].copy()
-    
-    fator = (1 + (crescimento/100))
-    prazo_total = dias_cobertura + lead_time
+    return _calcular_empresa(preparar_catalogo(dados_cat), carregar_relatorios(empresa),
+                             dias_cobertura, crescimento, lead_time)
+
+def preparar_bases_empresas(empresas, max_workers=None):
+    """
+    Etapa independente dos parâmetros para várias empresas: catálogo/kits preparados
+    uma única vez e a leitura dos relatórios em paralelo. Sem empresas devolve {}.
+    """
+    if not empresas: return {}
+    with perf.etapa("catalogo") as m:
+        dados_cat = _dados_catalogo()
+        if not dados_cat: return None
+        prep = preparar_catalogo(dados_cat)
+        m.saida(prep['catalogo'])
+
+    # Propaga o contexto do Streamlit para as threads (st.error/st.secrets dentro do storage)
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=max_workers or len(empresas),
+                            initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)) as pool:
+        relatorios = dict(zip(empresas, pool.map(perf.no_contexto(carregar_relatorios), empresas)))
+
+    bases = {}
+    for emp in empresas:
+        with perf.empresa(emp):
+            bases[emp] = preparar_base(prep, relatorios[emp])
+    return bases
+
+def aplicar_parametros_empresas(bases, dias_cobertura, crescimento=0, lead_time=0, fatores_demanda=None,
+                                nivel_servico=0, desvio_lead=0, desvios_demanda=None):
+    """
+    Etapa de parâmetros para todas as empresas. Retorna o frame longo indexado por (Empresa, SKU).
+    `fatores_demanda` / `desvios_demanda`: {empresa: vetor} da previsão e do histórico (opcionais).
+    """
+    if not bases: return None
+    fatores_demanda = fatores_demanda or {}
+    desvios_demanda = desvios_demanda or {}
+    frames = {}
+    for emp, base in bases.items():
+        with perf.empresa(emp):
+            frames[emp] = aplicar_parametros(base, dias_cobertura, crescimento, lead_time,
+                                             fator_demanda=fatores_demanda.get(emp),
+                                             nivel_servico=nivel_servico, desvio_lead=desvio_lead,
+                                             desvio_demanda=desvios_demanda.get(emp))
+    df_long = pd.concat(frames, names=['Empresa', None]).reset_index(level=0)
+    df_long['Empresa'] = df_long['Empresa'].astype('category')
+    return df_long.set_index(['Empresa', 'SKU'], drop=False)
 
-    # 2. CÁLCULO FULL (ANÚNCIO POR ANÚNCIO - REGRA DAS CAIXINHAS)
-    nec_reposicao_full = pd.DataFrame(columns=['sku', 'v_f_u', 'e_f_u', 'nec_full'])
+def calcular_reposicao_empresas(empresas, dias_cobertura, crescimento=0, lead_time=0, max_workers=None):
+    """
+    Calcula várias empresas de uma vez. Retorna um frame longo indexado por (Empresa, SKU);
+    use separar_empresas() para obter as views por empresa.
+    """
+    bases = preparar_bases_empresas(empresas, max_workers=max_workers)
+    return aplicar_parametros_empresas(bases, dias_cobertura, crescimento, lead_time)
+
+def separar_empresas(df_long):
+    """Views por empresa sobre o frame longo (blocos contíguos via iloc, sem copiar os dados)."""
+    if df_long is None or df_long.empty: return {}
+    cods, nomes = pd.factorize(df_long['Empresa'])
+    bordas = np.flatnonzero(np.diff(cods)) + 1
+    inicios = np.r_[0, bordas]
+    fins = np.r_[bordas, len(cods)]
+    return {nomes[cods[i]]: df_long.iloc[i:f] for i, f in zip(inicios, fins)}
+
+def _calcular_empresa(prep, relatorios, dias_cobertura, crescimento, lead_time):
+    return aplicar_parametros(preparar_base(prep, relatorios), dias_cobertura, crescimento, lead_time)
+
+def preparar_base(prep, relatorios):
+    """
+    Etapa independente dos parâmetros (cacheável): vendas, estoques e custo por SKU,
+    mais as linhas do Full por anúncio, que a etapa de parâmetros precisa para a falta.
+    """
+    with perf.etapa("explode", entrada=relatorios) as m:
+        mapas = explodir_relatorios(prep, relatorios)
+        m.saida(int(np.count_nonzero(np.any([v != 0 for v in mapas["vetores"].values()], axis=0))))
+    with perf.etapa("merge", entrada=prep['base_catalogo'][0]) as m:
+        base = juntar_catalogo(prep, mapas)
+        m.saida(base["df_base"])
+    return base
+
+def explodir_relatorios(prep, relatorios):
+    """
+    Converte as colunas numéricas e explode os kits de cada relatório. Os totais por SKU
+    componente saem em vetores densos alinhados ao vocabulário do KitIndex (posição = código).
+    """
+    # 1. CARGA DE DADOS
+    df_full_raw = relatorios["FULL"]
+    df_ext_raw = relatorios["EXT"]
+    df_fisico_raw = relatorios["FISICO"]
+    kit_index = prep['kit_index']
+    n = len(kit_index.vocab)
+    zeros = np.zeros(n)
+    vetores = {'v_f_u': zeros, 'e_f_u': zeros, 'v_s_u': zeros, 'est_f_u': zeros, 'c_u': zeros}
+
+    # 2. FULL (ANÚNCIO POR ANÚNCIO - REGRA DAS CAIXINHAS)
+    linhas_full, codigos_full = None, None
     if df_full_raw is not None and not df_full_raw.empty:
-        v_col = flex_col(df_full_raw, ['venda_60', 'venda_61', 'venda_qtd', 'venda'])
-        e_col = flex_col(df_full_raw, ['disponivel', 'estoque_atual', 'estoque_total', 'estoque'])
+        v_col = flex_col(df_full_raw, COLUNAS_RELATORIO["FULL"]["venda"])
+        e_col = flex_col(df_full_raw, COLUNAS_RELATORIO["FULL"]["estoque"])
         
         if v_col and e_col:
-            df_full_raw['v_un'] = df_full_raw[v_col].apply(utils.br_to_float).fillna(0)
-            df_full_raw['e_un'] = df_full_raw[e_col].apply(utils.br_to_float).fillna(0)
-            
-            # Necessidade individual do anúncio
-            v_dia = (df_full_raw['v_un'] * fator) / 60
-            df_full_raw['falta'] = ((v_dia * prazo_total) - df_full_raw['e_un']).clip(lower=0)
-            
-            # Explosão de Kits no Full
-            df_f_exp = pd.merge(df_full_raw, df_kits, left_on='sku', right_on='sku_kit', how='left')
-            df_f_exp['sku_comp'] = df_f_exp['sku_componente'].fillna(df_f_exp['sku'])
-            df_f_exp['qty_comp'] = df_f_exp['quantidade_componente'].fillna(1)
-            
-            df_f_exp['v_comp'] = df_f_exp['v_un'] * df_f_exp['qty_comp']
-            df_f_exp['nec_comp'] = df_f_exp['falta'] * df_f_exp['qty_comp']
-            
-            nec_reposicao_full = df_f_exp.groupby('sku_comp').agg({
-                'v_comp': 'sum', 'e_un': 'sum', 'nec_comp': 'sum'
-            }).reset_index().rename(columns={'sku_comp': 'sku', 'v_comp': 'v_f_u', 'e_un': 'e_f_u', 'nec_comp': 'nec_full'})
-
-    # 3. CÁLCULO SHOPEE (EXPLOSÃO DE KITS)
-    v_shopee_map = pd.DataFrame(columns=['sku', 'v_s_u', 'dem_s'])
+            linhas_full = pd.DataFrame({
+                'v_un': utils.compactar(utils.br_series_to_float(df_full_raw[v_col]).fillna(0)),
+                'e_un': utils.compactar(utils.br_series_to_float(df_full_raw[e_col]).fillna(0)),
+            })
+            # Códigos guardados para a explosão da falta (que depende dos parâmetros)
+            codigos_full = kit_index.codigos(df_full_raw['sku'])[0].astype(np.int32)
+            vetores.update(kit_index.vetores(
+                por_qtd={'v_f_u': linhas_full['v_un']},
+                por_linha={'e_f_u': linhas_full['e_un']},
+                cod=codigos_full
+            ))
+
+    # 3. SHOPEE (EXPLOSÃO DE KITS)
     if df_ext_raw is not None and not df_ext_raw.empty:
-        v_col_s = flex_col(df_ext_raw, ['venda', 'qtde', 'qtd', 'quantidade'])
+        v_col_s = flex_col(df_ext_raw, COLUNAS_RELATORIO["EXT"]["venda"])
         if v_col_s:
-            df_ext_raw['v_un_s'] = df_ext_raw[v_col_s].apply(utils.br_to_float).fillna(0)
-            df_s_exp = pd.merge(df_ext_raw, df_kits, left_on='sku', right_on='sku_kit', how='left')
-            df_s_exp['sku_comp'] = df_s_exp['sku_componente'].fillna(df_s_exp['sku'])
-            df_s_exp['qty_comp'] = df_s_exp['quantidade_componente'].fillna(1)
-            
-            df_s_exp['v_comp_s'] = df_s_exp['v_un_s'] * df_s_exp['qty_comp']
-            v_dia_s = (df_s_exp['v_comp_s'] * fator) / 60
-            df_s_exp['dem_s_calc'] = v_dia_s * prazo_total
-            
-            v_shopee_map = df_s_exp.groupby('sku_comp').agg({
-                'v_comp_s': 'sum', 'dem_s_calc': 'sum'
-            }).reset_index().rename(columns={'sku_comp': 'sku', 'v_comp_s': 'v_s_u', 'dem_s_calc': 'dem_s'})
-
-    # 4. ESTOQUE FÍSICO E CUSTO
-    est_map = pd.DataFrame(columns=['sku', 'est_f_u', 'c_u'])
+            v_un_s = utils.br_series_to_float(df_ext_raw[v_col_s]).fillna(0)
+            vetores.update(kit_index.vetores(df_ext_raw['sku'], por_qtd={'v_s_u': v_un_s}))
+
+    # 4. ESTOQUE FÍSICO E CUSTO (soma do saldo e maior custo por SKU)
     if df_fisico_raw is not None and not df_fisico_raw.empty:
-        e_col_f = flex_col(df_fisico_raw, ['estoque', 'saldo', 'fisico', 'atual'])
-        p_col_f = flex_col(df_fisico_raw, ['preco', 'custo', 'compra', 'valor_unitario'])
+        e_col_f = flex_col(df_fisico_raw, COLUNAS_RELATORIO["FISICO"]["estoque"])
+        p_col_f = flex_col(df_fisico_raw, COLUNAS_RELATORIO["FISICO"]["preco"])
         if e_col_f and p_col_f:
-            df_fisico_raw['est_f_u'] = df_fisico_raw[e_col_f].apply(utils.br_to_float).fillna(0)
-            df_fisico_raw['c_u'] = df_fisico_raw[p_col_f].apply(utils.br_to_float).fillna(0)
-            est_map = df_fisico_raw.groupby('sku').agg({'est_f_u': 'sum', 'c_u': 'max'}).reset_index()
-
-    # 5. MERGE FINAL E CÁLCULO DE COMPRA
-    df_res = pd.merge(df_catalogo, nec_reposicao_full, on='sku', how='left')
-    df_res = pd.merge(df_res, v_shopee_map, on='sku', how='left')
-    df_res = pd.merge(df_res, est_map, on='sku', how='left')
-    df_res.fillna(0, inplace=True)
-
-    # Cálculo da Compra Sugerida (Falta no Full + Demanda Shopee - Saldo Físico)
-    df_res['Compra sugerida'] = (df_res['nec_full'] + df_res['dem_s'] - df_res['est_f_u']).clip(lower=0).apply(np.ceil).astype(int)
+            cod = kit_index.codigos(df_fisico_raw['sku'])[0]
+            dentro = cod < n
+            cod = cod[dentro]
+            est = utils.br_series_to_float(df_fisico_raw[e_col_f]).fillna(0).to_numpy()[dentro]
+            custo = utils.br_series_to_float(df_fisico_raw[p_col_f]).fillna(0).to_numpy()[dentro]
+            vetores['est_f_u'] = np.bincount(cod, weights=est, minlength=n)
+            c_u = np.full(n, -np.inf)
+            np.maximum.at(c_u, cod, custo)
+            vetores['c_u'] = np.where(np.isneginf(c_u), 0, c_u)
+
+    return {"vetores": vetores, "linhas_full": linhas_full, "codigos_full": codigos_full}
+
+def juntar_catalogo(prep, mapas):
+    """Leva os vetores por SKU para as linhas do catálogo (já filtradas) por indexação dos códigos."""
+    df_cat, cod = prep['base_catalogo']
+
+    # 5. JUNÇÃO COM O CATÁLOGO (equivale ao merge left + fillna(0), sem hash de strings)
+    df_res = df_cat.copy()
+    for col, v in mapas["vetores"].items():
+        df_res[col] = utils.compactar(v[cod])
+
+    return {
+        "df_base": df_res,
+        "cod_base": cod,
+        "linhas_full": mapas["linhas_full"],
+        "codigos_full": mapas["codigos_full"],
+        "kit_index": prep['kit_index'],
+    }
+
+def _por_codigo(vetor, cod, padrao=1.0):
+    """vetor[cod], com `padrao` para códigos fora do vetor (SKU fora do vocabulário)."""
+    out = np.full(len(cod), padrao, dtype=float)
+    dentro = cod < len(vetor)
+    out[dentro] = vetor[cod[dentro]]
+    return out
+
+def estoque_seguranca(demanda_dia, prazo, nivel_servico, desvio_lead=0, desvio_hist=None):
+    """
+    Estoque de segurança por SKU: z · sqrt(P·σd² + d²·σL²), com z do nível de serviço,
+    P = prazo (cobertura + lead time) e σL = desvio do lead time em dias. A variância diária
+    σd² é a de Poisson (= d) somada à variação da taxa no histórico (`desvio_hist`, se houver).
+    Nível de serviço 0 desliga (zeros).
+    """
+    if not nivel_servico or nivel_servico <= 0:
+        return np.zeros(len(demanda_dia))
+    z = NormalDist().inv_cdf(nivel_servico)
+    variancia = demanda_dia + (0 if desvio_hist is None else desvio_hist ** 2)
+    return z * np.sqrt(prazo * variancia + (demanda_dia * desvio_lead) ** 2)
+
+@perf.medido("final", entrada=lambda base, *a, **k: base["df_base"])
+def aplicar_parametros(base, dias_cobertura, crescimento=0, lead_time=0, fator_demanda=None,
+                       nivel_servico=0, desvio_lead=0, desvio_demanda=None):
+    """
+    Etapa barata que depende de Dias Cobertura / Crescimento / Lead Time (tudo vetorizado).
+    `fator_demanda` (opcional, ver previsao.fatores_empresa): {"FULL": vetor, "EXT": vetor} por código
+    do KitIndex que multiplica a venda diária da regra de 60 dias; sem ele o resultado é o da regra atual.
+    `nivel_servico` / `desvio_lead` / `desvio_demanda` (por código, ver previsao.desvios_empresa):
+    estoque de segurança somado à compra; nível 0 (padrão) não muda o resultado.
+    """
+    df_res = base["df_base"].copy()
+    fator = (1 + (crescimento/100))
+    prazo_total = dias_cobertura + lead_time
+
+    # Falta no Full por anúncio, explodida para os componentes
+    df_res['nec_full'] = 0.0
+    dem_dia = np.zeros(len(df_res))
+    linhas = base["linhas_full"]
+    if linhas is not None:
+        v_dia = (linhas['v_un'].to_numpy(dtype=float) * fator) / 60
+        if fator_demanda and fator_demanda.get("FULL") is not None:
+            v_dia = v_dia * _por_codigo(fator_demanda["FULL"], base["codigos_full"])
+        falta = np.clip(v_dia * prazo_total - linhas['e_un'].to_numpy(dtype=float), 0, None)
+        exp = base["kit_index"].vetores(por_qtd={'nec_full': falta, 'dem_dia': v_dia}, cod=base["codigos_full"])
+        df_res['nec_full'] = exp['nec_full'][base["cod_base"]]
+        dem_dia = exp['dem_dia'][base["cod_base"]]
+
+    # Demanda Shopee é linear nas vendas já explodidas
+    dem_s_dia = (df_res['v_s_u'].to_numpy(dtype=float) * fator) / 60
+    if fator_demanda and fator_demanda.get("EXT") is not None:
+        # Shopee já vem explodida: o fator é o da série explodida, no nível do componente
+        dem_s_dia = dem_s_dia * _por_codigo(fator_demanda["EXT"], base["cod_base"])
+    df_res['dem_s'] = dem_s_dia * prazo_total
+
+    # Estoque de segurança sobre a demanda diária total do componente (Full explodido + Shopee)
+    with perf.etapa("seguranca", entrada=len(df_res)):
+        desvio = None if desvio_demanda is None else _por_codigo(desvio_demanda, base["cod_base"], padrao=0.0)
+        seguranca = estoque_seguranca(dem_dia + dem_s_dia, prazo_total, nivel_servico, desvio_lead, desvio)
+    df_res['Estoque de segurança'] = np.ceil(seguranca.round(6)).astype(np.int32)
+
+    # Cálculo da Compra Sugerida (Falta no Full + Demanda Shopee + Segurança - Saldo Físico)
+    df_res['Compra sugerida'] = np.ceil((df_res['nec_full'] + df_res['dem_s'] + seguranca - df_res['est_f_u']).clip(lower=0)).astype(np.int32)
     
     df_res['Valor total da compra sugerida'] = df_res['Compra sugerida'] * df_res['c_u']
     df_res['Valor Estoque Full'] = df_res['e_f_u'] * df_res['c_u']
     df_res['Valor Estoque Fisico'] = df_res['est_f_u'] * df_res['c_u']
 
-    # 6. FILTRO DE STATUS (FIX PARA O ATTRIBUTEERROR)
-    st_col = flex_col(df_res, ['status_reposicao', 'status_repor'])
-    if st_col and st_col in df_res.columns:
-        # Garantimos que tratamos como string antes de filtrar
-        df_res[st_col] = df_res[st_col].astype(str).str.lower().str.strip()
-        df_res = df_res[df_res[st_col] != 'nao_repor']
-    
-    if not df_kits.empty:
-        df_res = df_res[~df_res['sku'].isin(df_kits['sku_kit'].unique())]
-
-    return df_res.rename(columns={
+    df_res.rename(columns={
         'sku': 'SKU', 'fornecedor': 'Fornecedor', 'c_u': 'Preço de custo',
         'v_f_u': 'Vendas full', 'v_s_u': 'vendas Shopee',
         'e_f_u': 'Estoque full (Un)', 'est_f_u': 'Estoque fisico (Un)'
-    })
\ No newline at end of file
+    }, inplace=True)
+    return df_res
@@ -0,0 +1,57 @@
+import datetime as dt
+import numpy as np
+import pandas as pd
+from src import orders_db
+
+SEM_FORNECEDOR = "SEM FORNECEDOR"
+
+def _itens_a_comprar(df):
+    """Linhas com Compra sugerida > 0, com fornecedor (texto), quantidade, preço e total por SKU."""
+    sel = df.loc[df['Compra sugerida'] > 0]
+    forn = sel['Fornecedor'].astype(str).str.strip() if 'Fornecedor' in sel.columns else pd.Series("", index=sel.index)
+    # fillna(0) do motor deixa "0" onde o catálogo não tem fornecedor
+    forn = forn.where(~forn.isin(["", "0", "nan", "None"]), SEM_FORNECEDOR)
+    qtd = sel['Compra sugerida'].to_numpy(dtype=np.int64)
+    preco = sel['Preço de custo'].to_numpy(dtype=float)
+    return pd.DataFrame({
+        'fornecedor': forn.to_numpy(),
+        'sku': sel['SKU'].astype(str).to_numpy(),
+        'qtd': qtd,
+        'valor_unit': preco,
+        'total': np.round(qtd * preco, 2),
+    }).sort_values(['fornecedor', 'sku'], ignore_index=True)
+
+def resumo_por_fornecedor(df):
+    """Prévia das OCs: uma linha por fornecedor com itens, unidades e valor."""
+    itens = _itens_a_comprar(df)
+    return (itens.groupby('fornecedor', sort=True)
+                 .agg(Itens=('sku', 'size'), Unidades=('qtd', 'sum'), Valor=('total', 'sum'))
+                 .reset_index().rename(columns={'fornecedor': 'Fornecedor'}))
+
+def montar_ocs(df, empresa, obs="", data_emissao=None, sequencia=None):
+    """
+    Uma OC por fornecedor a partir da Compra sugerida > 0 do resultado da empresa.
+    Os números são reservados num bloco só. Devolve a lista de pedidos no formato de salvar_pedido.
+    """
+    itens = _itens_a_comprar(df)
+    if itens.empty: return []
+
+    # Fornecedores contíguos (já ordenado): bordas dos blocos e totais por bincount
+    codigos, fornecedores = pd.factorize(itens['fornecedor'])
+    inicios = np.flatnonzero(np.r_[True, np.diff(codigos) != 0])
+    fins = np.r_[inicios[1:], len(itens)]
+    totais = np.round(np.bincount(codigos, weights=itens['total'].to_numpy()), 2)
+
+    ids = orders_db.reservar_numeros_oc(empresa, len(fornecedores), sequencia=sequencia)
+    registros = itens.drop(columns='fornecedor').assign(origem=f"SUGESTAO_{empresa}").to_dict('records')
+    data_emissao = str(data_emissao or dt.date.today())
+    return [{
+        "id": oc_id,
+        "empresa": empresa,
+        "fornecedor": fornecedores[i],
+        "data_emissao": data_emissao,
+        "valor_total": float(totais[i]),
+        "status": "Pendente",
+        "obs": obs,
+        "itens": registros[ini:fim],
+    } for i, (oc_id, ini, fim) in enumerate(zip(ids, inicios, fins))]
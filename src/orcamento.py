@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+from src import config
+from src.ocs_lote import SEM_FORNECEDOR
+
+# Otimização da Compra sugerida sob orçamento: cada SKU vira uma sequência de lotes (múltiplos
+# do Lote), o valor marginal de todos os lotes é calculado de uma vez e a escolha é gulosa na
+# ordem do valor, respeitando o orçamento global e o de cada fornecedor.
+
+OBJETIVOS = {
+    "rupturas": "Evitar rupturas (unidades em falta esperadas)",
+    "cobertura": "Equalizar dias de cobertura",
+}
+
+def _cdf_normal(z):
+    """Φ(z) vetorizado (Abramowitz-Stegun 7.1.26, erro < 1.5e-7), sem scipy."""
+    x = np.abs(z) / np.sqrt(2)
+    t = 1 / (1 + 0.3275911 * x)
+    poli = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1 - poli * np.exp(-x * x)
+    return 0.5 * (1 + np.sign(z) * erf)
+
+def _falta_esperada(estoque, media, desvio):
+    """E[(D - estoque)+] com D ~ Normal(media, desvio): desvio · L(z), L = função de perda normal."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (estoque - media) / desvio
+        perda = np.exp(-z * z / 2) / np.sqrt(2 * np.pi) - z * (1 - _cdf_normal(z))
+    return np.where(desvio > 0, desvio * perda, np.clip(media - estoque, 0, None))
+
+def _fornecedores(df):
+    forn = df['Fornecedor'].astype(str).str.strip() if 'Fornecedor' in df.columns else pd.Series("", index=df.index)
+    # fillna(0) do motor deixa "0" onde o catálogo não tem fornecedor
+    return forn.where(~forn.isin(["", "0", "nan", "None"]), SEM_FORNECEDOR)
+
+def _itens(df, prazo):
+    """Colunas do resultado da Análise que o otimizador usa, como arrays."""
+    forn = _fornecedores(df)
+    demanda = (df['Vendas full'].to_numpy(dtype=float) + df['vendas Shopee'].to_numpy(dtype=float)) / 60
+    return {
+        "sku": df['SKU'].astype(str).to_numpy(),
+        "fornecedor": forn.to_numpy(),
+        "preco": df['Preço de custo'].to_numpy(dtype=float),
+        "sugerida": df['Compra sugerida'].to_numpy(dtype=np.int64),
+        "estoque": np.clip(df['Estoque full (Un)'].to_numpy(dtype=float) + df['Estoque fisico (Un)'].to_numpy(dtype=float), 0, None),
+        "demanda": demanda,
+        "prazo": float(prazo),
+    }
+
+def _lotes(it, lote):
+    """
+    Todos os lotes candidatos, vetorizado: SKU, início (un. já compradas antes do lote) e tamanho.
+    Cada SKU vai até a Compra sugerida arredondada para cima no Lote; com muitos lotes, o passo
+    cresce (múltiplo do Lote) para no máximo config.ORCAMENTO_MAX_PASSOS por SKU.
+    """
+    sug = it["sugerida"]
+    lote = np.maximum(np.asarray(lote, dtype=np.int64) * np.ones(len(sug), dtype=np.int64), 1)
+    teto = -(-sug // lote) * lote
+    passo = lote * np.maximum(-(-teto // (lote * config.ORCAMENTO_MAX_PASSOS)), 1)
+    n_lotes = np.where(it["preco"] > 0, -(-teto // passo), 0)
+    idx = np.repeat(np.arange(len(sug)), n_lotes)
+    k = np.arange(len(idx)) - np.repeat(np.cumsum(n_lotes) - n_lotes, n_lotes)
+    inicio = k * passo[idx]
+    tamanho = np.minimum(passo[idx], teto[idx] - inicio)
+    return idx, k, inicio, tamanho
+
+def _valor(it, idx, inicio, tamanho, objetivo):
+    """Prioridade de cada lote (maior primeiro); decrescente dentro do SKU nos dois objetivos."""
+    estoque, d = it["estoque"][idx], it["demanda"][idx]
+    if objetivo == "cobertura":
+        # Menor cobertura atual primeiro (enche por nível): -dias de cobertura antes do lote
+        with np.errstate(divide="ignore"):
+            return np.where(d > 0, -(estoque + inicio) / np.where(d > 0, d, 1), -np.inf)
+    media = d * it["prazo"]
+    desvio = np.sqrt(media)  # Poisson
+    evitada = _falta_esperada(estoque + inicio, media, desvio) - _falta_esperada(estoque + inicio + tamanho, media, desvio)
+    return evitada / (tamanho * it["preco"][idx])
+
+def _escolher(custo, fornecedor, pares, orcamento, por_fornecedor, bloqueado):
+    """
+    Escolha gulosa na ordem dada. Se um lote não cabe, os lotes seguintes do mesmo SKU também
+    ficam de fora (a sequência do SKU não pula lote); lotes menores de outros SKUs ainda entram.
+    """
+    restante = np.inf if orcamento is None else float(orcamento)
+    restante_forn = {f: float(v) for f, v in (por_fornecedor or {}).items()}
+    escolhido = np.zeros(len(custo), dtype=bool)
+    sku_parado = set()
+    for i, sku in pares:
+        if bloqueado[i] or sku in sku_parado: continue
+        c, f = custo[i], fornecedor[i]
+        if c > restante or c > restante_forn.get(f, np.inf):
+            sku_parado.add(sku)
+            continue
+        escolhido[i] = True
+        restante -= c
+        if f in restante_forn: restante_forn[f] -= c
+    return escolhido
+
+def otimizar(df, orcamento=None, por_fornecedor=None, minimo_fornecedor=None, lote=1,
+             objetivo="rupturas", prazo=60):
+    """
+    Quantidades por SKU (até a Compra sugerida, em múltiplos do Lote) que cabem no orçamento
+    global e/ou por fornecedor, priorizando o objetivo:
+    - "rupturas": unidades em falta esperadas no prazo evitadas por real gasto;
+    - "cobertura": sobe primeiro os SKUs com menos dias de cobertura.
+    Fornecedor que fica abaixo do pedido mínimo (`minimo_fornecedor`: valor ou {fornecedor: valor})
+    sai da compra e o orçamento dele volta para os outros. `lote`: inteiro ou array por SKU.
+    SKUs sem Preço de custo não entram na disputa: ficam com a Compra sugerida inteira
+    (listados em attrs["skus_sem_custo"]).
+    Devolve o frame do resultado com 'Compra sugerida' otimizada (pronto para ocs_lote e carrinho).
+    """
+    it = _itens(df, prazo)
+    idx, k, inicio, tamanho = _lotes(it, lote)
+    custo = tamanho * it["preco"][idx]
+    prioridade = _valor(it, idx, inicio, tamanho, objetivo)
+    # Maior prioridade primeiro; empate: lote anterior do SKU primeiro e depois o mais barato
+    ordem = np.lexsort((custo, k, -prioridade))
+    ordem = ordem[np.isfinite(prioridade[ordem])]
+    pares = list(zip(ordem.tolist(), idx[ordem].tolist()))
+    fornecedor_lote = it["fornecedor"][idx]
+
+    def minimo(f):
+        return minimo_fornecedor.get(f, 0) if isinstance(minimo_fornecedor, dict) else (minimo_fornecedor or 0)
+
+    fora = set()
+    for _ in range(config.ORCAMENTO_MAX_RODADAS):
+        escolhido = _escolher(custo, fornecedor_lote, pares, orcamento, por_fornecedor,
+                              np.isin(fornecedor_lote, list(fora)))
+        totais = pd.Series(custo[escolhido]).groupby(fornecedor_lote[escolhido]).sum()
+        abaixo = {f for f, v in totais.items() if v < minimo(f)}
+        if not abaixo: break
+        fora |= abaixo
+    else:
+        # Rodadas esgotadas: quem ainda está abaixo do mínimo sai sem redistribuir o orçamento
+        # (tirar um fornecedor não diminui o total dos outros, então ninguém volta a ficar abaixo)
+        escolhido &= ~np.isin(fornecedor_lote, list(fora))
+
+    qtd = np.bincount(idx[escolhido], weights=tamanho[escolhido], minlength=len(it["sku"])).astype(np.int64)
+    # Sem custo não gasta orçamento: fica com a Compra sugerida inteira (fora só com o fornecedor)
+    sem_custo = (it["preco"] <= 0) & (it["sugerida"] > 0) & ~np.isin(it["fornecedor"], list(fora))
+    qtd[sem_custo] = it["sugerida"][sem_custo]
+    d = it["demanda"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cobertura_antes = np.where(d > 0, it["estoque"] / d, np.nan)
+        cobertura_depois = np.where(d > 0, (it["estoque"] + qtd) / d, np.nan)
+    out = df.copy()
+    out['Compra sugerida (original)'] = it["sugerida"]
+    out['Compra sugerida'] = qtd.astype(np.int32)
+    out['Valor total da compra sugerida'] = qtd * it["preco"]
+    out['Cobertura antes (dias)'] = np.round(cobertura_antes, 1)
+    out['Cobertura depois (dias)'] = np.round(cobertura_depois, 1)
+    out.attrs["fornecedores_abaixo_minimo"] = sorted(fora)
+    out.attrs["skus_sem_custo"] = it["sku"][sem_custo].tolist()
+    return out
+
+def resumo(otimizado):
+    """Por fornecedor: valor sugerido original, valor escolhido e SKUs atendidos."""
+    base = pd.DataFrame({
+        'Fornecedor': _fornecedores(otimizado),
+        'Original': otimizado['Compra sugerida (original)'] * otimizado['Preço de custo'],
+        'Escolhido': otimizado['Valor total da compra sugerida'],
+        'SKUs': (otimizado['Compra sugerida'] > 0).astype(int),
+    })
+    return base.groupby('Fornecedor', as_index=False).sum().sort_values('Escolhido', ascending=False, ignore_index=True)
+
+def para_carrinho(otimizado, empresa):
+    """Frame (sku, qtd, valor_unit, origem) para carrinho.adicionar_df."""
+    sel = otimizado.loc[otimizado['Compra sugerida'] > 0]
+    return pd.DataFrame({
+        "sku": sel['SKU'].astype(str).to_numpy(),
+        "qtd": sel['Compra sugerida'].to_numpy(dtype=np.int64),
+        "valor_unit": sel['Preço de custo'].to_numpy(dtype=float),
+        "origem": f"ORCAMENTO_{empresa}",
+    })
@@ -1,94 +1,235 @@
 import streamlit as st
-from supabase import create_client
 import pandas as pd
 import datetime as dt
+import threading
+import time
+from src import config, supabase_pool
+
+def _credenciais():
+    return st.secrets["supabase"]["url"], st.secrets["supabase"]["key"]
 
 def init_supabase():
+    """Cliente do pool compartilhado com o storage (sem novo handshake a cada operação)."""
     try:
-        url = st.secrets["supabase"]["url"]
-        key = st.secrets["supabase"]["key"]
-        return create_client(url, key)
+        return supabase_pool.obter_cliente(*_credenciais())
     except:
         return None
 
-def listar_pedidos():
-    """Baixa todos os pedidos e trata nulos para evitar quebras."""
+def _executar(operacao, repetir=True):
+    """Executa operacao(client) com retry/reconexão do pool (repetir=False: uma tentativa só)."""
+    return supabase_pool.executar(_credenciais(), operacao, repetir=repetir)
+
+# Colunas da listagem (o JSON de itens só é buscado para a OC selecionada)
+COLUNAS_RESUMO = "id,data_emissao,empresa,fornecedor,valor_total,status,obs"
+COLUNAS_LISTAGEM = ["ID", "Data", "Empresa", "Fornecedor", "Valor", "Status", "Obs"]
+
+# Cache curto das consultas (chave -> (instante, resultado)); salvar/status/excluir limpam tudo
+_cache = {}
+_cache_lock = threading.Lock()
+
+def _cacheado(chave, consulta):
+    agora = time.time()
+    with _cache_lock:
+        if chave in _cache and agora - _cache[chave][0] < config.PEDIDOS_CACHE_TTL:
+            return _cache[chave][1]
+    resultado = consulta()
+    with _cache_lock:
+        for k in [k for k, (t, _) in _cache.items() if agora - t >= config.PEDIDOS_CACHE_TTL]:
+            del _cache[k]
+        _cache[chave] = (agora, resultado)
+    return resultado
+
+def invalidar_cache():
+    with _cache_lock:
+        _cache.clear()
+
+def listar_pedidos(empresa=None, status=None, fornecedor=None, data_inicio=None, data_fim=None,
+                   pagina=0, por_pagina=50):
+    """
+    Uma página do resumo dos pedidos (sem os itens), mais recentes primeiro.
+    Filtros aplicados no banco; `status` aceita um valor ou uma lista, `fornecedor` busca por trecho.
+    Retorna (DataFrame com COLUNAS_LISTAGEM, total de pedidos que atendem aos filtros).
+    """
     supabase = init_supabase()
-    if not supabase: return pd.DataFrame()
-    
+    if not supabase: return pd.DataFrame(columns=COLUNAS_LISTAGEM), 0
+
+    if isinstance(status, (list, tuple)): status = tuple(status)
+    chave = ("listar", empresa, status, fornecedor, str(data_inicio or ""), str(data_fim or ""), pagina, por_pagina)
+
+    def consulta(c):
+        q = c.table("pedidos").select(COLUNAS_RESUMO, count="exact")
+        if empresa: q = q.eq("empresa", empresa)
+        if isinstance(status, tuple): q = q.in_("status", list(status))
+        elif status: q = q.eq("status", status)
+        if fornecedor: q = q.ilike("fornecedor", f"%{fornecedor}%")
+        if data_inicio: q = q.gte("data_emissao", str(data_inicio))
+        if data_fim: q = q.lte("data_emissao", str(data_fim))
+        inicio = pagina * por_pagina
+        return q.order("data_emissao", desc=True).order("id", desc=True).range(inicio, inicio + por_pagina - 1).execute()
+
     try:
-        # Busca dados brutos
-        response = supabase.table("pedidos").select("*").execute()
-        dados = response.data
-        
-        if not dados:
-            return pd.DataFrame(columns=["ID", "Data", "Empresa", "Fornecedor", "Valor", "Status", "Obs", "Dados_Completos"])
-            
-        lista_formatada = []
-        for p in dados:
-            # Tratamento de Nulos (Segurança)
-            itens_seguros = p.get("itens")
-            if not isinstance(itens_seguros, list):
-                itens_seguros = []
-
-            lista_formatada.append({
-                "ID": str(p.get("id", "")),
-                "Data": str(p.get("data_emissao", "")),
-                "Empresa": str(p.get("empresa", "")),
-                "Fornecedor": str(p.get("fornecedor", "")),
-                "Valor": float(p.get("valor_total", 0.0)),
-                "Status": str(p.get("status", "Pendente")),
-                "Obs": str(p.get("obs") or ""),
-                "Dados_Completos": itens_seguros # Já entrega a lista pronta
-            })
-            
-        return pd.DataFrame(lista_formatada)
-        
+        response = _cacheado(chave, lambda: _executar(consulta))
+        df = pd.DataFrame(response.data or [], columns=COLUNAS_RESUMO.split(","))
+        # Tratamento de Nulos (Segurança)
+        df = pd.DataFrame({
+            "ID": df["id"].fillna("").astype(str),
+            "Data": df["data_emissao"].fillna("").astype(str),
+            "Empresa": df["empresa"].fillna("").astype(str),
+            "Fornecedor": df["fornecedor"].fillna("").astype(str),
+            "Valor": pd.to_numeric(df["valor_total"], errors="coerce").fillna(0.0),
+            "Status": df["status"].fillna("Pendente").astype(str),
+            "Obs": df["obs"].fillna("").astype(str),
+        })
+        return df, response.count or 0
     except Exception as e:
         st.error(f"Erro ao listar pedidos: {e}")
-        return pd.DataFrame()
+        return pd.DataFrame(columns=COLUNAS_LISTAGEM), 0
+
+def obter_itens(oc_id):
+    """Itens (lista de dicts) de uma OC só; lista vazia se não houver."""
+    supabase = init_supabase()
+    if not supabase or not oc_id: return []
+    try:
+        response = _cacheado(("itens", oc_id), lambda: _executar(
+            lambda c: c.table("pedidos").select("itens").eq("id", oc_id).limit(1).execute()))
+        itens = response.data[0].get("itens") if response.data else None
+        return itens if isinstance(itens, list) else []
+    except Exception as e:
+        st.error(f"Erro ao carregar itens: {e}")
+        return []
+
+def _prefixo(empresa):
+    return "ALV" if empresa == "ALIVVIA" else "JCA"
+
+class SequenciaRPC:
+    """
+    Contador no banco (sql/oc_sequencia.sql): um UPDATE atômico por reserva, sem varrer pedidos.
+    `executar`: como rodar operacao(client) (padrão: o pool do Supabase, sem retry: a reserva
+    não é idempotente e repetir após uma resposta perdida pularia um bloco de números).
+    """
+
+    def __init__(self, executar=None):
+        self._executar = executar or (lambda operacao: _executar(operacao, repetir=False))
+
+    def reservar(self, prefixo, ano, quantidade=1):
+        """Reserva `quantidade` números seguidos e devolve o último do bloco."""
+        res = self._executar(lambda c: c.rpc("reservar_numeros_oc", {
+            "p_prefixo": prefixo, "p_ano": ano, "p_quantidade": quantidade}).execute())
+        return int(res.data)
+
+class SequenciaLocal:
+    """Mesma semântica do RPC em memória (benchmarks/testes e ambientes sem banco)."""
+
+    def __init__(self, iniciais=None):
+        self._ultimos = dict(iniciais or {})
+        self._lock = threading.Lock()
+
+    def reservar(self, prefixo, ano, quantidade=1):
+        with self._lock:
+            ultimo = self._ultimos.get((prefixo, ano), 0) + quantidade
+            self._ultimos[(prefixo, ano)] = ultimo
+            return ultimo
+
+_sequencia = SequenciaRPC()
+
+def reservar_numeros_oc(empresa, quantidade=1, sequencia=None, ano=None):
+    """
+    Reserva um bloco de números de OC da empresa no ano (O(1), sem repetição entre
+    sessões/processos) e devolve os IDs na ordem. Usado por gerar_numero_oc e pela geração em lote.
+    """
+    if quantidade < 1: return []
+    prefixo = _prefixo(empresa)
+    ano = ano or dt.date.today().year
+    ultimo = (sequencia or _sequencia).reservar(prefixo, ano, quantidade)
+    return [f"OC-{prefixo}-{ano}-{n:03d}" for n in range(ultimo - quantidade + 1, ultimo + 1)]
+
+def _numero_por_contagem(prefixo, ano):
+    # Método antigo (conta as OCs do ano, sujeito a número repetido): só com config.OC_NUMERACAO_POR_CONTAGEM
+    res = _executar(lambda c: c.table("pedidos").select("id", count="exact").ilike("id", f"OC-{prefixo}-{ano}-%").execute())
+    return f"OC-{prefixo}-{ano}-{res.count + 1:03d}"
 
 def gerar_numero_oc(empresa):
-    prefixo = "ALV" if empresa == "ALIVVIA" else "JCA"
+    """
+    Próximo número de OC da empresa pelo contador do banco. Se o contador falhar, mostra o erro
+    e devolve None (a OC não deve ser salva); a contagem antiga só vale com o flag de desenvolvimento.
+    """
+    prefixo = _prefixo(empresa)
     ano_atual = dt.date.today().year
     supabase = init_supabase()
-    
+    if not supabase:
+        return f"OC-{prefixo}-{ano_atual}-{int(dt.datetime.now().timestamp())}"
+
     try:
-        if supabase:
-            res = supabase.table("pedidos").select("id", count="exact").ilike("id", f"OC-{prefixo}-{ano_atual}-%").execute()
-            count = res.count + 1
-            return f"OC-{prefixo}-{ano_atual}-{count:03d}"
-    except: pass
-    
-    return f"OC-{prefixo}-{ano_atual}-{int(dt.datetime.now().timestamp())}"
+        return reservar_numeros_oc(empresa)[0]
+    except Exception as e:
+        if config.OC_NUMERACAO_POR_CONTAGEM:
+            st.warning(f"Contador de OCs indisponível ({e}); usando a contagem (OC_NUMERACAO_POR_CONTAGEM=1).")
+            return _numero_por_contagem(prefixo, ano_atual)
+        st.error(f"Contador de OCs indisponível ({e}). Rode sql/oc_sequencia.sql no Supabase; a OC não foi gerada.")
+        return None
+
+def _linha_db(pedido_dict):
+    return {
+        "id": pedido_dict["id"],
+        "empresa": pedido_dict["empresa"],
+        "fornecedor": pedido_dict["fornecedor"],
+        "data_emissao": pedido_dict["data_emissao"],
+        "valor_total": pedido_dict["valor_total"],
+        "status": pedido_dict["status"],
+        "obs": pedido_dict["obs"],
+        "itens": pedido_dict["itens"]
+    }
 
 def salvar_pedido(pedido_dict):
     supabase = init_supabase()
     if not supabase: return False
     
     try:
-        dados_db = {
-            "id": pedido_dict["id"],
-            "empresa": pedido_dict["empresa"],
-            "fornecedor": pedido_dict["fornecedor"],
-            "data_emissao": pedido_dict["data_emissao"],
-            "valor_total": pedido_dict["valor_total"],
-            "status": pedido_dict["status"],
-            "obs": pedido_dict["obs"],
-            "itens": pedido_dict["itens"]
-        }
-        supabase.table("pedidos").upsert(dados_db).execute()
+        dados_db = _linha_db(pedido_dict)
+        _executar(lambda c: c.table("pedidos").upsert(dados_db).execute())
+        invalidar_cache()
         return True
     except Exception as e:
         st.error(f"Erro ao salvar: {e}")
         return False
 
+def salvar_pedidos(pedidos):
+    """
+    Grava vários pedidos num upsert só. Se o lote falhar, tenta um a um para isolar os
+    problemáticos. Retorna {"salvos": [ids], "falhas": {id: mensagem}}.
+    """
+    resultado = {"salvos": [], "falhas": {}}
+    if not pedidos: return resultado
+    if not init_supabase():
+        resultado["falhas"] = {p["id"]: "Sem conexão com o banco" for p in pedidos}
+        return resultado
+
+    linhas = []
+    for p in pedidos:
+        try: linhas.append(_linha_db(p))
+        except KeyError as e: resultado["falhas"][p.get("id", "?")] = f"Campo ausente: {e}"
+
+    try:
+        _executar(lambda c: c.table("pedidos").upsert(linhas).execute())
+        resultado["salvos"] = [l["id"] for l in linhas]
+    except Exception:
+        for linha in linhas:
+            try:
+                _executar(lambda c: c.table("pedidos").upsert(linha).execute())
+                resultado["salvos"].append(linha["id"])
+            except Exception as e:
+                resultado["falhas"][linha["id"]] = str(e)
+    invalidar_cache()
+    return resultado
+
 def atualizar_status(oc_id, novo_status):
     supabase = init_supabase()
     if supabase:
-        supabase.table("pedidos").update({"status": novo_status}).eq("id", oc_id).execute()
+        _executar(lambda c: c.table("pedidos").update({"status": novo_status}).eq("id", oc_id).execute())
+        invalidar_cache()
 
 def excluir_pedido_db(oc_id):
     supabase = init_supabase()
     if supabase:
-        supabase.table("pedidos").delete().eq("id", oc_id).execute()
\ No newline at end of file
+        _executar(lambda c: c.table("pedidos").delete().eq("id", oc_id).execute())
+        invalidar_cache()
\ No newline at end of file
@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import logging
+import threading
+import functools
+import contextvars
+import pandas as pd
+from src import config
+
+# Medição por etapa do motor (tempo, linhas de entrada/saída, delta de memória).
+# As etapas só são registradas dentro de uma execucao() ativa; fora dela (ou com
+# config.PERF_ATIVO desligado) etapa() devolve um objeto nulo e o custo é um ContextVar.get().
+
+_execucao = contextvars.ContextVar("perf_execucao", default=None)
+_empresa = contextvars.ContextVar("perf_empresa", default=None)
+
+log = logging.getLogger("reposicao.perf")
+if not log.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(_handler)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+
+try:
+    _PAGINA = os.sysconf("SC_PAGE_SIZE")
+except (ValueError, OSError, AttributeError):
+    _PAGINA = 4096
+
+def _rss():
+    """Memória residente do processo em bytes (/proc/self/statm); None fora do Linux."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGINA
+    except (OSError, IndexError, ValueError):
+        return None
+
+def linhas(obj):
+    """Linhas de um DataFrame/Series, ou a soma delas num dict (ex: relatórios por tipo)."""
+    if obj is None: return 0
+    if isinstance(obj, int): return obj
+    if isinstance(obj, (pd.DataFrame, pd.Series)): return len(obj)
+    if isinstance(obj, dict): return sum(linhas(v) for v in obj.values() if isinstance(v, (pd.DataFrame, pd.Series, dict)))
+    return None
+
+class _Nulo:
+    """Etapa desligada: todas as operações são no-op."""
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+    def saida(self, obj): return obj
+
+_NULO = _Nulo()
+
+class _Etapa:
+    def __init__(self, execucao, nome, detalhe, empresa, entrada):
+        self.registro = {"etapa": nome, "detalhe": detalhe,
+                         "empresa": empresa if empresa is not None else _empresa.get(),
+                         "linhas_entrada": entrada if entrada is None or isinstance(entrada, int) else linhas(entrada),
+                         "linhas_saida": None}
+        self._execucao = execucao
+
+    def __enter__(self):
+        self._mem = _rss()
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, *exc):
+        self.registro["tempo_s"] = round(time.perf_counter() - self._inicio, 4)
+        mem = _rss()
+        # RSS é do processo todo: com empresas em paralelo o delta inclui as outras threads
+        self.registro["mem_delta_mb"] = round((mem - self._mem) / 2**20, 2) if mem is not None and self._mem is not None else None
+        if tipo is not None:
+            self.registro["erro"] = tipo.__name__
+        self._execucao.adicionar(self.registro)
+        return False
+
+    def saida(self, obj):
+        """Registra as linhas de saída e devolve o próprio objeto (uso: return m.saida(df))."""
+        self.registro["linhas_saida"] = linhas(obj)
+        return obj
+
+class Execucao:
+    """Uma rodada do motor (ex: um rerun da página de Análise) com os registros de todas as etapas."""
+
+    def __init__(self, nome, contexto):
+        self.nome = nome
+        self.contexto = contexto
+        self.registros = []
+        self._lock = threading.Lock()
+        self._inicio = time.perf_counter()
+        self.total_s = None
+
+    def adicionar(self, registro):
+        with self._lock:
+            self.registros.append(registro)
+
+    def tabela(self):
+        colunas = ["empresa", "etapa", "detalhe", "tempo_s", "linhas_entrada", "linhas_saida", "mem_delta_mb"]
+        return pd.DataFrame(self.registros).reindex(columns=colunas)
+
+    def resumo(self):
+        return {"evento": "reposicao_perf", "execucao": self.nome, **self.contexto,
+                "total_s": self.total_s, "etapas": self.registros}
+
+class execucao:
+    """
+    Abre uma rodada de medição no contexto atual. Devolve a Execucao (ou None se desligado)
+    e, ao sair, grava uma linha JSON no log "reposicao.perf".
+    `forcar` liga a medição mesmo com config.PERF_ATIVO desligado (ex: ?debug=1 só nesta sessão).
+    """
+
+    def __init__(self, nome, forcar=False, **contexto):
+        self._exec = Execucao(nome, contexto) if (config.PERF_ATIVO or forcar) else None
+
+    def __enter__(self):
+        if self._exec is not None:
+            self._token = _execucao.set(self._exec)
+        return self._exec
+
+    def __exit__(self, *exc):
+        if self._exec is not None:
+            _execucao.reset(self._token)
+            self._exec.total_s = round(time.perf_counter() - self._exec._inicio, 4)
+            log.info(json.dumps(self._exec.resumo(), ensure_ascii=False, default=str))
+        return False
+
+def etapa(nome, detalhe=None, empresa=None, entrada=None):
+    """Context manager de uma etapa. `entrada`: int ou objeto cujas linhas serão contadas."""
+    run = _execucao.get()
+    if run is None: return _NULO
+    return _Etapa(run, nome, detalhe, empresa, entrada)
+
+def empresa(nome):
+    """Marca a empresa das etapas abertas dentro do bloco."""
+    if _execucao.get() is None: return _NULO
+    return _Empresa(nome)
+
+class _Empresa:
+    def __init__(self, nome):
+        self._nome = nome
+
+    def __enter__(self):
+        self._token = _empresa.set(self._nome)
+        return self
+
+    def __exit__(self, *exc):
+        _empresa.reset(self._token)
+        return False
+
+def medido(nome, entrada=None):
+    """
+    Decorador: mede a função como uma etapa. `entrada(*args, **kwargs)` opcional
+    devolve o objeto de entrada; a saída é o retorno da função.
+    """
+    def decorador(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            run = _execucao.get()
+            if run is None: return func(*args, **kwargs)
+            with _Etapa(run, nome, None, None, entrada(*args, **kwargs) if entrada else None) as m:
+                return m.saida(func(*args, **kwargs))
+        return wrapper
+    return decorador
+
+def no_contexto(func):
+    """Envolve `func` para rodar numa cópia do contexto atual (execução/empresa valem nas threads do pool)."""
+    ctx = contextvars.copy_context()
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return ctx.copy().run(func, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+from src import config, historico
+
+# Histórico diário em matriz (n_skus x n_dias, dia mais recente na última coluna).
+# Cada modelo devolve a previsão diária (n_skus x horizonte), tudo vetorizado entre SKUs.
+
+DIAS_BASE = 60  # a regra atual: venda dos últimos 60 dias / 60
+
+def _matriz(hist):
+    h = np.asarray(hist, dtype=float)
+    if h.ndim != 2:
+        raise ValueError("O histórico precisa ser uma matriz SKUs x dias.")
+    return np.nan_to_num(h)
+
+def media_60(hist, horizonte):
+    """Regra atual: média dos últimos 60 dias, constante no horizonte."""
+    taxa = hist[:, -DIAS_BASE:].mean(axis=1) if hist.shape[1] else np.zeros(len(hist))
+    return np.repeat(taxa[:, None], horizonte, axis=1)
+
+def media_movel(hist, horizonte, janela=28):
+    """Média dos últimos `janela` dias: reage mais rápido que a regra de 60 dias."""
+    taxa = hist[:, -janela:].mean(axis=1) if hist.shape[1] else np.zeros(len(hist))
+    return np.repeat(taxa[:, None], horizonte, axis=1)
+
+def suavizacao(hist, horizonte, alpha=0.1, beta=0.0):
+    """
+    Suavização exponencial (Holt): nível com peso `alpha` e tendência com peso `beta`
+    (beta=0 é a suavização simples). O laço é nos dias; cada passo atualiza todos os SKUs.
+    """
+    n, d = hist.shape
+    if d == 0: return np.zeros((n, horizonte))
+    nivel = hist[:, 0].copy()
+    tendencia = np.zeros(n)
+    for t in range(1, d):
+        anterior = nivel
+        nivel = alpha * hist[:, t] + (1 - alpha) * (nivel + tendencia)
+        tendencia = beta * (nivel - anterior) + (1 - beta) * tendencia
+    passos = np.arange(1, horizonte + 1)
+    return np.clip(nivel[:, None] + tendencia[:, None] * passos[None, :], 0, None)
+
+def sazonal(hist, horizonte, periodo=7, ciclos=4):
+    """
+    Sazonalidade simples: nível = média dos últimos `ciclos` períodos; perfil = peso médio de
+    cada posição do período (ex: dia da semana) nesses ciclos. Previsão = nível x perfil.
+    """
+    n, d = hist.shape
+    ciclos = min(ciclos, d // periodo)
+    if ciclos == 0: return media_movel(hist, horizonte, janela=max(d, 1))
+    recorte = hist[:, d - ciclos * periodo:].reshape(n, ciclos, periodo)
+    nivel = recorte.mean(axis=(1, 2))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        perfil = np.where(nivel[:, None] > 0, recorte.mean(axis=1) / nivel[:, None], 1.0)
+    # O recorte termina no último dia observado: o dia seguinte é a posição 0 do período
+    return nivel[:, None] * perfil[:, np.arange(horizonte) % periodo]
+
+MODELOS = {
+    "media_60": media_60,
+    "media_movel": media_movel,
+    "suavizacao": suavizacao,
+    "sazonal": sazonal,
+}
+NOMES = {
+    "media_60": "Regra 60 dias (padrão)",
+    "media_movel": "Média móvel 28 dias",
+    "suavizacao": "Suavização exponencial",
+    "sazonal": "Sazonal semanal",
+}
+PADRAO = "media_60"
+# Modelos oferecidos sobre o histórico de uploads. historico.serie_diaria espalha o total de cada
+# relatório igualmente pelos dias da janela, então não há padrão semanal a detectar e o sazonal
+# daria uma previsão plana: ele fica só para séries diárias de verdade (backtest/benchmarks).
+MODELOS_UPLOADS = [m for m in MODELOS if m != "sazonal"]
+
+def prever(hist, modelo=PADRAO, horizonte=DIAS_BASE, **params):
+    """Previsão diária (n_skus x horizonte) do modelo escolhido."""
+    if modelo not in MODELOS:
+        raise ValueError(f"Modelo de previsão desconhecido: {modelo}")
+    return MODELOS[modelo](_matriz(hist), horizonte, **params)
+
+def fatores(hist, modelo=PADRAO, horizonte=DIAS_BASE, **params):
+    """
+    Quanto a demanda prevista difere da regra de 60 dias, por SKU (taxa prevista / taxa 60d).
+    É o que o motor multiplica na demanda; SKU sem venda nos 60 dias fica com 1.
+    O modelo padrão dá exatamente 1 para todos.
+    """
+    h = _matriz(hist)
+    if modelo == PADRAO: return np.ones(len(h))
+    base = media_60(h, 1)[:, 0]
+    taxa = prever(h, modelo, horizonte, **params).mean(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        f = np.where(base > 0, taxa / base, 1.0)
+    return np.clip(f, 0, config.PREVISAO_FATOR_MAX)
+
+def alinhar(kit_index, skus, valores, padrao=1.0):
+    """Leva valores por SKU do histórico para o vetor por código do KitIndex (SKU ausente = padrao)."""
+    vetor = np.full(len(kit_index.vocab), padrao, dtype=float)
+    pos = kit_index.vocab.get_indexer(pd.Index(skus).astype(str))
+    achou = pos >= 0
+    vetor[pos[achou]] = np.asarray(valores, dtype=float)[achou]
+    return vetor
+
+def serie_explodida(kit_index, skus, matriz):
+    """Série diária por SKU componente (vocabulário x dias): a explosão de kits é linear, dia a dia."""
+    dias = range(matriz.shape[1])
+    vetores = kit_index.vetores(skus, por_qtd={j: matriz[:, j] for j in dias})
+    return np.column_stack([vetores[j] for j in dias]) if len(vetores) else np.zeros((len(kit_index.vocab), 0))
+
+def fatores_empresa(empresa, kit_index, modelo=PADRAO, dias=180, **params):
+    """
+    Fatores do motor a partir do histórico de uploads (historico.serie_diaria): Full por anúncio
+    e Shopee já explodida nos componentes. {} no modelo padrão ou sem histórico.
+    """
+    if modelo == PADRAO: return {}
+    saida = {}
+    skus, _, m = historico.serie_diaria(empresa, "FULL", dias=dias)
+    if len(skus):
+        saida["FULL"] = alinhar(kit_index, skus, fatores(m, modelo, **params))
+    skus, _, m = historico.serie_diaria(empresa, "EXT", dias=dias)
+    if len(skus):
+        saida["EXT"] = fatores(serie_explodida(kit_index, skus, m), modelo, **params)
+    return saida
+
+def desvios_empresa(empresa, kit_index, dias=180):
+    """
+    Desvio padrão da taxa diária no histórico, por código do KitIndex (Full + Shopee explodidos).
+    Vetor de zeros sem histórico; o estoque de segurança soma a isso a variância de Poisson.
+    """
+    total = np.zeros((len(kit_index.vocab), 0))
+    for tipo in ("FULL", "EXT"):
+        skus, _, m = historico.serie_diaria(empresa, tipo, dias=dias)
+        if not len(skus): continue
+        m = serie_explodida(kit_index, skus, m)
+        # Séries de tipos diferentes podem ter comprimentos diferentes: alinha pelo fim
+        n = min(total.shape[1], m.shape[1]) if total.shape[1] else m.shape[1]
+        total = (total[:, -n:] if total.shape[1] else 0) + m[:, -n:]
+    return total.std(axis=1) if total.shape[1] else np.zeros(len(kit_index.vocab))
+
+def backtest(hist, modelos=None, horizonte=30, origens=4, passo=None, params=None):
+    """
+    Validação em origens móveis: corta o histórico em `origens` pontos (a cada `passo` dias,
+    padrão = horizonte), prevê os `horizonte` dias seguintes e compara o total previsto com o
+    realizado por SKU. Erro por modelo: MAE (un/SKU), WAPE e viés (% do realizado).
+    """
+    h = _matriz(hist)
+    modelos = list(modelos or MODELOS)
+    params = params or {}
+    passo = passo or horizonte
+    n, d = h.shape
+    cortes = [d - horizonte - i * passo for i in range(origens)]
+    cortes = [c for c in cortes if c >= DIAS_BASE]
+    if not cortes:
+        raise ValueError(f"Histórico curto: são precisos pelo menos {DIAS_BASE + horizonte} dias.")
+
+    linhas = []
+    for modelo in modelos:
+        erro_abs = erro = real_total = 0.0
+        for c in cortes:
+            previsto = prever(h[:, :c], modelo, horizonte, **params.get(modelo, {})).sum(axis=1)
+            real = h[:, c:c + horizonte].sum(axis=1)
+            erro_abs += np.abs(previsto - real).sum()
+            erro += (previsto - real).sum()
+            real_total += real.sum()
+        linhas.append({
+            "Modelo": modelo,
+            "Nome": NOMES.get(modelo, modelo),
+            "MAE": erro_abs / (n * len(cortes)) if n else 0.0,
+            "WAPE": erro_abs / real_total if real_total else np.nan,
+            "Viés": erro / real_total if real_total else np.nan,
+            "Origens": len(cortes),
+        })
+    return pd.DataFrame(linhas).sort_values("WAPE", ignore_index=True)
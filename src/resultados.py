@@ -0,0 +1,100 @@
+import hashlib
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Esquema estável publicado para as outras páginas: coluna -> coluna do motor (aplicar_parametros)
+ESQUEMA = {
+    "Fornecedor": "Fornecedor",
+    "Preco": "Preço de custo",
+    "Vendas_Full": "Vendas full",
+    "Vendas_Shopee": "vendas Shopee",
+    "Estoque_Full": "Estoque full (Un)",
+    "Estoque_Fisico": "Estoque fisico (Un)",
+    "Estoque_Seguranca": "Estoque de segurança",
+    "Compra_Sugerida": "Compra sugerida",
+    "Valor_Compra": "Valor total da compra sugerida",
+}
+# Derivadas: soma das colunas do esquema
+DERIVADAS = {
+    "Vendas_Total_60d": ("Vendas_Full", "Vendas_Shopee"),
+    "Estoque_Total": ("Estoque_Full", "Estoque_Fisico"),
+}
+COLUNAS = list(ESQUEMA) + list(DERIVADAS)
+
+def _somente_leitura(arr):
+    arr = np.asarray(arr)
+    arr.flags.writeable = False
+    return arr
+
+class Resultado:
+    """
+    Resultado da Análise de uma empresa, versionado e só de leitura. Colunas em arrays
+    imutáveis com o esquema de COLUNAS e índice de SKU (lookup por hash, sem varrer a coluna).
+    Compartilhado entre sessões: frame() e coluna() devolvem views, nunca cópias.
+    """
+
+    def __init__(self, empresa, df, versao):
+        self.empresa = empresa
+        self.versao = versao
+        # SKU repetido: vale a primeira linha (mesma regra do cruzamento do inbound)
+        skus = df["SKU"].astype(str).to_numpy()
+        indice = pd.Index(skus, name="SKU")
+        manter = ~indice.duplicated()
+        self.skus = indice[manter]
+        self._colunas = {}
+        for nome, origem in ESQUEMA.items():
+            if origem in df.columns:
+                valores = df[origem].to_numpy()[manter]
+            else:
+                valores = np.zeros(len(self.skus))
+            self._colunas[nome] = _somente_leitura(valores)
+        for nome, (a, b) in DERIVADAS.items():
+            self._colunas[nome] = _somente_leitura(self._colunas[a] + self._colunas[b])
+
+    def __len__(self):
+        return len(self.skus)
+
+    def __contains__(self, sku):
+        return sku in self.skus
+
+    def get(self, sku, padrao=None):
+        """Linha do SKU como dict (ou `padrao` se o SKU não está no resultado)."""
+        try:
+            i = self.skus.get_loc(sku)
+        except KeyError:
+            return padrao
+        linha = {nome: valores[i] for nome, valores in self._colunas.items()}
+        return {nome: v.item() if isinstance(v, np.generic) else v for nome, v in linha.items()}
+
+    def posicoes(self, skus):
+        """Posição de cada SKU (-1 se ausente), vetorizado."""
+        return self.skus.get_indexer(skus)
+
+    def coluna(self, nome):
+        return self._colunas[nome]
+
+    def frame(self):
+        """
+        DataFrame novo (índice SKU) sobre os mesmos arrays, sem copiar. Escrever nos valores
+        (loc/iloc) levanta ValueError; trocar ou incluir colunas só muda o frame de quem chamou.
+        """
+        return pd.DataFrame(self._colunas, index=self.skus, copy=False)
+
+def versao(chave):
+    """Identificador curto da versão (entradas + parâmetros) que gerou o resultado."""
+    return hashlib.sha1(repr(chave).encode()).hexdigest()[:12]
+
+def construir(resultados_por_empresa, chave):
+    """{empresa: Resultado} a partir das views por empresa de separar_empresas."""
+    v = versao(chave)
+    return {emp: Resultado(emp, df, v) for emp, df in resultados_por_empresa.items()
+            if df is not None and not df.empty}
+
+def publicar(publicados, empresas):
+    """Disponibiliza `res_{empresa}` para as outras páginas (Inbound, Alocação); some se a empresa ficou sem dados."""
+    for emp in empresas:
+        if emp in publicados:
+            st.session_state[f"res_{emp}"] = publicados[emp]
+        else:
+            st.session_state.pop(f"res_{emp}", None)
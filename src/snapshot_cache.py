@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from src import config
+
+# Índice do cache:
+#   "paths":    caminho no bucket -> {"hash_origem", "hash_conteudo"}
+#   "arquivos": hash do conteúdo -> {"bytes", "acesso"} (usado no LRU)
+_INDEX_FILE = os.path.join(config.SNAPSHOT_DIR, "index.json")
+_lock = threading.RLock()
+
+def hash_conteudo(content):
+    """MD5 do binário (mesmo algoritmo do eTag do Supabase para uploads simples)."""
+    return hashlib.md5(content).hexdigest()
+
+def _arquivo(h):
+    return os.path.join(config.SNAPSHOT_DIR, f"{h}.parquet")
+
+def _ler_indice():
+    try:
+        with open(_INDEX_FILE, "r", encoding="utf-8") as f:
+            idx = json.load(f)
+        idx.setdefault("paths", {})
+        idx.setdefault("arquivos", {})
+        return idx
+    except Exception:
+        return {"paths": {}, "arquivos": {}}
+
+def _gravar_indice(idx):
+    os.makedirs(config.SNAPSHOT_DIR, exist_ok=True)
+    tmp = f"{_INDEX_FILE}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(idx, f)
+    os.replace(tmp, _INDEX_FILE)
+
+# Colunas de tipo misto (texto + número) vão como JSON por célula, listadas nos metadados do
+# Parquet: na leitura voltam os mesmos valores (int, float, texto) que a leitura da planilha deu
+_META_MISTAS = b"reposicao.colunas_mistas"
+
+def _celula_json(v):
+    # None vira nulo; NaN vai como o literal NaN do json (volta float, como na leitura)
+    if v is None or v is pd.NA: return None
+    if isinstance(v, np.generic): v = v.item()
+    return json.dumps(v, ensure_ascii=False, default=str)
+
+def _celula_de_json(s):
+    return json.loads(s) if isinstance(s, str) else None
+
+def _para_arrow(df):
+    """Converte para Arrow; colunas de tipo misto viram JSON (ver _META_MISTAS)."""
+    df = df.copy()
+    df.columns = [str(c) for c in df.columns]
+    mistas = []
+    for col in df.columns:
+        if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True).startswith("mixed"):
+            df[col] = df[col].map(_celula_json).astype(object)
+            mistas.append(col)
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    if mistas:
+        tabela = tabela.replace_schema_metadata({**(tabela.schema.metadata or {}),
+                                                 _META_MISTAS: json.dumps(mistas).encode()})
+    return tabela
+
+def salvar_parquet(df, caminho):
+    """Grava o DataFrame em Parquet de forma atômica. Retorna o tamanho em bytes."""
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    tmp = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    pq.write_table(_para_arrow(df), tmp)
+    os.replace(tmp, caminho)
+    return os.path.getsize(caminho)
+
+def ler_parquet(caminho, colunas=None):
+    """
+    Lê o Parquet via memory-map (sem passar pelo openpyxl). `colunas`: lista de nomes
+    ou função que recebe os nomes do arquivo e devolve os que devem ser lidos.
+    """
+    if callable(colunas):
+        colunas = colunas(pq.read_schema(caminho, memory_map=True).names)
+    tabela = pq.read_table(caminho, columns=colunas, memory_map=True)
+    mistas = json.loads((tabela.schema.metadata or {}).get(_META_MISTAS, b"[]"))
+    df = tabela.to_pandas()
+    for col in mistas:
+        if col in df.columns:
+            df[col] = pd.Series([_celula_de_json(v) for v in df[col].to_numpy(dtype=object)],
+                                index=df.index, dtype=object)
+    return df
+
+def _evict(idx, manter):
+    """Remove os snapshots menos usados até caber no limite de tamanho."""
+    total = sum(a.get("bytes", 0) for a in idx["arquivos"].values())
+    if total <= config.SNAPSHOT_MAX_BYTES: return
+    for h, info in sorted(idx["arquivos"].items(), key=lambda kv: kv[1].get("acesso", 0)):
+        if total <= config.SNAPSHOT_MAX_BYTES: break
+        if h == manter: continue
+        try: os.remove(_arquivo(h))
+        except OSError: pass
+        total -= info.get("bytes", 0)
+        del idx["arquivos"][h]
+        for p in [p for p, e in idx["paths"].items() if e.get("hash_conteudo") == h]:
+            del idx["paths"][p]
+
+def _marcar_acesso(h):
+    with _lock:
+        idx = _ler_indice()
+        if h in idx["arquivos"]:
+            idx["arquivos"][h]["acesso"] = time.time()
+            _gravar_indice(idx)
+
+def obter(path, hash_origem, colunas=None):
+    """
+    Devolve o snapshot do arquivo se o hash da origem ainda for o mesmo (só `colunas`, se dado).
+    Retorna None quando não há snapshot válido (o chamador deve baixar de novo).
+    """
+    if not hash_origem: return None
+    # O lock cobre só o índice: a leitura do Parquet roda em paralelo entre as empresas
+    with _lock:
+        entrada = _ler_indice()["paths"].get(path)
+    if not entrada or entrada.get("hash_origem") != hash_origem: return None
+    h = entrada["hash_conteudo"]
+    try:
+        df = ler_parquet(_arquivo(h), colunas)
+    except Exception:
+        # Inclui o snapshot removido pelo LRU entre a consulta ao índice e a leitura
+        return None
+    _marcar_acesso(h)
+    return df
+
+def registrar(path, content, parser, hash_origem=None):
+    """
+    Gera (ou reaproveita) o snapshot do conteúdo e associa ao caminho do bucket.
+    `parser` recebe os bytes e devolve o DataFrame já normalizado.
+    """
+    h = hash_conteudo(content)
+    with _lock:
+        existe = h in _ler_indice()["arquivos"] and os.path.exists(_arquivo(h))
+    df, tamanho = None, None
+    if existe:
+        try: df = ler_parquet(_arquivo(h))
+        except Exception: df = None
+    if df is None:
+        df = parser(content)
+        if df is None: return None
+        try:
+            tamanho = salvar_parquet(df, _arquivo(h))
+        except Exception:
+            # Sem snapshot (ex: colunas duplicadas); segue com o DataFrame em memória
+            return df
+    with _lock:
+        idx = _ler_indice()
+        if tamanho is not None:
+            idx["arquivos"][h] = {"bytes": tamanho}
+        elif h not in idx["arquivos"]:
+            # Removido pelo LRU enquanto era lido: fica só em memória
+            return df
+        idx["arquivos"][h]["acesso"] = time.time()
+        idx["paths"][path] = {"hash_origem": hash_origem or h, "hash_conteudo": h}
+        _evict(idx, manter=h)
+        _gravar_indice(idx)
+    return df
+
+def invalidar(path):
+    """Desassocia o caminho do snapshot (ex: arquivo excluído da nuvem)."""
+    with _lock:
+        idx = _ler_indice()
+        if idx["paths"].pop(path, None) is not None:
+            _gravar_indice(idx)
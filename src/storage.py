@@ -1,18 +1,37 @@
 import streamlit as st
-from supabase import create_client
 import io
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src import config, snapshot_cache, supabase_pool
 
 # --- Função de Cliente ---
+def _credenciais():
+    # Certifique-se que as chaves estão no Streamlit Secrets
+    return st.secrets["supabase_url"], st.secrets["supabase_key"]
+
 def get_client():
-    """Tenta criar o cliente Supabase com as secrets."""
+    """Cliente Supabase do pool do processo (conexão keep-alive reaproveitada)."""
     try:
-        # Certifique-se que as chaves estão no Streamlit Secrets
-        return create_client(st.secrets["supabase_url"], st.secrets["supabase_key"])
+        return supabase_pool.obter_cliente(*_credenciais())
     except Exception as e:
         st.error(f"Erro Configuração Secrets: {e}")
         return None
 
+def _executar(operacao):
+    """Executa operacao(client) com retry/reconexão do pool."""
+    return supabase_pool.executar(_credenciais(), operacao)
+
 BUCKET = "arquivos"
+PASTAS = ("ALIVVIA", "JCA")
+
+# Cache do manifesto: pasta -> (momento da listagem, entradas)
+_manifesto = {}
+_manifesto_lock = threading.Lock()
+
+# Trabalho depois do upload (snapshot + histórico) numa thread própria, um upload por vez:
+# o upload volta assim que o arquivo está na nuvem, sem esperar o parse
+_pos_upload = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pos-upload")
 
 # --- Funções CRUD ---
 def upload(file_obj, path):
@@ -29,11 +48,13 @@ def upload(file_obj, path):
             mime_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         
         # Tenta remover anterior (upsert)
-        try: c.storage.from_(BUCKET).remove([path])
+        try: _executar(lambda c: c.storage.from_(BUCKET).remove([path]))
         except: pass
         
         # Upload
-        c.storage.from_(BUCKET).upload(path, content, {"content-type": mime_type, "upsert": "true"})
+        _executar(lambda c: c.storage.from_(BUCKET).upload(path, content, {"content-type": mime_type, "upsert": "true"}))
+        invalidar_manifesto(_pasta_e_nome(path)[0])
+        _pos_upload.submit(_registrar_snapshot, path, content)
         return True
     except Exception as e:
         # Mantém este erro para diagnóstico de permissão (403 RLS)
@@ -45,30 +66,89 @@ def delete_file(path):
     c = get_client()
     if not c: return False
     try:
-        c.storage.from_(BUCKET).remove([path])
+        _executar(lambda c: c.storage.from_(BUCKET).remove([path]))
+        invalidar_manifesto(_pasta_e_nome(path)[0])
+        snapshot_cache.invalidar(path)
         return True
     except Exception as e:
         st.error(f"Erro ao deletar: {e}")
         return False
 
-def file_exists(path):
-    """Checa se arquivo existe (rápido)"""
-    c = get_client()
-    if not c: return False
+def _registrar_snapshot(path, content):
+    """
+    Roda em _pos_upload: deixa o snapshot Parquet pronto para a próxima leitura e guarda a
+    versão no histórico (parse, gravação e compactação fora do caminho do upload).
+    """
     try:
-        # Lista arquivos na pasta e procura pelo nome (mais rápido que tentar download)
-        folder = "/".join(path.split("/")[:-1])
-        filename = path.split("/")[-1]
-        res = c.storage.from_(BUCKET).list(folder, {"search": filename})
-        return len(res) > 0
-    except:
-        return False
+        from src import logic
+        df = snapshot_cache.registrar(path, content, logic.parse_relatorio)
+    except Exception:
+        return
+    # O upload substitui o arquivo na nuvem; o histórico local guarda cada versão
+    try:
+        from src import historico
+        historico.registrar_upload(path, df, content)
+    except Exception:
+        pass
+
+def _pasta_e_nome(path):
+    return "/".join(path.split("/")[:-1]), path.split("/")[-1]
+
+def listar_manifesto(pastas=PASTAS, forcar=False):
+    """
+    Manifesto {path: {name, size, updated_at, hash}} das pastas, com cache curto
+    (config.MANIFESTO_TTL). Uma listagem por pasta em vez de uma por arquivo.
+    """
+    agora = time.time()
+    manifesto = {}
+    with _manifesto_lock:
+        faltando = [p for p in pastas if forcar or p not in _manifesto or agora - _manifesto[p][0] > config.MANIFESTO_TTL]
+    c = get_client() if faltando else None
+    for pasta in faltando:
+        if not c: break
+        try:
+            res = _executar(lambda c: c.storage.from_(BUCKET).list(pasta, {"limit": 1000}))
+        except:
+            continue
+        entradas = {}
+        for obj in res or []:
+            if obj.get("id") is None: continue  # subpasta
+            meta = obj.get("metadata") or {}
+            etag = meta.get("eTag")
+            entradas[f"{pasta}/{obj['name']}"] = {
+                "name": obj["name"],
+                "size": meta.get("size"),
+                "updated_at": obj.get("updated_at") or meta.get("lastModified"),
+                "hash": str(etag).strip('"') if etag else None,
+            }
+        with _manifesto_lock:
+            _manifesto[pasta] = (agora, entradas)
+    with _manifesto_lock:
+        for pasta in pastas:
+            manifesto.update(_manifesto.get(pasta, (0, {}))[1])
+    return manifesto
+
+def invalidar_manifesto(pasta=None):
+    """Descarta o manifesto em cache (todas as pastas ou só uma)."""
+    with _manifesto_lock:
+        if pasta is None: _manifesto.clear()
+        else: _manifesto.pop(pasta, None)
+
+def file_exists(path):
+    """Checa se arquivo existe (pelo manifesto da pasta, sem ida extra à nuvem)"""
+    folder, _ = _pasta_e_nome(path)
+    return path in listar_manifesto([folder])
 
 def download(path):
     """Baixa o conteúdo binário"""
     c = get_client()
     if not c: return None
     try:
-        return c.storage.from_(BUCKET).download(path)
+        return _executar(lambda c: c.storage.from_(BUCKET).download(path))
     except:
-        return None
\ No newline at end of file
+        return None
+
+def get_hash(path):
+    """Retorna o eTag (hash) do objeto na nuvem, ou None se não encontrado."""
+    folder, _ = _pasta_e_nome(path)
+    return (listar_manifesto([folder]).get(path) or {}).get("hash")
\ No newline at end of file
@@ -0,0 +1,87 @@
+import time
+import threading
+import httpx
+from supabase import create_client, ClientOptions
+from src import config
+
+# Um cliente (e uma sessão HTTP keep-alive) por par url/key, compartilhado pelo processo
+_pool = {}
+_lock = threading.Lock()
+
+def _novo(url, key):
+    # Mesmos padrões que storage3/postgrest usam quando criam o próprio cliente
+    http = httpx.Client(
+        timeout=config.SUPABASE_TIMEOUT,
+        follow_redirects=True,
+        http2=True,
+        limits=httpx.Limits(max_connections=config.SUPABASE_MAX_CONEXOES,
+                            max_keepalive_connections=config.SUPABASE_MAX_CONEXOES),
+    )
+    opcoes = ClientOptions(httpx_client=http,
+                           postgrest_client_timeout=config.SUPABASE_TIMEOUT,
+                           storage_client_timeout=int(config.SUPABASE_TIMEOUT))
+    return {"client": create_client(url, key, options=opcoes), "http": http, "usado_em": time.time()}
+
+def _saudavel(url, key, entrada):
+    """Ping leve no health check do Supabase (também reaquece a conexão)."""
+    try:
+        r = entrada["http"].get(f"{url.rstrip('/')}/auth/v1/health", headers={"apikey": key},
+                                timeout=min(5, config.SUPABASE_TIMEOUT))
+        return r.status_code < 500
+    except httpx.HTTPError:
+        return False
+
+def _descartar(chave):
+    entrada = _pool.pop(chave, None)
+    if entrada:
+        try: entrada["http"].close()
+        except Exception: pass
+
+def obter_cliente(url, key):
+    """
+    Cliente do pool; após muito tempo ocioso passa por health check e reconecta se preciso.
+    O ping roda fora do lock (as outras sessões seguem com a entrada atual enquanto isso).
+    """
+    chave = (url, key)
+    with _lock:
+        entrada = _pool.get(chave)
+        checar = entrada is not None and time.time() - entrada["usado_em"] > config.SUPABASE_HEALTHCHECK_S
+        if entrada is not None:
+            # Marca já como usada: só esta chamada faz o ping
+            entrada["usado_em"] = time.time()
+            if not checar: return entrada["client"]
+    saudavel = checar and _saudavel(url, key, entrada)
+    with _lock:
+        atual = _pool.get(chave)
+        if atual is not None and atual is entrada and not saudavel:
+            _descartar(chave)
+            atual = None
+        if atual is None:
+            atual = _novo(url, key)
+            _pool[chave] = atual
+        atual["usado_em"] = time.time()
+        return atual["client"]
+
+def reconectar(url, key):
+    with _lock:
+        _descartar((url, key))
+
+def executar(credenciais, operacao, repetir=True):
+    """
+    Executa operacao(client) com retry e backoff exponencial. Só falhas de transporte
+    (conexão, timeout) são repetidas, com uma conexão nova; erros HTTP sobem direto.
+    repetir=False para operações não idempotentes: uma tentativa só, a falha sobe
+    (a conexão é descartada para a próxima chamada).
+    """
+    url, key = credenciais
+    tentativas = config.SUPABASE_RETRIES if repetir else 0
+    for tentativa in range(tentativas + 1):
+        client = obter_cliente(url, key)
+        try:
+            return operacao(client)
+        except httpx.TransportError:
+            if tentativa == tentativas:
+                if not repetir: reconectar(url, key)
+                raise
+            reconectar(url, key)
+            time.sleep(config.SUPABASE_BACKOFF * (2 ** tentativa))
@@ -26,6 +26,49 @@ def br_to_float(x):
     try: return float(s)
     except: return np.nan
 
+def br_series_to_float(s: pd.Series) -> pd.Series:
+    """Versão vetorizada de br_to_float para uma coluna inteira."""
+    if pd.api.types.is_numeric_dtype(s) or pd.api.types.is_bool_dtype(s):
+        return s.astype(float)
+    tipo = pd.api.types.infer_dtype(s, skipna=True)
+    if tipo in ("integer", "floating", "mixed-integer-float", "decimal", "boolean", "empty"):
+        return pd.to_numeric(s, errors="coerce").astype(float)
+    # .str devolve NaN para células que não são texto (números soltos em coluna mista)
+    txt = s.str.strip()
+    out = pd.to_numeric(s.where(txt.isna()), errors="coerce").astype(float)
+    limpo = (txt.str.replace("\u00a0", " ", regex=False)
+                .str.replace("R$", "", regex=False)
+                .str.replace(" ", "", regex=False)
+                .str.replace(".", "", regex=False)
+                .str.replace(",", ".", regex=False))
+    convertido = pd.to_numeric(limpo.where(limpo != ""), errors="coerce").astype(float)
+    return out.where(txt.isna(), convertido)
+
+def compactar(x):
+    """
+    Reduz o dtype de um vetor numérico sem perder valor: int32 quando todos os valores
+    são inteiros que cabem, float32 quando a volta para float64 é exata; senão mantém.
+    """
+    arr = np.asarray(x)
+    if arr.dtype.kind not in "fiu" or arr.size == 0: return arr
+    if arr.dtype.kind == "f" and not np.isfinite(arr).all():
+        return arr.astype(np.float32) if np.array_equal(arr.astype(np.float32), arr, equal_nan=True) else arr
+    if (arr.dtype.kind in "iu" or np.array_equal(np.trunc(arr), arr)) and \
+            np.abs(arr).max() <= np.iinfo(np.int32).max:
+        return arr.astype(np.int32)
+    if arr.dtype.kind == "f" and np.array_equal(arr.astype(np.float32), arr):
+        return arr.astype(np.float32)
+    return arr
+
+def memoria_mb(obj) -> float:
+    """Memória ocupada (deep) por um DataFrame/Series, ou pela soma deles num dict."""
+    if isinstance(obj, pd.DataFrame): return obj.memory_usage(deep=True).sum() / 2**20
+    if isinstance(obj, (pd.Series, pd.Index)): return obj.memory_usage(deep=True) / 2**20
+    if isinstance(obj, np.ndarray): return obj.nbytes / 2**20
+    if isinstance(obj, dict): return sum(memoria_mb(v) for v in obj.values())
+    if isinstance(obj, (tuple, list)): return sum(memoria_mb(v) for v in obj)
+    return 0.0
+
 def norm_sku(x: str) -> str:
     if pd.isna(x): return ""
     return unidecode(str(x)).strip().upper()
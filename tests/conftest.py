@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src import logic
+
+# Catálogo mínimo: três SKUs simples, um kit (K1 = 2 A + 1 B) e um SKU fora de reposição
+CATALOGO = pd.DataFrame({
+    "sku": ["A", "B", "C", "K1", "D"],
+    "descricao": ["Produto A", "Produto B", "Produto C", "Kit A+B", "Produto D"],
+    "fornecedor": ["ALFA", "ALFA", "BETA", "ALFA", "BETA"],
+    "status_reposicao": ["repor", "repor", "repor", "repor", "nao_repor"],
+})
+KITS = pd.DataFrame({
+    "sku_kit": ["K1", "K1"],
+    "sku_componente": ["A", "B"],
+    "quantidade_componente": [2, 1],
+})
+
+def relatorios_exemplo():
+    """Relatórios já normalizados (como saem de read_file_from_storage)."""
+    return {
+        "FULL": pd.DataFrame({"sku": ["A", "K1", "C"],
+                              "vendas_60_dias": [120, 30, "1.200"],
+                              "estoque_disponivel": [10, 5, "0"]}),
+        "EXT": pd.DataFrame({"sku": ["A", "B", "K1"], "qtde_vendida": ["60", "6", 3]}),
+        "FISICO": pd.DataFrame({"sku": ["A", "B", "C", "D"],
+                                "saldo_em_estoque": ["50", "0", "100", "7"],
+                                "preco_de_custo": ["R$ 10,00", "R$ 2,50", "0", "R$ 1,00"]}),
+    }
+
+@pytest.fixture
+def prep():
+    return logic.preparar_catalogo({"catalogo": CATALOGO.copy(), "kits": KITS.copy()})
+
+@pytest.fixture
+def base(prep):
+    return logic.preparar_base(prep, relatorios_exemplo())
+
+@pytest.fixture
+def fator_demanda(prep):
+    """Fatores de um modelo que não é o padrão (Full e Shopee), por código do KitIndex."""
+    n = len(prep["kit_index"].vocab)
+    return {"FULL": np.full(n, 1.5), "EXT": np.full(n, 0.5)}
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src import alocacao
+from src.resultados import Resultado
+
+def publicado(empresa, skus, vendas, estoque=None, preco=None):
+    n = len(skus)
+    return Resultado(empresa, pd.DataFrame({
+        "SKU": skus, "Vendas full": vendas, "vendas Shopee": [0] * n,
+        "Estoque full (Un)": [0] * n, "Estoque fisico (Un)": estoque or [0] * n,
+        "Preço de custo": preco or [0.0] * n,
+    }), "v1")
+
+@pytest.fixture
+def publicados():
+    return {"ALIVVIA": publicado("ALIVVIA", ["A", "B", "C"], [60, 10, 5], estoque=[0, 0, 0], preco=[2.0, 1.0, 1.0]),
+            "JCA": publicado("JCA", ["A", "B"], [30, 10], estoque=[90, 0], preco=[2.5, 1.0])}
+
+def test_proporcional_as_vendas_com_total_exato(publicados):
+    compras = pd.DataFrame({"SKU": ["A", "B", "C", "Z"], "Qtd": [100, 7, 5, 3]})
+    out = alocacao.alocar(compras, publicados).set_index("SKU")
+    assert (out["Qtd_ALIVVIA"] + out["Qtd_JCA"]).loc[["A", "B", "C"]].tolist() == [100, 7, 5]
+    assert out.loc["A", ["Qtd_ALIVVIA", "Qtd_JCA"]].tolist() == [67, 33]  # 66,67 / 33,33: maior resto
+    assert out.loc["C", ["Qtd_ALIVVIA", "Qtd_JCA"]].tolist() == [5, 0]
+    assert out.loc["Z", "Status"] == "Sem vendas em 60d"
+    assert out.loc["Z", ["Qtd_ALIVVIA", "Qtd_JCA"]].tolist() == [0, 0]
+
+def test_lote_em_multiplos_e_sobra_no_maior_resto(publicados):
+    out = alocacao.alocar(pd.DataFrame({"SKU": ["A"], "Qtd": [100], "Lote": [12]}), publicados)
+    a, j = out.loc[0, "Qtd_ALIVVIA"], out.loc[0, "Qtd_JCA"]
+    assert a + j == 100
+    # Só a sobra (100 não é múltiplo de 12) fica fora do múltiplo, numa empresa
+    assert sorted([a % 12, j % 12]) == [0, 100 % 12]
+
+def test_cobertura_desconta_o_estoque(publicados):
+    # JCA já tem 90 un (180 dias de cobertura): a ALIVVIA, sem estoque, recebe tudo
+    out = alocacao.alocar(pd.DataFrame({"SKU": ["A"], "Qtd": [120]}), publicados, modo="cobertura")
+    assert out.loc[0, ["Qtd_ALIVVIA", "Qtd_JCA"]].tolist() == [120, 0]
+    assert out.loc[0, "Cobertura_ALIVVIA"] == 120.0
+    # Compra grande: as duas terminam com a mesma cobertura
+    out = alocacao.alocar(pd.DataFrame({"SKU": ["A"], "Qtd": [630]}), publicados, modo="cobertura")
+    assert out.loc[0, ["Qtd_ALIVVIA", "Qtd_JCA"]].tolist() == [480, 150]
+    assert out.loc[0, "Cobertura_ALIVVIA"] == out.loc[0, "Cobertura_JCA"] == 480.0
+
+def test_ler_compras_soma_por_sku():
+    content = "Código SKU;Quantidade;Lote\nA;10;6\na ;5;6\nB;0;1\n;3;1\n".encode("utf-8")
+    compras = alocacao.ler_compras(content)
+    assert compras.to_dict("records") == [{"SKU": "A", "Qtd": 15.0, "Lote": 6.0}]
+    with pytest.raises(ValueError):
+        alocacao.ler_compras("SKU;Outra\nA;1\n".encode("utf-8"))
+
+def test_para_carrinho_com_preco_de_cada_empresa(publicados):
+    out = alocacao.alocar(pd.DataFrame({"SKU": ["A", "Z"], "Qtd": [9, 1]}), publicados)
+    itens = alocacao.para_carrinho(out, publicados=publicados)
+    assert itens.to_dict("records") == [
+        {"sku": "A", "qtd": 6, "valor_unit": 2.0, "origem": "ALIVVIA (Aloc)"},
+        {"sku": "A", "qtd": 3, "valor_unit": 2.5, "origem": "JCA (Aloc)"},
+    ]
+    assert np.issubdtype(itens["qtd"].dtype, np.integer)
@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+from src.carrinho import Carrinho
+
+def test_upsert_por_sku_e_origem_com_totais():
+    car = Carrinho(capacidade=2)
+    assert car.adicionar("A", 2, 10.0, "INBOUND")
+    assert car.adicionar("A", 3, 10.0, "ALIVVIA (Aloc)")
+    assert car.adicionar("B", 1, 5.5, "INBOUND")  # passa da capacidade inicial
+    assert len(car) == 3 and ("A", "INBOUND") in car
+    assert car.total_qtd == 6 and car.total_valor == pytest.approx(55.5)
+
+    assert car.adicionar("A", 7, 11.0, "INBOUND")  # substituir (padrão)
+    assert car.adicionar("A", 1, 11.0, "INBOUND", modo="somar")
+    assert not car.adicionar("A", 99, 1.0, "INBOUND", modo="manter")
+    assert len(car) == 3
+    assert car.total_qtd == 8 + 3 + 1 and car.total_valor == pytest.approx(88 + 30 + 5.5)
+
+def test_adicionar_df_e_frame():
+    car = Carrinho()
+    n = car.adicionar_df(pd.DataFrame({"sku": ["A", "B", "A"], "qtd": ["2", 3, 1], "valor": [1.0, None, 1.0]}),
+                         origem="SUGESTAO", modo="somar")
+    assert n == 3
+    df = car.frame()
+    assert list(df.columns) == ["sku", "qtd", "valor_unit", "total", "origem"]
+    assert df.to_dict("records") == [
+        {"sku": "A", "qtd": 3, "valor_unit": 1.0, "total": 3.0, "origem": "SUGESTAO"},
+        {"sku": "B", "qtd": 3, "valor_unit": 0.0, "total": 0.0, "origem": "SUGESTAO"},
+    ]
+
+def test_remover_e_substituir():
+    car = Carrinho()
+    car.adicionar_df(pd.DataFrame({"sku": ["A", "B", "C"], "qtd": [1, 2, 3], "valor_unit": [1.0, 1.0, 1.0],
+                                   "origem": ["X", "X", "Y"]}))
+    car.remover([("B", "X"), ("Z", "X")])
+    assert car.frame()["sku"].tolist() == ["A", "C"] and car.total_qtd == 4
+    assert ("C", "Y") in car and ("B", "X") not in car
+
+    editado = pd.DataFrame({"sku": ["A", None, " ", "D"], "qtd": [5, 1, 1, 2],
+                            "valor_unit": [2.0, 1.0, 1.0, 3.0], "origem": ["X", "X", "X", None]})
+    car.substituir(editado)
+    assert car.frame()[["sku", "qtd", "origem"]].values.tolist() == [["A", 5, "X"], ["D", 2, ""]]
+    assert car.total_valor == pytest.approx(16.0)
+
+def test_itens_ida_e_volta_e_formato_antigo():
+    car = Carrinho()
+    car.adicionar("A", 2, 1.25, "INBOUND")
+    itens = car.itens()
+    assert itens == [{"sku": "A", "qtd": 2, "valor_unit": 1.25, "total": 2.5, "origem": "INBOUND"}]
+    assert Carrinho.de_itens(itens).itens() == itens
+    # Formato antigo da Alocação: "valor" em vez de "valor_unit", ou só o total
+    antigo = Carrinho.de_itens([{"sku": "B", "qtd": 4, "valor": 2.0}, {"sku": "C", "qtd": 2, "total": 5.0}])
+    assert antigo.frame()["valor_unit"].tolist() == [2.0, 2.5]
@@ -0,0 +1,63 @@
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from src import catalogo_loader
+from benchmarks.gerador import _xlsx
+
+PLANILHA = _xlsx({
+    "CATALOGO_SIMPLES": [["SKU", "Descrição", "Fornecedor"], ["A", "Produto A", "ALFA"]],
+    "KITS": [["kit_sku", "component_sku", "qty_por_kit"]],
+})
+
+@pytest.fixture(autouse=True)
+def cache_limpo(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalogo_loader, "_cache", {"dados": None, "meta": {}, "revalidando": None})
+    monkeypatch.setattr(catalogo_loader, "_META_FILE", str(tmp_path / "meta.json"))
+    monkeypatch.setattr(catalogo_loader, "_CATALOGO_FILE", str(tmp_path / "catalogo.parquet"))
+    monkeypatch.setattr(catalogo_loader, "_KITS_FILE", str(tmp_path / "kits.parquet"))
+
+class RedeLenta:
+    """requests.get que só responde quando `liberar` é sinalizado."""
+    def __init__(self):
+        self.liberar = threading.Event()
+        self.chamadas = 0
+    def get(self, url, timeout=None, headers=None):
+        self.chamadas += 1
+        self.liberar.wait(5)
+        return SimpleNamespace(status_code=200, content=PLANILHA, headers={"ETag": '"v2"'},
+                               raise_for_status=lambda: None)
+
+def test_revalidacao_lenta_nao_bloqueia_as_outras_sessoes(monkeypatch):
+    rede = RedeLenta()
+    monkeypatch.setattr(catalogo_loader.requests, "get", rede.get)
+    antigo = {"versao": "v1"}
+    catalogo_loader._cache.update(dados=antigo, meta={"verificado_em": 0, "hash": "v1"})
+
+    lider = threading.Thread(target=catalogo_loader.get_catalogo)
+    lider.start()
+    while not rede.chamadas: time.sleep(0.01)
+
+    # Durante a ida à rede: a versão atual sai na hora e não há segundo GET
+    inicio = time.perf_counter()
+    assert catalogo_loader.get_catalogo() is antigo
+    assert time.perf_counter() - inicio < 1
+    assert rede.chamadas == 1
+
+    rede.liberar.set()
+    lider.join(5)
+    novo = catalogo_loader.get_catalogo()
+    assert novo is not antigo and list(novo["catalogo"]["sku"]) == ["A"]
+    assert rede.chamadas == 1
+
+def test_sem_versao_espera_a_ida_a_rede(monkeypatch):
+    rede = RedeLenta()
+    monkeypatch.setattr(catalogo_loader.requests, "get", rede.get)
+    resultados = []
+    threads = [threading.Thread(target=lambda: resultados.append(catalogo_loader.get_catalogo())) for _ in range(4)]
+    for t in threads: t.start()
+    time.sleep(0.1)
+    rede.liberar.set()
+    for t in threads: t.join(5)
+    assert rede.chamadas == 1
+    assert len(resultados) == 4 and all(r is resultados[0] for r in resultados)
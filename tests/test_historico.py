@@ -0,0 +1,71 @@
+import datetime as dt
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src import config, historico
+
+D1, D2 = dt.date(2026, 1, 10), dt.date(2026, 1, 11)
+
+@pytest.fixture(autouse=True)
+def pasta_historico(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "HISTORICO_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "HISTORICO_LINHAS_POR_GRUPO", 2)
+
+def full(vendas, estoque=None):
+    skus = list(vendas)
+    return pd.DataFrame({"sku": skus, "vendas_60_dias": [str(v) for v in vendas.values()],
+                         "estoque_disponivel": estoque or [0] * len(skus)})
+
+def test_ultimo_upload_do_dia_vale_e_mesmo_conteudo_nao_regrava():
+    assert historico.gravar("ALIVVIA", "FULL", full({"A": 60, "B": 6}), data=D1, momento=1, hash_conteudo="h1")
+    assert historico.gravar("ALIVVIA", "FULL", full({"A": 60, "B": 6}), data=D1, momento=2, hash_conteudo="h1") is None
+    historico.gravar("ALIVVIA", "FULL", full({"A": 120, "C": 3}), data=D1, momento=3, hash_conteudo="h2")
+    historico.gravar("ALIVVIA", "FULL", full({"A": 30}), data=D2, momento=4, hash_conteudo="h3")
+
+    df = historico.consultar("ALIVVIA", "FULL")
+    assert df[["sku", "venda"]].values.tolist() == [["A", 120.0], ["C", 3.0], ["A", 30.0]]
+    assert df["data"].dt.date.tolist() == [D1, D1, D2]
+    # Com SKUs: lê só os row groups indicados pelo índice da partição
+    so_c = historico.consultar("ALIVVIA", "FULL", skus=["C"], colunas=["venda"])
+    assert so_c[["sku", "venda"]].values.tolist() == [["C", 3.0]]
+    assert historico.consultar("ALIVVIA", "FULL", inicio=D2)["sku"].tolist() == ["A"]
+    assert historico.consultar("JCA", "FULL").empty
+
+def test_registrar_upload_pelo_caminho_do_bucket():
+    assert historico.registrar_upload("JCA/EXT.xlsx", pd.DataFrame({"sku": ["A", "A"], "qtd": ["1", "2,5"]}), b"x")
+    assert historico.registrar_upload("JCA/OUTRO.xlsx", pd.DataFrame({"sku": ["A"]})) is None
+    assert historico.consultar("JCA", "EXT")["venda"].tolist() == [3.5]
+
+def test_compactar_junta_os_dias_antigos_no_mes():
+    for i in range(3):
+        historico.gravar("ALIVVIA", "FULL", full({"A": 10 * (i + 1), "B": i}), data=D1 + dt.timedelta(days=i), momento=i)
+    antes = historico.consultar("ALIVVIA", "FULL")
+    assert historico.compactar("ALIVVIA", "FULL", dias=30, hoje=dt.date(2026, 3, 1)) == 3
+    assert sorted(os.listdir(os.path.join(config.HISTORICO_DIR, "ALIVVIA", "FULL"))) == ["2026-01"]
+    pd.testing.assert_frame_equal(historico.consultar("ALIVVIA", "FULL"), antes)
+    assert historico.compactar("ALIVVIA", "FULL", dias=30, hoje=dt.date(2026, 3, 1)) == 0
+
+def test_serie_diaria_distribui_o_total_da_janela():
+    historico.gravar("ALIVVIA", "FULL", full({"A": 60, "B": 30}), data=D1, momento=1)
+    historico.gravar("ALIVVIA", "FULL", full({"A": 120}), data=D1 + dt.timedelta(days=5), momento=2)
+    skus, datas, m = historico.serie_diaria("ALIVVIA", "FULL", dias=20, hoje=D1 + dt.timedelta(days=5), janela=10)
+    assert list(skus) == ["A", "B"]
+    assert len(datas) == m.shape[1] and datas[-1].date() == D1 + dt.timedelta(days=5)
+    # Começa no primeiro dia coberto (janela do 1º upload); cada dia usa o upload mais antigo
+    # que o cobre: até D1 o primeiro (60/10, 30/10), depois o segundo (120/10, B ausente = 0)
+    assert datas[0].date() == D1 - dt.timedelta(days=9) and m.shape == (2, 15)
+    assert np.allclose(m[:, :10], [[6.0] * 10, [3.0] * 10])
+    assert np.allclose(m[:, 10:], [[12.0] * 5, [0.0] * 5])
+
+def test_compactar_ignora_particao_diaria_vazia():
+    pasta = os.path.join(config.HISTORICO_DIR, "ALIVVIA", "FULL")
+    historico.gravar("ALIVVIA", "FULL", full({"A": 60}), data=D1, momento=1)
+    # Escrita interrompida: partição do dia sem nenhum parquet (só o temporário)
+    os.makedirs(os.path.join(pasta, "2026-01-12"))
+    open(os.path.join(pasta, "2026-01-12", "2.parquet.tmp"), "w").close()
+    # Mês inteiro sem arquivo vigente: as partições vazias só saem
+    os.makedirs(os.path.join(pasta, "2025-12-20"))
+    assert historico.compactar("ALIVVIA", "FULL", dias=30, hoje=dt.date(2026, 3, 1)) == 3
+    assert sorted(os.listdir(pasta)) == ["2026-01"]
+    assert historico.consultar("ALIVVIA", "FULL")[["sku", "venda"]].values.tolist() == [["A", 60.0]]
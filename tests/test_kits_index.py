@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+from src import catalogo_loader
+from src.kits_index import KitIndex
+from benchmarks.gerador import _xlsx
+
+def aba(*linhas):
+    return pd.DataFrame(linhas, columns=["sku_kit", "sku_componente", "quantidade_componente"])
+
+def explodido(idx, skus, qtd):
+    v = idx.vetores(skus, por_qtd={"q": qtd})["q"]
+    return {s: v[i] for i, s in enumerate(idx.vocab) if v[i]}
+
+def test_kit_simples_e_sku_fora_de_kit():
+    idx = KitIndex(aba(("K1", "A", 2), ("K1", "B", 1)), skus_catalogo=pd.Series(["A", "B", "C"]))
+    assert explodido(idx, ["K1", "C", "A"], [10, 4, 1]) == {"A": 21, "B": 10, "C": 4}
+    assert list(idx.kits) == ["K1"]
+
+def test_kits_aninhados():
+    idx = KitIndex(aba(("K1", "A", 2), ("K1", "B", 1), ("K2", "K1", 3), ("K2", "C", 1)))
+    assert explodido(idx, ["K2"], [1]) == {"A": 6, "B": 3, "C": 1}
+    assert idx.ciclos == []
+
+def test_componente_repetido_soma():
+    idx = KitIndex(aba(("K1", "A", 2), ("K1", "A", 3)))
+    assert explodido(idx, ["K1"], [2]) == {"A": 10}
+    # por_linha: o estoque do anúncio conta uma vez por linha explodida
+    df = idx.explodir(pd.Series(["K1"]), por_linha={"e": [7]})
+    assert df.to_dict("records") == [{"sku": "A", "e": 14.0}]
+
+def test_componente_e_quantidade_ausentes():
+    df = pd.DataFrame({"sku_kit": ["K1", "K2"], "sku_componente": ["A", None], "quantidade_componente": [None, 2]})
+    assert explodido(KitIndex(df), ["K1", "K2"], [1, 1]) == {"A": 1, "K2": 2}
+
+def test_ciclo_ignora_o_componente_e_mantem_o_resto():
+    idx = KitIndex(aba(("K1", "K2", 1), ("K1", "A", 2), ("K2", "K1", 1), ("K2", "B", 1), ("K3", "A", 1)))
+    assert idx.ciclos
+    assert all("K1" in c and "K2" in c for c in idx.ciclos)
+    assert explodido(idx, ["K3"], [5]) == {"A": 5}
+    # K1 perde só o componente que fecha o ciclo: continua explodindo em A (e no B de K2)
+    saida = explodido(idx, ["K1"], [1])
+    assert saida["A"] == 2 and "K1" not in saida and "K2" not in saida
+
+def test_catalogo_carrega_com_ciclo_na_aba_kits():
+    planilha = _xlsx({
+        "CATALOGO_SIMPLES": [["SKU", "Fornecedor"], ["A", "ALFA"], ["B", "BETA"], ["K1", "ALFA"], ["K2", "ALFA"]],
+        "KITS": [["kit_sku", "component_sku", "qty_por_kit"], ["K1", "K2", 1], ["K2", "K1", 1], ["K1", "A", 2]],
+    })
+    dados = catalogo_loader.parse_catalogo(planilha)
+    assert list(dados["catalogo"]["sku"]) == ["A", "B", "K1", "K2"]
+    assert dados["kit_index"].ciclos
+    assert np.isclose(dados["kit_index"].vetores(["K1"], por_qtd={"q": [1]})["q"][0], 2)
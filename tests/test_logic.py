@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from statistics import NormalDist
+from src import logic, perf
+from tests.conftest import CATALOGO, KITS, relatorios_exemplo
+
+def test_aplicar_parametros_medido_com_modelo_nao_padrao(base, fator_demanda):
+    sem_perf = logic.aplicar_parametros(base, 30, lead_time=10, fator_demanda=fator_demanda,
+                                        nivel_servico=0.95, desvio_lead=2)
+    with perf.execucao("teste", forcar=True) as run:
+        com_perf = logic.aplicar_parametros(base, 30, lead_time=10, fator_demanda=fator_demanda,
+                                            nivel_servico=0.95, desvio_lead=2)
+    assert com_perf.equals(sem_perf)
+    etapas = [r["etapa"] for r in run.registros]
+    assert etapas.count("final") == 1
+    final = next(r for r in run.registros if r["etapa"] == "final")
+    assert final["linhas_entrada"] == len(base["df_base"])
+    assert final["linhas_saida"] == len(com_perf)
+
+def test_fator_demanda_multiplica_a_demanda(base, fator_demanda):
+    padrao = logic.aplicar_parametros(base, 60).set_index("SKU")
+    previsto = logic.aplicar_parametros(base, 60, fator_demanda=fator_demanda).set_index("SKU")
+    assert np.allclose(previsto["dem_s"], padrao["dem_s"] * 0.5)
+    assert (previsto.loc["C", "nec_full"]) == 1200 * 1.5
+
+def test_estoque_seguranca_caso_calculado_a_mao():
+    # P = 4 dias, σL = 1 dia, nível de serviço com z = 1:
+    #   d=3, σhist=1: sqrt(4·(3 + 1) + 3²·1) = sqrt(25) = 5
+    #   d=0, σhist=2: sqrt(4·(0 + 4) + 0)    = sqrt(16) = 4
+    #   d=1, σhist=0: sqrt(4·(1 + 0) + 1²·1) = sqrt(5)
+    nivel = NormalDist().cdf(1)
+    es = logic.estoque_seguranca(np.array([3.0, 0.0, 1.0]), 4, nivel, desvio_lead=1,
+                                 desvio_hist=np.array([1.0, 2.0, 0.0]))
+    assert np.allclose(es, [5, 4, np.sqrt(5)])
+    # z de 97,5% ≈ 1,96; sem histórico fica só a variância de Poisson: sqrt(4·3 + 9) = sqrt(21)
+    es = logic.estoque_seguranca(np.array([3.0]), 4, 0.975, desvio_lead=1)
+    assert np.allclose(es, [1.959964 * np.sqrt(21)], rtol=1e-6)
+
+def test_estoque_seguranca_nivel_zero_desliga():
+    assert not logic.estoque_seguranca(np.array([3.0, 1.0]), 30, 0, desvio_lead=5).any()
+
+def test_estoque_seguranca_entra_na_compra(base):
+    sem = logic.aplicar_parametros(base, 30).set_index("SKU")
+    com = logic.aplicar_parametros(base, 30, nivel_servico=0.95, desvio_lead=2,
+                                   desvio_demanda=np.zeros(len(base["kit_index"].vocab))).set_index("SKU")
+    assert (sem["Estoque de segurança"] == 0).all()
+    assert (com["Estoque de segurança"] > 0).any()
+    assert (com["Compra sugerida"] >= sem["Compra sugerida"]).all()
+
+def test_resultado_leva_descricao_e_status_do_catalogo(base):
+    df = logic.aplicar_parametros(base, 30)
+    assert {"descricao", "status_reposicao"} <= set(df.columns)
+    por_sku = df.set_index("SKU")
+    assert por_sku.loc["A", "descricao"] == "Produto A"
+    assert por_sku.loc["A", "status_reposicao"] == "repor"
+    # Fora do resultado: SKU nao_repor e o próprio kit
+    assert "D" not in por_sku.index and "K1" not in por_sku.index
+
+def test_compra_sugerida_igual_ao_calculo_original(prep):
+    # Mesmo ceil direto do merge original, inclusive no ruído de ponto flutuante:
+    # 31 / 60 * 60 = 31.000000000000004 sobe para 32, como antes do índice de kits
+    relatorios = {"FULL": None, "EXT": pd.DataFrame({"sku": ["C", "A"], "qtde_vendida": [31, 125]}),
+                  "FISICO": pd.DataFrame({"sku": ["C", "A"], "saldo": [0, 0], "custo": [1, 1]})}
+    df = logic.aplicar_parametros(logic.preparar_base(prep, relatorios), 60).set_index("SKU")
+    esperado = np.ceil((df["nec_full"] + df["dem_s"] - df["Estoque fisico (Un)"]).clip(lower=0)).astype(int)
+    assert (df["Compra sugerida"] == esperado).all()
+    assert df.loc["C", "Compra sugerida"] == 32
+
+def test_texto_vazio_no_catalogo_converte_para_arrow():
+    catalogo = CATALOGO.copy()
+    catalogo.loc[catalogo["sku"] == "B", ["fornecedor", "descricao"]] = None
+    prep = logic.preparar_catalogo({"catalogo": catalogo, "kits": KITS.copy()})
+    df = logic.aplicar_parametros(logic.preparar_base(prep, relatorios_exemplo()), 30)
+    assert df.set_index("SKU").loc["B", "Fornecedor"] == ""
+    pa.Table.from_pandas(df)  # o que o st.dataframe faz; categoria com str e 0 falhava aqui
+
+def test_sem_empresas_nao_abre_o_pool(monkeypatch):
+    def catalogo():
+        raise AssertionError("sem empresas não precisa do catálogo")
+    monkeypatch.setattr(logic, "_dados_catalogo", catalogo)
+    assert logic.preparar_bases_empresas([]) == {}
+    assert logic.separar_empresas(logic.calcular_reposicao_empresas([], 30)) == {}
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+from src import config, orcamento
+
+def resultado(preco, sugerida, fornecedor=None, vendas=None, estoque=None):
+    n = len(preco)
+    preco, sugerida = np.asarray(preco, dtype=float), np.asarray(sugerida)
+    return pd.DataFrame({
+        "SKU": [f"S{i}" for i in range(n)],
+        "Fornecedor": fornecedor or ["ALFA"] * n,
+        "Preço de custo": preco,
+        "Vendas full": vendas if vendas is not None else [60] * n,
+        "vendas Shopee": [0] * n,
+        "Estoque full (Un)": [0] * n,
+        "Estoque fisico (Un)": estoque if estoque is not None else [0] * n,
+        "Compra sugerida": sugerida,
+        "Valor total da compra sugerida": preco * sugerida,
+    })
+
+def test_sem_orcamento_mantem_a_compra_sugerida():
+    df = resultado([10, 5, 2], [4, 7, 9])
+    out = orcamento.otimizar(df)
+    assert out["Compra sugerida"].tolist() == [4, 7, 9]
+    assert out["Compra sugerida (original)"].tolist() == [4, 7, 9]
+
+def test_sku_sem_custo_fica_com_a_compra_inteira():
+    df = resultado([10, 0, 0, 3], [4, 7, 0, 5])
+    out = orcamento.otimizar(df)
+    assert out["Compra sugerida"].tolist() == [4, 7, 0, 5]
+    assert out.attrs["skus_sem_custo"] == ["S1"]
+    # Orçamento apertado: o sem custo continua inteiro, os outros disputam o valor
+    apertado = orcamento.otimizar(df, orcamento=15)
+    assert apertado["Compra sugerida"].iloc[1] == 7
+    assert apertado["Valor total da compra sugerida"].sum() <= 15
+    assert "S1" in orcamento.para_carrinho(apertado, "ALIVVIA")["sku"].tolist()
+
+def test_respeita_orcamento_global_e_por_fornecedor():
+    df = resultado([10, 10, 10, 10], [10, 10, 10, 10], fornecedor=["ALFA", "ALFA", "BETA", "BETA"])
+    out = orcamento.otimizar(df, orcamento=250, por_fornecedor={"ALFA": 80})
+    valor = out.groupby("Fornecedor")["Valor total da compra sugerida"].sum()
+    assert valor.sum() <= 250
+    assert valor["ALFA"] <= 80
+    assert (out["Compra sugerida"] <= out["Compra sugerida (original)"]).all()
+
+def test_lote_arredonda_em_multiplos():
+    df = resultado([1, 1], [5, 12])
+    out = orcamento.otimizar(df, lote=6)
+    assert out["Compra sugerida"].tolist() == [6, 12]
+
+def test_prioriza_quem_vai_faltar():
+    # Mesmo preço e demanda: quem tem estoque cobre o prazo, quem não tem recebe o orçamento
+    df = resultado([1, 1], [60, 60], estoque=[60, 0])
+    out = orcamento.otimizar(df, orcamento=60)
+    assert out["Compra sugerida"].tolist() == [0, 60]
+
+def test_fornecedor_abaixo_do_minimo_sai():
+    df = resultado([10, 0, 10], [2, 3, 10], fornecedor=["ALFA", "ALFA", "BETA"])
+    out = orcamento.otimizar(df, minimo_fornecedor={"ALFA": 100})
+    assert out.attrs["fornecedores_abaixo_minimo"] == ["ALFA"]
+    assert out["Compra sugerida"].tolist() == [0, 0, 10]
+    assert out.attrs["skus_sem_custo"] == []
+
+def test_rodadas_esgotadas_nao_deixam_fornecedor_abaixo_do_minimo(monkeypatch):
+    monkeypatch.setattr(config, "ORCAMENTO_MAX_RODADAS", 1)
+    df = resultado([10, 10, 10], [2, 1, 10], fornecedor=["ALFA", "GAMA", "BETA"])
+    out = orcamento.otimizar(df, minimo_fornecedor={"ALFA": 100, "GAMA": 50})
+    assert out.attrs["fornecedores_abaixo_minimo"] == ["ALFA", "GAMA"]
+    assert out["Compra sugerida"].tolist() == [0, 0, 10]
@@ -0,0 +1,82 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import httpx
+import pytest
+from src import config, orders_db, supabase_pool
+
+class BancoFalso:
+    """Client com rpc("reservar_numeros_oc") na semântica do upsert de sql/oc_sequencia.sql."""
+
+    def __init__(self):
+        self.ultimos = {}
+        self.chamadas = []
+        self._linha = threading.Lock()  # o upsert trava a linha (prefixo, ano)
+
+    def rpc(self, nome, params):
+        assert nome == "reservar_numeros_oc"
+        def execute():
+            self.chamadas.append(params)
+            chave = (params["p_prefixo"], params["p_ano"])
+            with self._linha:
+                atual = self.ultimos.get(chave, 0)
+                time.sleep(0)  # abre espaço para as outras threads no meio da reserva
+                self.ultimos[chave] = atual + params["p_quantidade"]
+                return SimpleNamespace(data=self.ultimos[chave])
+        return SimpleNamespace(execute=execute)
+
+def test_reservas_simultaneas_nao_se_sobrepoem():
+    banco = BancoFalso()
+    sequencia = orders_db.SequenciaRPC(executar=lambda operacao: operacao(banco))
+
+    def trabalho(i):
+        ids = []
+        for j in range(50):
+            ids += orders_db.reservar_numeros_oc(("ALIVVIA", "JCA")[i % 2], 1 + (i + j) % 4,
+                                                 sequencia=sequencia, ano=1999)
+        return ids
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        todos = [oc for ids in pool.map(trabalho, range(16)) for oc in ids]
+
+    assert len(todos) == len(set(todos))
+    for prefixo in ("ALV", "JCA"):
+        numeros = sorted(int(oc.rsplit("-", 1)[1]) for oc in todos if oc.startswith(f"OC-{prefixo}-1999-"))
+        assert numeros == list(range(1, len(numeros) + 1))
+        assert banco.ultimos[(prefixo, 1999)] == len(numeros)
+
+def test_bloco_vem_em_ordem_e_com_o_ultimo_do_rpc():
+    banco = BancoFalso()
+    banco.ultimos[("JCA", 2030)] = 41
+    sequencia = orders_db.SequenciaRPC(executar=lambda operacao: operacao(banco))
+    assert orders_db.reservar_numeros_oc("JCA", 3, sequencia=sequencia, ano=2030) == \
+        ["OC-JCA-2030-042", "OC-JCA-2030-043", "OC-JCA-2030-044"]
+    assert banco.chamadas == [{"p_prefixo": "JCA", "p_ano": 2030, "p_quantidade": 3}]
+    assert orders_db.reservar_numeros_oc("JCA", 0, sequencia=sequencia, ano=2030) == []
+
+class SemContador:
+    def reservar(self, *a, **k):
+        raise RuntimeError("function reservar_numeros_oc does not exist")
+
+def test_sem_contador_nao_gera_numero(monkeypatch):
+    monkeypatch.setattr(orders_db, "init_supabase", lambda: object())
+    monkeypatch.setattr(orders_db, "_sequencia", SemContador())
+    monkeypatch.setattr(orders_db, "_numero_por_contagem", lambda prefixo, ano: f"OC-{prefixo}-{ano}-007")
+    monkeypatch.setattr(config, "OC_NUMERACAO_POR_CONTAGEM", False)
+    assert orders_db.gerar_numero_oc("JCA") is None
+    monkeypatch.setattr(config, "OC_NUMERACAO_POR_CONTAGEM", True)
+    assert orders_db.gerar_numero_oc("JCA").endswith("-007")
+
+def test_reserva_no_pool_nao_repete_apos_falha_de_transporte(monkeypatch):
+    chamadas = []
+    def execute():
+        chamadas.append(1)
+        raise httpx.ReadTimeout("resposta perdida")
+    cliente = SimpleNamespace(rpc=lambda nome, params: SimpleNamespace(execute=execute))
+    monkeypatch.setattr(orders_db, "_credenciais", lambda: ("http://banco", "chave"))
+    monkeypatch.setattr(supabase_pool, "obter_cliente", lambda url, key: cliente)
+    monkeypatch.setattr(config, "SUPABASE_RETRIES", 3)
+    with pytest.raises(httpx.ReadTimeout):
+        orders_db.reservar_numeros_oc("JCA", 5, sequencia=orders_db.SequenciaRPC(), ano=2030)
+    assert len(chamadas) == 1
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from src import config, previsao
+
+def test_modelo_padrao_nao_mexe_na_demanda():
+    hist = np.random.default_rng(0).poisson(3, (5, 90))
+    assert np.array_equal(previsao.fatores(hist), np.ones(5))
+    assert np.allclose(previsao.prever(hist, horizonte=3), hist[:, -60:].mean(axis=1)[:, None])
+    with pytest.raises(ValueError):
+        previsao.prever(hist, "nao_existe")
+
+def test_fator_da_media_movel_segue_a_aceleracao_e_tem_teto():
+    # 32 dias a 1/dia e 28 a 2/dia: média 60d = 88/60, média 28d = 2
+    hist = np.array([[1.0] * 32 + [2.0] * 28, [0.0] * 60, [0.0] * 50 + [30.0] * 10])
+    f = previsao.fatores(hist, "media_movel")
+    assert np.isclose(f[0], 2 / (88 / 60))
+    assert f[1] == 1.0  # sem venda em 60 dias
+    # Janela de 7 dias: 210/7 contra 300/60 daria 6x, passa do teto
+    assert previsao.fatores(hist, "media_movel", janela=7)[2] == config.PREVISAO_FATOR_MAX
+
+def test_sazonal_repete_o_perfil_semanal():
+    semana = np.array([0.0, 0, 0, 0, 0, 7, 7])
+    prev = previsao.prever(np.tile(semana, 4)[None, :], "sazonal", horizonte=9)
+    assert np.allclose(prev[0], np.tile(semana, 2)[:9])
+
+def test_sazonal_fora_da_selecao_sobre_uploads():
+    # A série dos uploads é o total da janela espalhado por igual: o sazonal sai plano
+    plana = np.full((1, 60), 2.0)
+    assert np.allclose(previsao.prever(plana, "sazonal", horizonte=7), 2.0)
+    assert "sazonal" not in previsao.MODELOS_UPLOADS
+    assert previsao.PADRAO in previsao.MODELOS_UPLOADS
+
+def test_backtest():
+    with pytest.raises(ValueError, match="90 dias"):
+        previsao.backtest(np.ones((2, 80)), horizonte=30)
+    # Demanda constante: todo modelo acerta
+    out = previsao.backtest(np.full((3, 150), 2.0), horizonte=30, origens=3)
+    assert set(out["Modelo"]) == set(previsao.MODELOS)
+    assert (out["Origens"] == 3).all()
+    assert np.allclose(out[["MAE", "WAPE", "Viés"]].to_numpy(dtype=float), 0)
+
+def test_alinhar_e_serie_explodida(prep):
+    ki = prep["kit_index"]
+    vetor = previsao.alinhar(ki, ["A", "X"], [2.0, 9.0])
+    assert vetor[ki.vocab.get_loc("A")] == 2.0 and (np.delete(vetor, ki.vocab.get_loc("A")) == 1.0).all()
+    # K1 = 2 A + 1 B, dia a dia
+    m = previsao.serie_explodida(ki, ["K1", "A"], np.array([[1.0, 2.0], [5.0, 0.0]]))
+    assert m.shape == (len(ki.vocab), 2)
+    assert np.allclose(m[ki.vocab.get_loc("A")], [7.0, 4.0])
+    assert np.allclose(m[ki.vocab.get_loc("B")], [1.0, 2.0])
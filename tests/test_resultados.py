@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src import resultados
+
+@pytest.fixture
+def resultado():
+    df = pd.DataFrame({
+        "SKU": pd.Categorical(["A", "B", "A", "C"]),
+        "Fornecedor": ["ALFA", "BETA", "ALFA", "GAMA"],
+        "Preço de custo": [10.0, 2.5, 99.0, 0.0],
+        "Vendas full": [6, 0, 1, 3], "vendas Shopee": [4, 2, 1, 0],
+        "Estoque full (Un)": [1, 0, 0, 0], "Estoque fisico (Un)": [2, 5, 0, 1],
+        "Compra sugerida": [8, 0, 1, 2], "Valor total da compra sugerida": [80.0, 0.0, 99.0, 0.0],
+    })
+    return resultados.Resultado("ALIVVIA", df, "v1")
+
+def test_lookup_por_sku_com_esquema_estavel(resultado):
+    assert len(resultado) == 3 and "A" in resultado and "Z" not in resultado
+    linha = resultado.get("A")
+    assert set(linha) == set(resultados.COLUNAS)
+    # SKU repetido: vale a primeira linha; coluna ausente no motor vem zerada; derivadas somadas
+    assert linha["Preco"] == 10.0 and linha["Estoque_Seguranca"] == 0
+    assert linha["Vendas_Total_60d"] == 10 and linha["Estoque_Total"] == 3
+    assert resultado.get("Z", "nada") == "nada"
+    assert resultado.posicoes(["C", "Z", "A"]).tolist() == [2, -1, 0]
+
+def test_frame_so_leitura_sem_copia(resultado):
+    f = resultado.frame()
+    assert np.shares_memory(f["Preco"].to_numpy(), resultado.coluna("Preco"))
+    with pytest.raises(ValueError):
+        f.loc["A", "Preco"] = 0
+    with pytest.raises(ValueError):
+        resultado.coluna("Preco")[0] = 0
+    # Trocar a coluna inteira só muda o frame de quem chamou
+    f["Preco"] = 0.0
+    assert resultado.frame().loc["A", "Preco"] == 10.0
+    assert resultado.get("A")["Preco"] == 10.0
+
+def test_construir_ignora_empresa_sem_dados():
+    df = pd.DataFrame({"SKU": ["A"], "Compra sugerida": [1]})
+    publicados = resultados.construir({"ALIVVIA": df, "JCA": df.iloc[:0], "X": None}, ("chave",))
+    assert list(publicados) == ["ALIVVIA"]
+    assert publicados["ALIVVIA"].versao == resultados.versao(("chave",))
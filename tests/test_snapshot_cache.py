@@ -0,0 +1,64 @@
+import glob
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from src import config, logic, snapshot_cache, utils
+
+AMOSTRAS = sorted(glob.glob(f"{config.STORAGE_DIR}/*.bin"))
+
+@pytest.fixture(autouse=True)
+def pasta_snapshots(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(snapshot_cache, "_INDEX_FILE", str(tmp_path / "index.json"))
+
+@pytest.mark.parametrize("arquivo", AMOSTRAS, ids=lambda a: a.rsplit("/", 1)[-1])
+def test_snapshot_devolve_o_mesmo_que_a_leitura(arquivo):
+    with open(arquivo, "rb") as f:
+        content = f.read()
+    fresco = logic.parse_relatorio(content)
+    assert fresco is not None
+    registrado = snapshot_cache.registrar("EMP/X.xlsx", content, logic.parse_relatorio, hash_origem="etag")
+    pd.testing.assert_frame_equal(registrado, fresco)
+    pd.testing.assert_frame_equal(snapshot_cache.obter("EMP/X.xlsx", "etag"), fresco)
+
+def test_obter_so_com_o_mesmo_hash_de_origem():
+    df = pd.DataFrame({"sku": ["A", "B"], "venda": [1, 2]})
+    snapshot_cache.registrar("EMP/FULL.xlsx", b"conteudo", lambda c: df, hash_origem="v1")
+    assert snapshot_cache.obter("EMP/FULL.xlsx", "v2") is None
+    assert snapshot_cache.obter("EMP/FULL.xlsx", None) is None
+    lido = snapshot_cache.obter("EMP/FULL.xlsx", "v1", colunas=lambda nomes: ["sku"])
+    assert list(lido.columns) == ["sku"]
+
+def test_coluna_mista_volta_com_os_mesmos_valores(tmp_path):
+    df = pd.DataFrame({
+        "sku": ["A", "B", "C", "D", "E"],
+        "qtd": pd.Series([1, "1.234,5", 2.5, None, "abc"], dtype=object),
+        "preco": pd.Series([np.int64(3), 1.5, "R$ 2,00", np.nan, 7], dtype=object),
+    })
+    caminho = str(tmp_path / "misto.parquet")
+    snapshot_cache.salvar_parquet(df, caminho)
+    lido = snapshot_cache.ler_parquet(caminho)
+    pd.testing.assert_frame_equal(lido, df)
+    assert [type(v) for v in lido["qtd"]] == [int, str, float, type(None), str]
+    pd.testing.assert_series_equal(utils.br_series_to_float(lido["preco"]), utils.br_series_to_float(df["preco"]))
+    assert list(snapshot_cache.ler_parquet(caminho, colunas=["qtd"])["qtd"]) == list(lido["qtd"])
+
+def test_leitura_fora_do_lock(monkeypatch):
+    snapshot_cache.registrar("EMP/FULL.xlsx", b"x", lambda c: pd.DataFrame({"sku": ["A"]}), hash_origem="v1")
+    ler = snapshot_cache.ler_parquet
+    livre = []
+
+    def ler_checando(*args, **kwargs):
+        # Outra thread (outra empresa) consegue o lock enquanto este Parquet é lido
+        def tentar():
+            ok = snapshot_cache._lock.acquire(timeout=1)
+            livre.append(ok)
+            if ok: snapshot_cache._lock.release()
+        t = threading.Thread(target=tentar)
+        t.start(); t.join()
+        return ler(*args, **kwargs)
+
+    monkeypatch.setattr(snapshot_cache, "ler_parquet", ler_checando)
+    assert snapshot_cache.obter("EMP/FULL.xlsx", "v1") is not None
+    assert livre == [True]
@@ -0,0 +1,24 @@
+import threading
+from src import storage
+
+class Arquivo:
+    type = "text/csv"
+    def getvalue(self): return b"sku;venda\nA;1\n"
+
+def test_upload_nao_espera_o_snapshot(monkeypatch):
+    enviados, registrados = [], []
+    liberar = threading.Event()
+
+    def registrar(path, content):
+        liberar.wait(5)
+        registrados.append(path)
+
+    monkeypatch.setattr(storage, "get_client", lambda: object())
+    monkeypatch.setattr(storage, "_executar", lambda operacao: enviados.append(operacao))
+    monkeypatch.setattr(storage, "_registrar_snapshot", registrar)
+
+    assert storage.upload(Arquivo(), "ALIVVIA/FULL.xlsx") is True
+    assert len(enviados) == 2 and registrados == []
+    liberar.set()
+    storage._pos_upload.submit(lambda: None).result(timeout=5)
+    assert registrados == ["ALIVVIA/FULL.xlsx"]
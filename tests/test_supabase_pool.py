@@ -0,0 +1,41 @@
+import threading
+import time
+from src import config, supabase_pool
+
+URL, KEY = "http://banco.local", "chave"
+
+def test_cliente_com_os_padroes_do_storage_e_postgrest(monkeypatch):
+    monkeypatch.setattr(supabase_pool, "_pool", {})
+    supabase_pool.obter_cliente(URL, KEY)
+    http = supabase_pool._pool[(URL, KEY)]["http"]
+    assert http.follow_redirects
+    supabase_pool.reconectar(URL, KEY)
+
+def test_health_check_fora_do_lock(monkeypatch):
+    monkeypatch.setattr(supabase_pool, "_pool", {})
+    monkeypatch.setattr(config, "SUPABASE_HEALTHCHECK_S", 0.05)
+    ping_comecou, liberar = threading.Event(), threading.Event()
+    def saudavel_lento(url, key, entrada):
+        ping_comecou.set()
+        liberar.wait(5)
+        return False
+    monkeypatch.setattr(supabase_pool, "_saudavel", saudavel_lento)
+
+    antigo = supabase_pool.obter_cliente(URL, KEY)
+    time.sleep(0.1)
+    resultado = {}
+    t = threading.Thread(target=lambda: resultado.setdefault("c", supabase_pool.obter_cliente(URL, KEY)))
+    t.start()
+    assert ping_comecou.wait(5)
+    # Com o ping em andamento, outra credencial (e a mesma) não esperam o lock
+    inicio = time.monotonic()
+    supabase_pool.obter_cliente(URL, "outra")
+    assert supabase_pool.obter_cliente(URL, KEY) is antigo
+    assert time.monotonic() - inicio < 1
+    liberar.set()
+    t.join(5)
+    # Ping falhou: a entrada antiga sai e vem um cliente novo
+    assert resultado["c"] is not antigo
+    assert supabase_pool.obter_cliente(URL, KEY) is resultado["c"]
+    for k in (KEY, "outra"):
+        supabase_pool.reconectar(URL, k)